@@ -0,0 +1,94 @@
+"""
+JWT authentication without a users query on read requests.
+
+For safe methods, ClaimsJWTAuthentication returns a ClaimsUser built from the
+validated token instead of loading the User row. Whether the account is
+active, its role and its student profile come from a small status record in
+the shared cache. The record is dropped whenever the user or their student
+profile is saved or deleted (see signals.py), so blocking a user or changing a
+role takes effect on the next request. Writes still load the full User.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from .models import User
+
+
+def user_status_cache_key(user_id):
+    return f'auth:user-status:{user_id}'
+
+
+def get_user_status(user_id):
+    """
+    Return {'is_active', 'role', 'student_id'} for a user, or None if the
+    user does not exist. Cached for AUTH_USER_STATUS_TIMEOUT seconds.
+    """
+    key = user_status_cache_key(user_id)
+    status = cache.get(key)
+    if status is None:
+        # From the primary, so a lagging replica cannot re-cache a blocked user
+        row = User.objects.using('default').filter(pk=user_id).values(
+            'is_active', 'role', 'student_profile__id'
+        ).first()
+        status = {
+            'is_active': row['is_active'],
+            'role': row['role'],
+            'student_id': row['student_profile__id'],
+        } if row else {'is_active': False, 'role': None, 'student_id': None, 'missing': True}
+        cache.set(key, status, timeout=settings.AUTH_USER_STATUS_TIMEOUT)
+    return None if status.get('missing') else status
+
+
+def invalidate_user_status(user_id):
+    cache.delete(user_status_cache_key(user_id))
+
+
+class ClaimsUser(TokenUser):
+    """
+    Read-only stand-in for User, built from token claims and the cached
+    status record. Has what permissions and get_queryset need: id, email,
+    role, is_admin, is_student and student_id.
+    """
+    def __init__(self, token, status):
+        super().__init__(token)
+        self.is_active = status['is_active']
+        self.role = status['role']
+        self.student_id = status['student_id']
+
+    @property
+    def is_admin(self):
+        return self.role == User.Role.ADMIN
+
+    @property
+    def is_student(self):
+        return self.role == User.Role.STUDENT
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that skips the users query for GET, HEAD and OPTIONS.
+    """
+    def authenticate(self, request):
+        self.safe_method = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if not self.safe_method:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        status = get_user_status(user_id)
+        if status is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not status['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return ClaimsUser(validated_token, status)
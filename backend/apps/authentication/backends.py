@@ -0,0 +1,13 @@
+from django.contrib.auth.backends import ModelBackend
+from .hashing import hashing_slot
+
+
+class BoundedHashingModelBackend(ModelBackend):
+    """
+    ModelBackend that checks passwords inside a hashing slot, so a burst of
+    logins queues for CPU instead of hashing all at once. Unknown emails are
+    hashed too (Django does this against timing attacks), so they queue as well.
+    """
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        with hashing_slot():
+            return super().authenticate(request, username=username, password=password, **kwargs)
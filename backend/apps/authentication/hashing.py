@@ -0,0 +1,116 @@
+"""
+Bounded password hashing for login bursts.
+
+PBKDF2 takes a few hundred milliseconds of CPU per login. When hundreds of
+students log in at once, running every hash at the same time only makes each
+one slower, and it ties up every sync worker. Logins therefore take one of
+LOGIN_HASH_CONCURRENCY slots per machine before checking a password, and
+wait up to LOGIN_HASH_QUEUE_TIMEOUT seconds for a free one. Past that they
+get a 503, and the rest of the API keeps responding.
+
+Slots are flock()ed files in LOGIN_HASH_LOCK_DIR. The kernel releases the
+lock when a process exits, so a killed worker never leaks a slot. A flock()
+belongs to the open file, not the thread, so every acquire opens the slot
+files afresh; threads of one worker never share a slot. Waiting,
+active and rejected counts per machine are kept in the cache (see
+hashing_stats); they are approximate and reset if a key expires.
+"""
+import fcntl
+import os
+import socket
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import APIException
+
+POLL_INTERVAL = 0.02
+
+# Counter keys expire so a worker killed mid-login cannot skew them for long
+COUNTER_TIMEOUT = 300
+
+
+class HashingBusy(APIException):
+    status_code = 503
+    default_detail = 'Too many sign-ins at the moment. Please try again in a few seconds.'
+    default_code = 'login_busy'
+
+
+def _counter_key(name):
+    return f'login-hash:{socket.gethostname()}:{name}'
+
+
+def _count(name, delta):
+    key = _counter_key(name)
+    cache.add(key, 0, timeout=COUNTER_TIMEOUT)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        pass
+
+
+def hashing_stats():
+    """
+    Return this machine's {'waiting', 'active', 'rejected'} login hash counts.
+    """
+    names = ('waiting', 'active', 'rejected')
+    values = cache.get_many([_counter_key(name) for name in names])
+    return {name: max(0, values.get(_counter_key(name), 0)) for name in names}
+
+
+def _slot_paths():
+    os.makedirs(settings.LOGIN_HASH_LOCK_DIR, exist_ok=True)
+    return [
+        os.path.join(settings.LOGIN_HASH_LOCK_DIR, f'slot-{number}.lock')
+        for number in range(settings.LOGIN_HASH_CONCURRENCY)
+    ]
+
+
+def _try_acquire(slot_paths):
+    """
+    Lock a free slot file and return it open, or None if all are held.
+    Closing the file releases the slot.
+    """
+    for path in slot_paths:
+        slot_file = open(path, 'a')
+        try:
+            fcntl.flock(slot_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            slot_file.close()
+            continue
+        return slot_file
+    return None
+
+
+@contextmanager
+def hashing_slot():
+    """
+    Hold one of this machine's password hashing slots for the block.
+    Raises HashingBusy if none frees up within LOGIN_HASH_QUEUE_TIMEOUT.
+    """
+    if settings.LOGIN_HASH_CONCURRENCY <= 0:
+        yield
+        return
+
+    slot_paths = _slot_paths()
+    slot = _try_acquire(slot_paths)
+    if slot is None:
+        _count('waiting', 1)
+        deadline = time.monotonic() + settings.LOGIN_HASH_QUEUE_TIMEOUT
+        try:
+            while slot is None and time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                slot = _try_acquire(slot_paths)
+        finally:
+            _count('waiting', -1)
+        if slot is None:
+            _count('rejected', 1)
+            raise HashingBusy()
+
+    _count('active', 1)
+    try:
+        yield
+    finally:
+        _count('active', -1)
+        slot.close()
@@ -1,4 +1,5 @@
 from django.contrib.auth.models import AbstractUser
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 
 
@@ -37,3 +38,13 @@ class User(AbstractUser):
     @property
     def is_student(self):
         return self.role == self.Role.STUDENT
+
+    @property
+    def student_id(self):
+        """
+        ID of the linked student profile, or None.
+        """
+        try:
+            return self.student_profile.pk
+        except ObjectDoesNotExist:
+            return None
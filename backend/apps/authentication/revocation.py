@@ -0,0 +1,118 @@
+"""
+In-process Bloom filter of blacklisted refresh token JTIs.
+
+Every token refresh checks the blacklist. The filter answers "definitely not
+blacklisted" for almost every token without a query; only possible members
+(real ones and the ~1% false positives) fall through to the database check.
+
+Each process keeps its own filter. Tokens blacklisted by this process are
+added straight away, and new blacklist rows from other processes are read
+incrementally, by ID, at most every TOKEN_BLACKLIST_FILTER_REFRESH seconds.
+A token revoked on another worker can therefore refresh for up to that many
+seconds, which is well inside the access token lifetime a logout already
+leaves valid. When the filter holds more entries than it was sized for it
+is rebuilt at twice the size from the current table, which also drops rows
+removed by compact_token_blacklist.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+FALSE_POSITIVE_RATE = 0.01
+
+# Re-read this many IDs below the last one seen, so rows whose transaction
+# committed after a higher ID was already visible are not skipped
+SYNC_OVERLAP = 100
+
+SYNC_BATCH_SIZE = 5000
+
+
+class BloomFilter:
+    def __init__(self, capacity, false_positive_rate=FALSE_POSITIVE_RATE):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, value):
+        # Skip repeats (the sync overlap re-reads rows) so count stays honest
+        if value in self:
+            return
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class RevokedTokenFilter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = None
+        self.last_id = 0
+        self.synced_at = None
+
+    def might_contain(self, jti):
+        """
+        False if the JTI is certainly not blacklisted, True if it may be.
+        """
+        self.sync()
+        return jti in self.bloom
+
+    def add(self, jti):
+        with self.lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+
+    def sync(self, force=False):
+        with self.lock:
+            now = time.monotonic()
+            if (
+                not force and self.synced_at is not None
+                and now - self.synced_at < settings.TOKEN_BLACKLIST_FILTER_REFRESH
+            ):
+                return
+            if self.bloom is None or self.bloom.count > self.bloom.capacity:
+                self._rebuild()
+            else:
+                self._load(since_id=max(0, self.last_id - SYNC_OVERLAP))
+            self.synced_at = now
+
+    def _rebuild(self):
+        capacity = settings.TOKEN_BLACKLIST_FILTER_CAPACITY
+        if self.bloom is not None:
+            capacity = max(capacity, self.bloom.capacity * 2)
+        self.bloom = BloomFilter(max(capacity, BlacklistedToken.objects.count() * 2))
+        self.last_id = 0
+        self._load(since_id=0)
+
+    def _load(self, since_id):
+        while True:
+            rows = list(
+                BlacklistedToken.objects.filter(id__gt=since_id)
+                .order_by('id')
+                .values_list('id', 'token__jti')[:SYNC_BATCH_SIZE]
+            )
+            for row_id, jti in rows:
+                self.bloom.add(jti)
+            if rows:
+                since_id = rows[-1][0]
+                self.last_id = max(self.last_id, since_id)
+            if len(rows) < SYNC_BATCH_SIZE:
+                return
+
+
+revoked_tokens = RevokedTokenFilter()
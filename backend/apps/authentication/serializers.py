@@ -1,6 +1,10 @@
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from .models import User
+from .tokens import FilteredRefreshToken
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -27,6 +31,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
     def validate(self, attrs):
         data = super().validate(attrs)
+        self.update_last_login(self.user)
         # Add extra responses
         data['user'] = {
             'id': self.user.id,
@@ -36,6 +41,26 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         }
         return data
 
+    @staticmethod
+    def update_last_login(user):
+        """
+        Record the login time, skipping the write when the stored value is
+        within LAST_LOGIN_RESOLUTION seconds, so repeated logins cost nothing.
+        Uses a plain UPDATE, which sends no signals.
+        """
+        now = timezone.now()
+        if user.last_login and now - user.last_login < timedelta(seconds=settings.LAST_LOGIN_RESOLUTION):
+            return
+        User.objects.filter(pk=user.pk).update(last_login=now)
+        user.last_login = now
+
+
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh that checks the blacklist through the revoked-JTI filter.
+    """
+    token_class = FilteredRefreshToken
+
 
 class RegisterSerializer(serializers.ModelSerializer):
     """
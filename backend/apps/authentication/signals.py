@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.students.models import Student
+from .authentication import invalidate_user_status
+from .models import User
+
+
+def invalidate_after_commit(user_id):
+    """
+    Drop the cached status once the transaction commits, so a concurrent
+    request cannot re-cache the old row.
+    """
+    transaction.on_commit(lambda: invalidate_user_status(user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    invalidate_after_commit(instance.pk)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_student_user(sender, instance, **kwargs):
+    # The status record carries the student profile ID
+    if instance.user_id:
+        invalidate_after_commit(instance.user_id)
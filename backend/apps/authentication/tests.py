@@ -0,0 +1,144 @@
+import shutil
+import tempfile
+import threading
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.courses.models import Course
+from apps.invoices.models import Invoice
+from apps.students.models import Student
+from .hashing import HashingBusy, hashing_slot
+from .models import User
+
+
+class HashingSlotTests(SimpleTestCase):
+    def setUp(self):
+        lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, lock_dir, ignore_errors=True)
+        settings_override = override_settings(
+            LOGIN_HASH_LOCK_DIR=lock_dir, LOGIN_HASH_CONCURRENCY=1, LOGIN_HASH_QUEUE_TIMEOUT=0
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def hold_slot_in_thread(self):
+        """
+        Take a slot in another thread of this process; returns the event that releases it.
+        """
+        held, release = threading.Event(), threading.Event()
+
+        def hold():
+            with hashing_slot():
+                held.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(release.set)
+        self.assertTrue(held.wait(5))
+        return release
+
+    def test_threads_do_not_share_a_slot(self):
+        self.hold_slot_in_thread()
+        with self.assertRaises(HashingBusy):
+            with hashing_slot():
+                pass
+
+    def test_slot_is_free_after_release(self):
+        with hashing_slot():
+            pass
+        release = self.hold_slot_in_thread()
+        release.set()
+        with override_settings(LOGIN_HASH_QUEUE_TIMEOUT=5):
+            with hashing_slot():
+                pass
+
+    @override_settings(LOGIN_HASH_CONCURRENCY=2)
+    def test_concurrency_allows_that_many_threads(self):
+        self.hold_slot_in_thread()
+        with hashing_slot():
+            with self.assertRaises(HashingBusy):
+                with hashing_slot():
+                    pass
+
+
+class ClaimsJWTAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin@example.com', email='admin@example.com', password='x', role=User.Role.ADMIN
+        )
+        cls.user = User.objects.create_user(
+            username='student@example.com', email='student@example.com', password='x', role=User.Role.STUDENT
+        )
+        other = User.objects.create_user(username='other@example.com', email='other@example.com', password='x')
+        cls.other_student = Student.objects.create(
+            user=other, name='Other', email=other.email, phone='0100000000', enrollment_date=date(2026, 1, 1)
+        )
+        course = Course.objects.create(name='Course', description='', duration=3, fee=Decimal('1000.00'))
+        Invoice.objects.create(
+            student=cls.other_student, course=course, amount=Decimal('500.00'), payment_date=date(2026, 1, 10)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def client_for(self, user, **claims):
+        token = AccessToken.for_user(user)
+        for name, value in claims.items():
+            token[name] = value
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def save_and_commit(self, user, **fields):
+        for name, value in fields.items():
+            setattr(user, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+    def test_deactivated_user_is_rejected_on_reads(self):
+        client = self.client_for(self.admin)
+        self.assertEqual(client.get('/api/invoices/custom/').status_code, 200)
+
+        self.save_and_commit(self.admin, is_active=False)
+        self.assertEqual(client.get('/api/invoices/custom/').status_code, 401)
+
+    def test_role_comes_from_the_database(self):
+        # A token claiming admin, e.g. issued before a demotion
+        client = self.client_for(self.user, role=User.Role.ADMIN)
+        self.assertEqual(client.get('/api/invoices/custom/').status_code, 403)
+
+        client = self.client_for(self.admin)
+        self.save_and_commit(self.admin, role=User.Role.STUDENT)
+        self.assertEqual(client.get('/api/invoices/custom/').status_code, 403)
+
+    def test_student_id_comes_from_the_database(self):
+        client = self.client_for(self.user, student_id=self.other_student.pk)
+        response = client.get('/api/invoices/student/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 0)
+
+    def test_student_without_profile_sees_nothing(self):
+        response = self.client_for(self.user).get('/api/invoices/student/')
+        self.assertEqual(response.data['count'], 0)
+
+        Student.objects.filter(pk=self.other_student.pk).update(user=self.user)
+        cache.clear()
+        self.assertEqual(self.client_for(self.user).get('/api/invoices/student/').data['count'], 1)
+
+    def test_writes_load_the_user_row(self):
+        client = self.client_for(self.admin)
+        client.get('/api/invoices/custom/')
+        # Bypasses the signals, so the cached status still says active
+        User.objects.filter(pk=self.admin.pk).update(is_active=False)
+
+        self.assertEqual(client.get('/api/invoices/custom/').status_code, 200)
+        self.assertEqual(client.post('/api/invoices/custom/', {}, format='json').status_code, 401)
@@ -1,11 +1,15 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
-from .views import CustomTokenObtainPairView, RegisterView, get_current_user, logout_view
+from .views import (
+    AsyncCurrentUserView, CustomTokenObtainPairView, RegisterView, get_current_user, logout_view
+)
 
 urlpatterns = [
     path('login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('register/', RegisterView.as_view(), name='register'),
-    path('me/', get_current_user, name='current_user'),
+    path('me/', AsyncCurrentUserView.as_view() if settings.ASYNC_READ_VIEWS else get_current_user,
+         name='current_user'),
     path('logout/', logout_view, name='logout'),
 ]
@@ -1,10 +1,14 @@
 from rest_framework import status, generics
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.tokens import RefreshToken
+from apps.core.async_views import AsyncAPIView
+from .models import User
 from .serializers import CustomTokenObtainPairSerializer, UserSerializer, RegisterSerializer
+from .tokens import FilteredRefreshToken
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -23,6 +27,7 @@ class RegisterView(generics.CreateAPIView):
 
 
 @api_view(['GET'])
+@authentication_classes([JWTAuthentication])  # Needs the full User row
 @permission_classes([IsAuthenticated])
 def get_current_user(request):
     """
@@ -32,6 +37,21 @@ def get_current_user(request):
     return Response(serializer.data)
 
 
+class AsyncCurrentUserView(AsyncAPIView):
+    """
+    get_current_user for ASGI deployments. The token claims authenticate the
+    request without a query; the User row is then read with the async ORM.
+    """
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        try:
+            user = await User.objects.aget(pk=request.user.id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        return Response(UserSerializer(user).data)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout_view(request):
@@ -41,7 +61,7 @@ def logout_view(request):
     try:
         refresh_token = request.data.get('refresh_token')
         if refresh_token:
-            token = RefreshToken(refresh_token)
+            token = FilteredRefreshToken(refresh_token)
             token.blacklist()
         return Response({'message': 'Successfully logged out.'}, status=status.HTTP_200_OK)
     except Exception as e:
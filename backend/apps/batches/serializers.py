@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from apps.core.serializers import IdentityMapMixin, OmitFieldsMixin
 from .models import Batch
 from apps.courses.serializers import CourseSerializer
 
 
-class BatchSerializer(serializers.ModelSerializer):
+class BatchSerializer(IdentityMapMixin, OmitFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Batch model.
     """
@@ -1,6 +1,7 @@
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
 from apps.authentication.permissions import IsAdminOrReadOnly
+from apps.core.async_views import AsyncListAPIView
 from .models import Batch
 from .serializers import BatchSerializer
 
@@ -26,3 +27,24 @@ class BatchViewSet(viewsets.ModelViewSet):
         if course_id:
             queryset = queryset.filter(course_id=course_id)
         return queryset
+
+
+class AsyncBatchListView(AsyncListAPIView):
+    """
+    The list action of BatchViewSet on the async ORM, routed instead of it
+    for GET under ASGI. Accepts the same ?course= filter.
+    """
+    queryset = BatchViewSet.queryset
+    serializer_class = BatchViewSet.serializer_class
+    permission_classes = BatchViewSet.permission_classes
+    filter_backends = BatchViewSet.filter_backends
+    search_fields = BatchViewSet.search_fields
+    ordering_fields = BatchViewSet.ordering_fields
+    ordering = BatchViewSet.ordering
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        course_id = self.request.query_params.get('course', None)
+        if course_id:
+            queryset = queryset.filter(course_id=course_id)
+        return queryset
@@ -9,8 +9,13 @@ from reportlab.lib.units import inch, mm
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.enums import TA_CENTER
 from reportlab.pdfgen import canvas
-from django.conf import settings
-import os
+from reportlab.graphics.barcode.qr import QrCodeWidget
+from apps.core.pdf_pool import render_pdf
+from apps.core.pdf_profiles import PDF_AUTHOR, pdf_options
+from apps.core.storage import sharded_path, save_media_file
+from .tokens import certificate_verify_url
+from io import BytesIO
+from itertools import groupby
 
 
 # ==================== COLOR PALETTE ====================
@@ -140,22 +145,55 @@ class CertificateCanvas(canvas.Canvas):
         self.restoreState()
 
 
+def _draw_verify_qr(c, url, x, y, size):
+    """
+    Draw a QR code for the signed verify URL with its bottom-left corner at (x, y).
+
+    The dark modules are one filled path in module units: each run of modules
+    costs four small integers, not a separately styled rectangle.
+    """
+    widget = QrCodeWidget(url, barLevel='M')
+    widget.qr.make()
+    count = widget.qr.getModuleCount()
+    border = widget.barBorder
+
+    path = c.beginPath()
+    for row_index, row in enumerate(widget.qr.modules):
+        column = 0
+        for dark, run in groupby(bool(module) for module in row):
+            length = len(list(run))
+            if dark:
+                path.rect(column + border, count + border - row_index - 1, length, 1)
+            column += length
+
+    c.saveState()
+    c.translate(x, y)
+    c.scale(size / (count + 2 * border), size / (count + 2 * border))
+    c.setFillColor(DARK_NAVY)
+    c.drawPath(path, fill=1, stroke=0)
+    c.restoreState()
+
+    c.setFont('Helvetica', 6)
+    c.setFillColor(LIGHT_GRAY)
+    c.drawCentredString(x + size / 2, y - 3*mm, "Scan to verify")
+
+
 def generate_certificate_pdf(certificate):
     """
     Generate a professional academic certificate PDF.
     Landscape A4 with elegant borders, gold accents, and modern typography.
     """
-    # Create directory if it doesn't exist
-    cert_dir = os.path.join(settings.MEDIA_ROOT, 'certificates')
-    os.makedirs(cert_dir, exist_ok=True)
+    # PDF path inside the sharded certificates directory
+    relative_path = sharded_path('certificates', f'certificate_{certificate.certificate_id}.pdf')
+    pdf = render_pdf('certificate', certificate_context(certificate))
+    return save_media_file(relative_path, pdf)
 
-    filename = f'certificate_{certificate.certificate_id}.pdf'
-    filepath = os.path.join(cert_dir, filename)
-
-    w, h = landscape(A4)
 
-    # Prepare certificate data
-    cert_data = {
+def certificate_context(certificate):
+    """
+    Collect the certificate fields into a plain dict for rendering.
+    """
+    return {
         'student_name': certificate.student.name,
         'course_name': certificate.course.name,
         'batch_name': certificate.batch.name if certificate.batch else None,
@@ -163,10 +201,25 @@ def generate_certificate_pdf(certificate):
         'completion_date': certificate.completion_date.strftime('%B %d, %Y'),
         'certificate_id': certificate.certificate_id,
         'issued_at': certificate.issued_at.strftime('%B %d, %Y'),
+        'verify_url': certificate_verify_url(certificate),
     }
 
+
+def render_certificate(cert_data):
+    """
+    Render the certificate layout to PDF bytes.
+    """
+    buffer = BytesIO()
+
+    w, h = landscape(A4)
+
     # Create canvas with custom drawing
-    c = CertificateCanvas(filepath, pagesize=landscape(A4), certificate_data=cert_data)
+    c = CertificateCanvas(
+        buffer, pagesize=landscape(A4), certificate_data=cert_data, **pdf_options(cert_data)
+    )
+    c.setTitle(f"Certificate {cert_data['certificate_id']}")
+    c.setAuthor(PDF_AUTHOR)
+    c.setCreator(PDF_AUTHOR)
 
     # ==================== INSTITUTION HEADER ====================
 
@@ -215,7 +268,7 @@ def generate_certificate_pdf(certificate):
     # Student name - large and prominent
     c.setFont('Helvetica-Bold', 32)
     c.setFillColor(DARK_NAVY)
-    c.drawCentredString(w/2, name_y + 4*mm, certificate.student.name)
+    c.drawCentredString(w/2, name_y + 4*mm, cert_data['student_name'])
 
     # Gold decorative line below name
     c.setStrokeColor(GOLD)
@@ -232,15 +285,15 @@ def generate_certificate_pdf(certificate):
 
     c.setFont('Helvetica-Bold', 22)
     c.setFillColor(GOLD)
-    c.drawCentredString(w/2, h - 145*mm, certificate.course.name)
+    c.drawCentredString(w/2, h - 145*mm, cert_data['course_name'])
 
     # ==================== DETAILS LINE ====================
 
     details_y = h - 158*mm
     details_parts = []
-    if certificate.batch:
-        details_parts.append(f"Batch: {certificate.batch.name}")
-    details_parts.append(f"Duration: {certificate.course.duration} months")
+    if cert_data['batch_name']:
+        details_parts.append(f"Batch: {cert_data['batch_name']}")
+    details_parts.append(f"Duration: {cert_data['duration']} months")
     details_parts.append(f"Completed: {cert_data['completion_date']}")
 
     c.setFont('Helvetica', 10)
@@ -309,7 +362,7 @@ def generate_certificate_pdf(certificate):
     # Certificate ID - left
     c.setFont('Helvetica', 8)
     c.setFillColor(LIGHT_GRAY)
-    c.drawString(30*mm, footer_y, f"Certificate ID: {certificate.certificate_id}")
+    c.drawString(30*mm, footer_y, f"Certificate ID: {cert_data['certificate_id']}")
 
     # Issue date - right
     c.drawRightString(w - 30*mm, footer_y, f"Date of Issue: {cert_data['issued_at']}")
@@ -317,9 +370,15 @@ def generate_certificate_pdf(certificate):
     # Verification note - center
     c.setFont('Helvetica', 7)
     c.setFillColor(colors.HexColor('#AAAAAA'))
-    c.drawCentredString(w/2, footer_y - 6*mm, "This is a computer-generated certificate. Verify authenticity at www.sms.edu/verify")
+    c.drawCentredString(w/2, footer_y - 6*mm, "This is a computer-generated certificate. Scan the QR code or verify at www.sms.edu/verify")
+
+    # ==================== VERIFICATION QR CODE ====================
+
+    if cert_data.get('verify_url'):
+        # Right edge below the corner ornament, clear of the header line
+        _draw_verify_qr(c, cert_data['verify_url'], w - 48*mm, h - 64*mm, 20*mm)
 
     # Save
     c.save()
 
-    return f'certificates/{filename}'
+    return buffer.getvalue()
@@ -1,5 +1,7 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Certificate
+from .tokens import certificate_verify_url
 from apps.students.serializers import StudentSerializer
 from apps.courses.serializers import CourseSerializer
 from apps.batches.serializers import BatchSerializer
@@ -78,14 +80,18 @@ class CertificateSerializer(serializers.ModelSerializer):
     student_details = StudentSerializer(source='student', read_only=True)
     course_details = CourseSerializer(source='course', read_only=True)
     batch_details = BatchSerializer(source='batch', read_only=True)
+    verify_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Certificate
         fields = ['id', 'certificate_id', 'student', 'student_details', 'course',
                   'course_details', 'batch', 'batch_details', 'completion_date',
-                  'pdf_path', 'issued_at', 'created_at', 'updated_at']
+                  'pdf_path', 'verify_url', 'issued_at', 'created_at', 'updated_at']
         read_only_fields = ['id', 'certificate_id', 'pdf_path', 'issued_at', 'created_at', 'updated_at']
 
+    def get_verify_url(self, obj):
+        return certificate_verify_url(obj)
+
     def validate(self, data):
         batch = data.get('batch')
         course = data.get('course')
@@ -114,3 +120,21 @@ class CertificateSerializer(serializers.ModelSerializer):
                 )
 
         return data
+
+
+class CertificateBulkVerifySerializer(serializers.Serializer):
+    """
+    Input for bulk verification: a list of certificate IDs.
+    """
+    certificate_ids = serializers.ListField(
+        child=serializers.CharField(max_length=50),
+        allow_empty=False,
+    )
+
+    def validate_certificate_ids(self, value):
+        # Normalise like the single lookup and drop repeats, keeping the order
+        certificate_ids = list(dict.fromkeys(certificate_id.upper() for certificate_id in value))
+        limit = settings.CERTIFICATE_VERIFY_BULK_MAX
+        if len(certificate_ids) > limit:
+            raise serializers.ValidationError(f'At most {limit} certificate IDs can be verified at once.')
+        return certificate_ids
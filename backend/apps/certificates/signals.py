@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from apps.batches.models import Batch
+from apps.courses.models import Course
+from apps.students.models import Student
+from .models import Certificate
+from .verification import invalidate_verify_cache
+
+
+def invalidate_after_commit(certificate_ids):
+    """
+    Drop cached verify payloads once the transaction commits, so a
+    concurrent lookup cannot re-cache the old rows.
+    """
+    certificate_ids = list(certificate_ids)
+    if certificate_ids:
+        transaction.on_commit(lambda: invalidate_verify_cache(certificate_ids))
+
+
+@receiver(post_save, sender=Certificate)
+@receiver(post_delete, sender=Certificate)
+def invalidate_certificate(sender, instance, **kwargs):
+    # Also clears a cached miss when a new certificate takes the ID
+    invalidate_after_commit([instance.certificate_id])
+
+
+@receiver(post_save, sender=Student)
+def invalidate_student_certificates(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_after_commit(
+            Certificate.objects.filter(student=instance).values_list('certificate_id', flat=True)
+        )
+
+
+@receiver(post_save, sender=Course)
+def invalidate_course_certificates(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_after_commit(
+            Certificate.objects.filter(course=instance).values_list('certificate_id', flat=True)
+        )
+
+
+@receiver(post_save, sender=Batch)
+def invalidate_batch_certificates(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_after_commit(
+            Certificate.objects.filter(batch=instance).values_list('certificate_id', flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Batch)
+def invalidate_deleted_batch_certificates(sender, instance, **kwargs):
+    # Certificates keep their row with batch set to NULL, which sends no
+    # signal of its own, so collect them before the delete
+    invalidate_after_commit(
+        Certificate.objects.filter(batch=instance).values_list('certificate_id', flat=True)
+    )
@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User
+from apps.courses.models import Course
+from apps.students.models import Student
+from .models import Certificate
+from .tokens import certificate_token
+
+
+class CertificateTokenVerifyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(name='Course', description='', duration=3, fee=Decimal('1000.00'))
+        user = User.objects.create_user(username='student@example.com', email='student@example.com', password='x')
+        student = Student.objects.create(
+            user=user, name='Student', email=user.email, phone='0100000000', enrollment_date=date(2026, 1, 1)
+        )
+        cls.certificate = Certificate.objects.create(student=student, course=course, completion_date=date(2026, 6, 30))
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.token = certificate_token(self.certificate)
+
+    def verify(self, **params):
+        return self.client.get('/api/certificates/verify/', {'token': self.token, **params})
+
+    def test_signature_only_needs_no_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.verify()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.data['verified_by'], 'signature')
+        self.assertEqual(response.data['certificate'], {
+            'certificate_id': self.certificate.certificate_id,
+            'student_name': 'Student',
+            'course_name': 'Course',
+            'completion_date': '2026-06-30',
+        })
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_altered_token_is_rejected(self):
+        self.token = self.token[:-1] + ('A' if self.token[-1] != 'A' else 'B')
+        response = self.verify()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.data['valid'])
+
+    def test_check_revocation_confirms_record(self):
+        response = self.verify(check_revocation=1)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['verified_by'], 'record')
+        self.assertEqual(response.data['certificate']['certificate_id'], self.certificate.certificate_id)
+
+    def test_check_revocation_rejects_reissued_certificate(self):
+        self.certificate.issued_at -= timedelta(days=1)
+        self.certificate.save()
+        response = self.verify(check_revocation=1)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(response.data['revoked'])
+
+    def test_check_revocation_rejects_deleted_certificate(self):
+        self.certificate.delete()
+        response = self.verify(check_revocation=1)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(response.data['revoked'])
+        # The signature alone still checks out
+        self.assertEqual(self.verify().status_code, 200)
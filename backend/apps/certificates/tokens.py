@@ -0,0 +1,52 @@
+"""
+Signed certificate verification tokens.
+
+A token carries the certificate ID, student name, course name, completion
+date and issue time, signed with HMAC-SHA256 through django.core.signing.
+The verify endpoint confirms a token from the signature alone; the record
+is only looked up when the caller asks for a revocation check. The token is
+printed on the certificate as a QR code linking to the verify page.
+"""
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core import signing
+
+TOKEN_SALT = 'apps.certificates.verify'
+
+
+def _signer():
+    return signing.Signer(key=settings.CERTIFICATE_TOKEN_KEY, salt=TOKEN_SALT, algorithm='sha256')
+
+
+def certificate_token(certificate):
+    return _signer().sign_object({
+        'i': certificate.certificate_id,
+        'n': certificate.student.name,
+        'c': certificate.course.name,
+        'd': certificate.completion_date.isoformat(),
+        't': int(certificate.issued_at.timestamp()),
+    }, compress=True)
+
+
+def read_certificate_token(token):
+    """
+    Return the claims of a valid token, or None if the signature does not match.
+    """
+    try:
+        claims = _signer().unsign_object(token)
+    except signing.BadSignature:
+        return None
+    return {
+        'certificate_id': claims['i'],
+        'student_name': claims['n'],
+        'course_name': claims['c'],
+        'completion_date': claims['d'],
+        'issued_at': claims['t'],
+    }
+
+
+def certificate_verify_url(certificate):
+    """
+    Public verify page URL for a certificate, as encoded in its QR code.
+    """
+    return f"{settings.CERTIFICATE_VERIFY_URL}?{urlencode({'token': certificate_token(certificate)})}"
@@ -1,12 +1,18 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CertificateViewSet, CertificateVerifyView
+from .views import (
+    AsyncCertificateVerifyView, CertificateViewSet, CertificateVerifyView, CertificateBulkVerifyView
+)
 
 router = DefaultRouter()
 router.register(r'', CertificateViewSet, basename='certificate')
 
+verify_view = AsyncCertificateVerifyView if settings.ASYNC_READ_VIEWS else CertificateVerifyView
+
 urlpatterns = [
     # Public verification endpoint — no auth required
-    path('verify/', CertificateVerifyView.as_view(), name='certificate-verify'),
+    path('verify/', verify_view.as_view(), name='certificate-verify'),
+    path('verify/bulk/', CertificateBulkVerifyView.as_view(), name='certificate-verify-bulk'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,131 @@
+"""
+Cached payloads for the public certificate verification endpoint.
+
+Each certificate's serialized verify payload is kept in the shared cache
+under its certificate_id, and unknown IDs are cached briefly as misses.
+The signals in signals.py drop the entries when a certificate or its
+student, course or batch changes. The student photo URL is resolved per
+response, because it depends on the request host and, on S3, expires.
+Entries are always loaded from the primary database: a lagging read replica
+could otherwise cache a certificate again right after it was invalidated.
+"""
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from .models import Certificate
+from .serializers import CertificateVerifySerializer
+
+# Cached in place of a payload for certificate IDs that do not exist
+MISSING = 'missing'
+
+
+def verify_cache_key(certificate_id):
+    digest = hashlib.md5(certificate_id.encode()).hexdigest()
+    return f'certificates:verify:{digest}'
+
+
+def build_verify_entry(certificate):
+    """
+    Serialize a certificate (with student, course and batch loaded) into a
+    cache entry: the payload, the photo file name and an ETag.
+    """
+    data = dict(CertificateVerifySerializer(certificate).data)
+    # Filled in per response by verify_payload
+    data['student_photo'] = None
+    entry = {
+        'certificate': data,
+        'photo': certificate.student.photo.name or None,
+    }
+    digest = hashlib.md5(json.dumps(entry, sort_keys=True, default=str).encode()).hexdigest()
+    entry['etag'] = f'"{digest}"'
+    return entry
+
+
+def get_verify_entry(certificate_id):
+    """
+    Return the cache entry for `certificate_id`, or None if no such
+    certificate exists. Misses are cached for a shorter time.
+    """
+    key = verify_cache_key(certificate_id)
+    entry = cache.get(key)
+    if entry is None:
+        certificate = Certificate.objects.using('default').select_related(
+            'student', 'course', 'batch'
+        ).filter(certificate_id=certificate_id).first()
+        if certificate is None:
+            cache.set(key, MISSING, timeout=settings.CERTIFICATE_VERIFY_MISS_TIMEOUT)
+            return None
+        entry = build_verify_entry(certificate)
+        cache.set(key, entry, timeout=settings.CERTIFICATE_VERIFY_CACHE_TIMEOUT)
+    return None if entry == MISSING else entry
+
+
+async def aget_verify_entry(certificate_id):
+    """
+    Async form of get_verify_entry, for the ASGI verify view.
+    """
+    key = verify_cache_key(certificate_id)
+    entry = await cache.aget(key)
+    if entry is None:
+        certificate = await Certificate.objects.using('default').select_related(
+            'student', 'course', 'batch'
+        ).filter(certificate_id=certificate_id).afirst()
+        if certificate is None:
+            await cache.aset(key, MISSING, timeout=settings.CERTIFICATE_VERIFY_MISS_TIMEOUT)
+            return None
+        entry = build_verify_entry(certificate)
+        await cache.aset(key, entry, timeout=settings.CERTIFICATE_VERIFY_CACHE_TIMEOUT)
+    return None if entry == MISSING else entry
+
+
+def get_verify_entries(certificate_ids):
+    """
+    Batch form of get_verify_entry: return {certificate_id: entry or None}.
+    Cached entries come from one get_many; the rest are loaded with a single
+    IN query and written back with set_many.
+    """
+    keys = {verify_cache_key(certificate_id): certificate_id for certificate_id in certificate_ids}
+    cached = cache.get_many(list(keys))
+    entries = {keys[key]: entry for key, entry in cached.items()}
+
+    missing_ids = [certificate_id for certificate_id in certificate_ids if certificate_id not in entries]
+    if missing_ids:
+        certificates = Certificate.objects.using('default').select_related(
+            'student', 'course', 'batch'
+        ).filter(certificate_id__in=missing_ids)
+        found = {certificate.certificate_id: build_verify_entry(certificate) for certificate in certificates}
+        if found:
+            cache.set_many(
+                {verify_cache_key(certificate_id): entry for certificate_id, entry in found.items()},
+                timeout=settings.CERTIFICATE_VERIFY_CACHE_TIMEOUT
+            )
+        unknown = [certificate_id for certificate_id in missing_ids if certificate_id not in found]
+        if unknown:
+            cache.set_many(
+                {verify_cache_key(certificate_id): MISSING for certificate_id in unknown},
+                timeout=settings.CERTIFICATE_VERIFY_MISS_TIMEOUT
+            )
+        entries.update(found)
+
+    return {
+        certificate_id: None if entries.get(certificate_id, MISSING) == MISSING else entries[certificate_id]
+        for certificate_id in certificate_ids
+    }
+
+
+def verify_payload(entry, request):
+    """
+    Response payload for a cache entry, with the student photo URL resolved.
+    """
+    data = dict(entry['certificate'])
+    if entry['photo']:
+        data['student_photo'] = request.build_absolute_uri(default_storage.url(entry['photo']))
+    return data
+
+
+def invalidate_verify_cache(certificate_ids):
+    keys = [verify_cache_key(certificate_id) for certificate_id in certificate_ids if certificate_id]
+    if keys:
+        cache.delete_many(keys)
@@ -1,18 +1,23 @@
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
-from django.http import FileResponse
-from django.conf import settings
 from apps.authentication.permissions import IsAdmin
+from apps.core.async_views import AsyncAPIView
+from apps.core.mixins import IdempotentCreateMixin
+from apps.core.storage import ensure_pdf, media_download_response
 from .models import Certificate
-from .serializers import CertificateSerializer, CertificateVerifySerializer
+from .serializers import CertificateSerializer, CertificateBulkVerifySerializer
 from .pdf_generator import generate_certificate_pdf
-import os
+from .tokens import read_certificate_token
+from .verification import aget_verify_entry, get_verify_entry, get_verify_entries, verify_payload
 
 
-class CertificateViewSet(viewsets.ModelViewSet):
+class CertificateViewSet(IdempotentCreateMixin, viewsets.ModelViewSet):
     """
     ViewSet for Certificate CRUD operations.
     Admin can create, update, delete, and view all certificates.
@@ -21,6 +26,8 @@ class CertificateViewSet(viewsets.ModelViewSet):
     queryset = Certificate.objects.select_related('student', 'course', 'batch').all()
     serializer_class = CertificateSerializer
     permission_classes = [IsAuthenticated]
+    # Set per action; see download
+    throttle_scope = None
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['certificate_id', 'student__name', 'course__name']
     ordering_fields = ['certificate_id', 'completion_date', 'issued_at']
@@ -37,10 +44,9 @@ class CertificateViewSet(viewsets.ModelViewSet):
 
         # Students can only see their own certificates
         if user.is_student:
-            try:
-                student = user.student_profile
-                queryset = queryset.filter(student=student)
-            except:
+            if user.student_id:
+                queryset = queryset.filter(student_id=user.student_id)
+            else:
                 queryset = queryset.none()
 
         return queryset
@@ -52,65 +58,170 @@ class CertificateViewSet(viewsets.ModelViewSet):
         certificate.pdf_path = pdf_path
         certificate.save()
 
-    @action(detail=True, methods=['get'])
+    @action(detail=True, methods=['get'], throttle_scope='pdf_download')
     def download(self, request, pk=None):
         """
         Download certificate PDF.
         """
         certificate = self.get_object()
 
-        if not certificate.pdf_path:
-            # Generate PDF if it doesn't exist
-            pdf_path = generate_certificate_pdf(certificate)
-            certificate.pdf_path = pdf_path
-            certificate.save()
+        # Generate PDF if it doesn't exist; concurrent requests share one render
+        ensure_pdf(certificate, generate_certificate_pdf)
 
-        # Get full file path
-        file_path = os.path.join(settings.MEDIA_ROOT, certificate.pdf_path)
+        # Stream the file, or redirect to object storage
+        response = media_download_response(
+            certificate.pdf_path, f'certificate_{certificate.certificate_id}.pdf'
+        )
 
-        if not os.path.exists(file_path):
+        if response is None:
             return Response(
                 {'error': 'PDF file not found.'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Return file
-        return FileResponse(
-            open(file_path, 'rb'),
-            content_type='application/pdf',
-            as_attachment=True,
-            filename=f'certificate_{certificate.certificate_id}.pdf'
-        )
+        return response
 
 
 class CertificateVerifyView(APIView):
     """
     Public endpoint — no authentication required.
     GET /api/certificates/verify/?certificate_id=CERT-2026-0001
+    GET /api/certificates/verify/?token=<signed token>[&check_revocation=1]
 
     Returns certificate authenticity, course details, and student
     course-related information for the given certificate number.
+    Payloads are cached per certificate ID and sent with Cache-Control
+    and ETag headers so repeated lookups can be served from a proxy.
+
+    A signed token (from the certificate's QR code) is verified from its
+    signature alone, without a database lookup, unless check_revocation
+    asks to confirm the certificate still exists.
     """
     permission_classes = [AllowAny]
+    throttle_scope = 'certificate_verify'
 
     def get(self, request):
+        response, certificate_id, claims = self.parse_request(request)
+        if response is not None:
+            return response
+        return self.lookup_response(request, get_verify_entry(certificate_id), claims)
+
+    def parse_request(self, request):
+        """
+        Return (response, None, None) when the request is answered without a
+        lookup, else (None, certificate_id, token claims or None).
+        """
+        token = request.query_params.get('token', '').strip()
+        if token:
+            claims = read_certificate_token(token)
+            if claims is None:
+                return Response(
+                    {'valid': False, 'error': 'This verification link is invalid or has been altered.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                ), None, None
+
+            check_revocation = request.query_params.get('check_revocation', '').lower() in ('1', 'true', 'yes')
+            if not check_revocation:
+                # The signature proves we issued it; nothing to look up
+                response = Response({
+                    'valid': True,
+                    'verified_by': 'signature',
+                    'certificate': {
+                        'certificate_id': claims['certificate_id'],
+                        'student_name': claims['student_name'],
+                        'course_name': claims['course_name'],
+                        'completion_date': claims['completion_date'],
+                    },
+                })
+                patch_cache_control(response, public=True, max_age=settings.CERTIFICATE_TOKEN_MAX_AGE)
+                return response, None, None
+            return None, claims['certificate_id'], claims
+
         certificate_id = request.query_params.get('certificate_id', '').strip().upper()
 
         if not certificate_id:
             return Response(
                 {'valid': False, 'error': 'Certificate ID is required.'},
                 status=status.HTTP_400_BAD_REQUEST
-            )
+            ), None, None
+        return None, certificate_id, None
+
+    def lookup_response(self, request, entry, claims=None):
+        if claims is None:
+            if entry is None:
+                return self.not_found_response(
+                    'No certificate found with that ID. Please check and try again.'
+                )
+            return self.entry_response(request, entry)
+
+        # A different issue time means the ID now belongs to a re-issued certificate
+        issued_at = parse_datetime(entry['certificate']['issued_at']) if entry else None
+        if issued_at is None or int(issued_at.timestamp()) != claims['issued_at']:
+            return self.not_found_response('This certificate has been revoked.', revoked=True)
+        return self.entry_response(request, entry, verified_by='record')
+
+    def entry_response(self, request, entry, **extra):
+        # Let nginx, a CDN or the browser revalidate instead of re-downloading
+        if entry['etag'] in request.headers.get('If-None-Match', ''):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({'valid': True, **extra, 'certificate': verify_payload(entry, request)})
+        response['ETag'] = entry['etag']
+        patch_cache_control(response, public=True, max_age=settings.CERTIFICATE_VERIFY_MAX_AGE)
+        return response
+
+    def not_found_response(self, error, **extra):
+        response = Response({'valid': False, **extra, 'error': error}, status=status.HTTP_404_NOT_FOUND)
+        patch_cache_control(response, public=True, max_age=settings.CERTIFICATE_VERIFY_MISS_TIMEOUT)
+        return response
+
+
+class AsyncCertificateVerifyView(AsyncAPIView, CertificateVerifyView):
+    """
+    CertificateVerifyView with an async cache and database lookup, routed
+    instead of it under ASGI.
+    """
+
+    async def get(self, request):
+        response, certificate_id, claims = self.parse_request(request)
+        if response is not None:
+            return response
+        return self.lookup_response(request, await aget_verify_entry(certificate_id), claims)
 
-        try:
-            certificate = Certificate.objects.select_related(
-                'student', 'course', 'batch'
-            ).get(certificate_id=certificate_id)
-        except Certificate.DoesNotExist:
-            return Response(
-                {'valid': False, 'error': 'No certificate found with that ID. Please check and try again.'},
-                status=status.HTTP_404_NOT_FOUND
-            )
 
-        serializer = CertificateVerifySerializer(certificate, context={'request': request})
-        return Response({'valid': True, 'certificate': serializer.data})
+class CertificateBulkVerifyView(APIView):
+    """
+    Public endpoint — no authentication required.
+    POST /api/certificates/verify/bulk/  {"certificate_ids": ["CERT-2026-0001", ...]}
+
+    Verifies up to CERTIFICATE_VERIFY_BULK_MAX certificate IDs in one call.
+    Cached payloads are read in one batch and the rest are loaded with a
+    single query. Results are returned per ID, in request order. Rate
+    limited per client by the certificate_verify_bulk token bucket.
+    """
+    permission_classes = [AllowAny]
+    throttle_scope = 'certificate_verify_bulk'
+
+    def post(self, request):
+        serializer = CertificateBulkVerifySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        certificate_ids = serializer.validated_data['certificate_ids']
+
+        entries = get_verify_entries(certificate_ids)
+        results = []
+        for certificate_id in certificate_ids:
+            entry = entries[certificate_id]
+            if entry is None:
+                results.append({'certificate_id': certificate_id, 'valid': False})
+            else:
+                results.append({
+                    'certificate_id': certificate_id,
+                    'valid': True,
+                    'certificate': verify_payload(entry, request),
+                })
+
+        return Response({
+            'count': len(results),
+            'valid_count': sum(1 for result in results if result['valid']),
+            'results': results,
+        })
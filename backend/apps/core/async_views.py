@@ -0,0 +1,111 @@
+"""
+Async DRF views for the ASGI deployment.
+
+Under uvicorn workers, an async view waits on the database without holding
+a thread, so one worker serves many slow reads at once. DRF 3.14 only
+dispatches sync handlers, so AsyncAPIView runs the usual authentication,
+permission and throttle checks in a worker thread and then awaits the
+handler. Handlers fetch with Django's async ORM (aget, afirst, acount,
+async for) and must load every related object they serialize up front.
+A query from serializer code in the event loop raises SynchronousOnlyOperation.
+
+Async views are only routed when ASYNC_READ_VIEWS is on, which config.asgi
+turns on by default. The WSGI deployment keeps the sync viewsets.
+"""
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import generics
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+class AsyncAPIView(APIView):
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authentication and throttling read the cache; keep them off the event loop
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def options(self, request, *args, **kwargs):
+        return super().options(request, *args, **kwargs)
+
+    async def http_method_not_allowed(self, request, *args, **kwargs):
+        return super().http_method_not_allowed(request, *args, **kwargs)
+
+
+async def apaginate_queryset(pagination, queryset, request):
+    """
+    Async counterpart of PageNumberPagination.paginate_queryset: counts and
+    fetches the page with the async ORM.
+    """
+    page_size = pagination.get_page_size(request)
+    if not page_size:
+        return None
+
+    paginator = pagination.django_paginator_class(queryset, page_size)
+    # Set the count up front so paginator.page() has nothing left to query
+    paginator.count = await queryset.acount()
+    page_number = pagination.get_page_number(request, paginator)
+    try:
+        pagination.page = paginator.page(page_number)
+    except InvalidPage as exc:
+        raise NotFound(pagination.invalid_page_message.format(page_number=page_number, message=str(exc)))
+    pagination.page.object_list = [obj async for obj in pagination.page.object_list]
+
+    if paginator.num_pages > 1 and pagination.template is not None:
+        pagination.display_page_controls = True
+    pagination.request = request
+    return list(pagination.page)
+
+
+class AsyncListAPIView(AsyncAPIView, generics.GenericAPIView):
+    """
+    GET a filtered, paginated list, like ListModelMixin.list.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = None
+        if self.paginator is not None:
+            page = await apaginate_queryset(self.paginator, queryset, request)
+        if page is None:
+            rows = [obj async for obj in queryset]
+            return Response(self.get_serializer(rows, many=True).data)
+
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+def read_async(async_view, sync_view):
+    """
+    URL view that serves GET and HEAD with `async_view` and every other
+    method with `sync_view`, so an async list can share its URL with the
+    sync create action of a viewset.
+    """
+    sync_view = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method in READ_METHODS:
+            return await async_view(request, *args, **kwargs)
+        return await sync_view(request, *args, **kwargs)
+
+    return csrf_exempt(view)
@@ -0,0 +1,49 @@
+"""
+Versioned cache namespaces.
+
+Cached results embed the current data version of their namespace in the
+cache key. Writers bump the version instead of hunting down every key, so
+stale entries simply stop being read and expire on their own. Each bump
+also records when the namespace was last written (see recently_written).
+"""
+import time
+
+from django.core.cache import cache
+
+# Write times only matter for a few seconds; keep them a little longer
+WRITTEN_TIMEOUT = 300
+
+
+def _version_key(namespace):
+    return f'data-version:{namespace}'
+
+
+def _written_key(namespace):
+    return f'data-written:{namespace}'
+
+
+def get_data_version(namespace):
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Seed with a fresh value so an evicted counter never reuses old keys
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(namespace):
+    key = _version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+    cache.set(_written_key(namespace), time.time(), timeout=WRITTEN_TIMEOUT)
+
+
+def recently_written(namespace, seconds):
+    """
+    True if the namespace's version was bumped in the last `seconds` seconds.
+    """
+    written = cache.get(_written_key(namespace))
+    return written is not None and time.time() - written < seconds
@@ -0,0 +1,51 @@
+"""
+Django's Redis and file-based cache backends, counting hits and misses
+for apps.core.metrics. Hits and misses are labelled with the key's leading
+namespace (certificates, auth, throttle, ...), so the number of series
+stays small.
+"""
+from contextvars import ContextVar
+
+from django.core.cache.backends import filebased, redis
+
+from .metrics import record_cache_reads
+
+_MISSING = object()
+
+# Off while a backend method reads through get() internally
+_counting = ContextVar('cache_counting', default=True)
+
+
+class CacheMetricsMixin:
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        hit = value is not _MISSING
+        if _counting.get():
+            record_cache_reads(key, int(hit), int(not hit))
+        return value if hit else default
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        token = _counting.set(False)
+        try:
+            found = super().get_many(keys, version)
+        finally:
+            _counting.reset(token)
+        if keys:
+            record_cache_reads(keys[0], len(found), len(keys) - len(found))
+        return found
+
+    def incr(self, key, delta=1, version=None):
+        token = _counting.set(False)
+        try:
+            return super().incr(key, delta, version)
+        finally:
+            _counting.reset(token)
+
+
+class RedisCache(CacheMetricsMixin, redis.RedisCache):
+    pass
+
+
+class FileBasedCache(CacheMetricsMixin, filebased.FileBasedCache):
+    pass
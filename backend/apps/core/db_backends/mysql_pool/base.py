@@ -0,0 +1,84 @@
+"""
+MySQL backend that takes connections from a per-process pool.
+
+Use it with threaded gunicorn workers or async views, where many threads
+each need a connection for a short time. Django opens a connection per
+thread, so with CONN_MAX_AGE = 0 every request would otherwise open and
+close its own. Here a request checks a connection out on first query and
+returns it when Django closes it at the end of the request. Connections
+that are mid-transaction or saw an error are closed instead of being reused.
+Pool options come from the POOL key of the database settings:
+
+    'POOL': {'MIN_SIZE': 2, 'MAX_SIZE': 10, 'RECYCLE': 3600, 'TIMEOUT': 10}
+
+Sync workers handle one request at a time and are better served by plain
+persistent connections (CONN_MAX_AGE).
+"""
+import os
+import threading
+
+from django.db import OperationalError
+from django.db.backends.mysql import base as mysql
+
+from .pool import ConnectionPool, PoolTimeout
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict, connect):
+    """
+    Return this process's pool for `alias`, creating it on first use.
+    """
+    # Keyed by pid too: a pool inherited across fork holds the parent's sockets
+    key = (alias, os.getpid())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            options = settings_dict.get('POOL', {})
+            pool = ConnectionPool(
+                connect,
+                min_size=options.get('MIN_SIZE', 0),
+                max_size=options.get('MAX_SIZE', 10),
+                recycle=options.get('RECYCLE', 3600),
+                timeout=options.get('TIMEOUT', 10),
+            )
+            _pools[key] = pool
+            new = True
+        else:
+            new = False
+    if new:
+        pool.fill()
+    return pool
+
+
+def pool_stats():
+    """
+    Return {alias: stats} for the pools of the current process.
+    """
+    pid = os.getpid()
+    return {alias: pool.stats() for (alias, owner), pool in list(_pools.items()) if owner == pid}
+
+
+class DatabaseWrapper(mysql.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        def connect():
+            return super(DatabaseWrapper, self).get_new_connection(conn_params)
+
+        self.pool = get_pool(self.alias, self.settings_dict, connect)
+        try:
+            return self.pool.acquire()
+        except PoolTimeout as e:
+            raise OperationalError(str(e)) from e
+
+    def init_connection_state(self):
+        # Session settings survive in the pool; only run them on a new connection
+        if not getattr(self.connection, '_pool_initialized', False):
+            super().init_connection_state()
+            self.connection._pool_initialized = True
+
+    def _close(self):
+        if self.connection is None:
+            return
+        reusable = not self.in_atomic_block and not self.errors_occurred and self.get_autocommit()
+        self.pool.release(self.connection, reusable=reusable)
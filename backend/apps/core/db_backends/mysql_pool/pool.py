@@ -0,0 +1,167 @@
+"""
+A small thread-safe pool of raw DB-API connections.
+
+The pool opens min_size connections up front and never holds more than
+max_size. Idle connections are reused most-recently-used first, so the rest
+can age out. Connections
+older than `recycle` seconds are closed instead of being handed out again,
+and connections idle for more than `ping_after` seconds are pinged first.
+When all max_size connections are in use, callers wait up to `timeout`
+seconds. The waits are counted in stats(). Pings and closes run outside
+the pool's lock, so a dead socket only stalls the thread that touches it.
+"""
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, connect, min_size=0, max_size=10, recycle=3600, timeout=10, ping_after=5):
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.recycle = recycle
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.condition = threading.Condition()
+        # (connection, created_at, returned_at), most recently returned last
+        self.idle = []
+        self.size = 0
+        self.waiting = 0
+        self.counters = {
+            'connections_created': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'timeouts': 0,
+        }
+        self.created_at = {}
+
+    def acquire(self):
+        """
+        Return a connection, opening one if the pool has room.
+        """
+        deadline = None
+        while True:
+            with self.condition:
+                if self.idle:
+                    candidate = self.idle.pop()
+                elif self.size < self.max_size:
+                    # Reserve the slot; the connection is opened outside the lock
+                    self.size += 1
+                    candidate = None
+                else:
+                    if deadline is None:
+                        deadline = time.monotonic() + self.timeout
+                        self.counters['waits'] += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.counters['timeouts'] += 1
+                        raise PoolTimeout(
+                            f'No database connection free after {self.timeout}s ({self.max_size} in use).'
+                        )
+                    wait_started = time.monotonic()
+                    self.waiting += 1
+                    try:
+                        self.condition.wait(remaining)
+                    finally:
+                        self.waiting -= 1
+                        self.counters['wait_seconds'] += time.monotonic() - wait_started
+                    continue
+
+            if candidate is None:
+                try:
+                    connection = self._open()
+                except Exception:
+                    with self.condition:
+                        self.size -= 1
+                        self.condition.notify()
+                    raise
+                break
+
+            # Ping (or close) outside the lock: a half-dead socket can block
+            # until its TCP timeout, and must only hold up this caller
+            connection, created_at, returned_at = candidate
+            if self._usable(connection, created_at, returned_at):
+                break
+            self._discard(connection)
+
+        with self.condition:
+            self.counters['checkouts'] += 1
+        return connection
+
+    def release(self, connection, reusable=True):
+        """
+        Return a connection to the pool, or close it if it should not be reused.
+        """
+        with self.condition:
+            created_at = self.created_at.get(id(connection), 0)
+            too_old = time.monotonic() - created_at > self.recycle
+            if reusable and not too_old:
+                self.idle.append((connection, created_at, time.monotonic()))
+                self.condition.notify()
+                return
+        self._discard(connection)
+
+    def fill(self):
+        """
+        Open connections until min_size exist.
+        """
+        while True:
+            with self.condition:
+                if self.size >= self.min_size:
+                    return
+                self.size += 1
+            try:
+                connection = self._open()
+            except Exception:
+                with self.condition:
+                    self.size -= 1
+                raise
+            self.release(connection)
+
+    def stats(self):
+        with self.condition:
+            return {
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                'waiting': self.waiting,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                **self.counters,
+            }
+
+    def _open(self):
+        connection = self.connect()
+        with self.condition:
+            self.created_at[id(connection)] = time.monotonic()
+            self.counters['connections_created'] += 1
+        return connection
+
+    def _usable(self, connection, created_at, returned_at):
+        now = time.monotonic()
+        if now - created_at > self.recycle:
+            return False
+        if now - returned_at > self.ping_after:
+            try:
+                connection.ping()
+            except Exception:
+                return False
+        return True
+
+    def _discard(self, connection):
+        # Called without the lock; the slot is freed before the close
+        with self.condition:
+            self.size -= 1
+            self.created_at.pop(id(connection), None)
+            self.counters['connections_closed'] += 1
+            self.condition.notify()
+        try:
+            connection.close()
+        except Exception:
+            pass
@@ -0,0 +1,165 @@
+"""
+Read replica routing.
+
+ReplicaRoutingMiddleware marks safe-method API requests (lists, reports,
+exports, verify lookups) as allowed to read from a replica. While a request is
+marked, ReplicaRouter sends its reads to a random healthy replica in
+DATABASE_REPLICAS. All writes, reads inside a transaction and reads outside a
+request (management commands, shell) use the primary.
+
+A user who just wrote something reads from the primary for DB_REPLICA_PIN_SECONDS
+so they see their own change (read-your-writes). The pin is keyed on the user ID
+claim of the bearer token. The claim is read without checking the signature,
+which is fine here: a forged token can only force reads onto the primary.
+
+Each process checks a replica's lag at most every DB_REPLICA_CHECK_INTERVAL
+seconds. A replica that lags more than DB_REPLICA_MAX_LAG seconds, has
+stopped replicating or cannot be reached is skipped until the next check.
+When no replica is healthy, reads fall back to the primary.
+"""
+import base64
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework_simplejwt.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+# {alias: (checked_at, healthy)} for this process
+_health = {}
+
+
+@contextmanager
+def replica_reads(allowed=True):
+    """
+    Allow (or, with allowed=False, forbid) replica reads for the block.
+    """
+    token = _replica_reads.set(allowed)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def read_from_primary(force=True):
+    """
+    Keep the block's reads on the primary. Use it where a stale read would
+    be cached, so a lagging replica cannot undo a cache invalidation.
+    """
+    return replica_reads(False) if force else nullcontext()
+
+
+def replica_lag(alias):
+    """
+    Return how many seconds `alias` is behind its source, or None if it is
+    not replicating.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'mysql':
+        # SQLite stand-ins for local testing have no replication to lag
+        return 0
+    with connection.cursor() as cursor:
+        # SHOW REPLICA STATUS needs MySQL 8.0.22+; older servers use the SLAVE form
+        for statement, column in (
+            ('SHOW REPLICA STATUS', 'Seconds_Behind_Source'),
+            ('SHOW SLAVE STATUS', 'Seconds_Behind_Master'),
+        ):
+            try:
+                cursor.execute(statement)
+            except DatabaseError:
+                continue
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            columns = [description[0] for description in cursor.description]
+            return row[columns.index(column)]
+    return None
+
+
+def replica_is_healthy(alias):
+    now = time.monotonic()
+    checked_at, healthy = _health.get(alias, (None, False))
+    if checked_at is not None and now - checked_at < settings.DB_REPLICA_CHECK_INTERVAL:
+        return healthy
+    try:
+        lag = replica_lag(alias)
+    except DatabaseError as e:
+        logger.warning('Replica %s is unreachable: %s', alias, e)
+        lag = None
+    healthy = lag is not None and lag <= settings.DB_REPLICA_MAX_LAG
+    if not healthy and lag is not None:
+        logger.warning('Replica %s is %ss behind; reading from the primary.', alias, lag)
+    _health[alias] = (now, healthy)
+    return healthy
+
+
+def healthy_replicas():
+    return [alias for alias in settings.DATABASE_REPLICAS if replica_is_healthy(alias)]
+
+
+def pin_cache_key(user_id):
+    return f'db-router:pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    cache.set(pin_cache_key(user_id), 1, timeout=settings.DB_REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(pin_cache_key(user_id)) is not None
+
+
+async def apin_to_primary(user_id):
+    await cache.aset(pin_cache_key(user_id), 1, timeout=settings.DB_REPLICA_PIN_SECONDS)
+
+
+async def ais_pinned(user_id):
+    return await cache.aget(pin_cache_key(user_id)) is not None
+
+
+def token_user_id(request):
+    """
+    Return the user ID claim of the request's bearer token, unverified.
+    """
+    parts = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(parts) != 2 or parts[0] not in api_settings.AUTH_HEADER_TYPES:
+        return None
+    try:
+        payload = parts[1].split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        return claims.get(api_settings.USER_ID_CLAIM)
+    except (IndexError, ValueError, AttributeError):
+        return None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = healthy_replicas()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or Django would save an instance back to the replica it came from
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,136 @@
+"""
+Measure how fast the MySQL driver turns result rows into Python values.
+Run with: DB_DRIVER=pymysql python manage.py bench_db_decode --json bench/pymysql.json
+     then DB_DRIVER=mysqlclient python manage.py bench_db_decode --compare bench/pymysql.json
+
+For each representative query (students with their enrollments, invoices
+in a date range, custom invoice line items), it reports rows per second
+twice: fetching raw rows through the cursor, which is mostly driver decode
+time, and building model instances through the ORM. The driver is chosen
+when the process starts, so compare drivers with two runs.
+"""
+import json
+import os
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils.dateparse import parse_date
+
+import config
+from apps.invoices.models import CustomInvoiceItem, Invoice
+from apps.students.models import StudentCourse
+
+
+def _querysets(since, until, limit):
+    return {
+        # One joined query, so the raw timing covers the same rows as the ORM
+        'students+enrollments': StudentCourse.objects.select_related(
+            'student', 'course', 'batch'
+        ).order_by('student_id')[:limit],
+        'invoices-by-date': Invoice.objects.select_related('student', 'course', 'batch').filter(
+            payment_date__range=(since, until)
+        ).order_by('payment_date')[:limit],
+        'custom-invoice-items': CustomInvoiceItem.objects.select_related('invoice').filter(
+            payment_date__range=(since, until)
+        ).order_by('payment_date')[:limit],
+    }
+
+
+def _time_raw(queryset):
+    """
+    Fetch the queryset's SQL through a plain cursor; returns (rows, seconds).
+    """
+    sql, params = queryset.query.sql_with_params()
+    start = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = len(cursor.fetchall())
+    return rows, time.perf_counter() - start
+
+
+def _time_orm(queryset):
+    start = time.perf_counter()
+    rows = len(list(queryset.all()))
+    return rows, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = 'Benchmark MySQL driver row decoding for representative querysets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query.')
+        parser.add_argument('--limit', type=int, default=20000, help='Most rows fetched per query.')
+        parser.add_argument('--since', help='First payment date for date-range queries (YYYY-MM-DD).')
+        parser.add_argument('--until', help='Last payment date for date-range queries (YYYY-MM-DD).')
+        parser.add_argument('--json', dest='json_path', help='Write the results to this JSON file.')
+        parser.add_argument('--compare', help='Earlier JSON results to compare against.')
+
+    def handle(self, *args, **options):
+        if options['repeat'] <= 0:
+            raise CommandError('--repeat must be positive.')
+        until = self._parse(options['until']) or date.today()
+        since = self._parse(options['since']) or until - timedelta(days=365)
+
+        self.stdout.write(f'Driver: {config.db_driver} ({connection.vendor}, {connection.display_name})')
+        self.stdout.write(f"{'query':<24} {'rows':>8} {'raw rows/s':>12} {'orm rows/s':>12}")
+
+        results = {}
+        for label, queryset in _querysets(since, until, options['limit']).items():
+            # One untimed run warms the server's buffer pool and query cache
+            _time_raw(queryset)
+            raw = [_time_raw(queryset) for _ in range(options['repeat'])]
+            orm = [_time_orm(queryset) for _ in range(options['repeat'])]
+            rows = raw[0][0]
+            raw_seconds = statistics.median(seconds for _, seconds in raw)
+            orm_seconds = statistics.median(seconds for _, seconds in orm)
+            results[label] = {
+                'rows': rows,
+                'raw_rows_per_sec': rows / raw_seconds if raw_seconds else 0.0,
+                'orm_rows_per_sec': rows / orm_seconds if orm_seconds else 0.0,
+            }
+            row = results[label]
+            self.stdout.write(
+                f"{label:<24} {rows:>8} {row['raw_rows_per_sec']:>12.0f} {row['orm_rows_per_sec']:>12.0f}"
+            )
+
+        if options['compare']:
+            self._compare(results, options['compare'])
+        if options['json_path']:
+            self._write_json(results, options)
+
+    def _parse(self, value):
+        if not value:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f'Invalid date: {value}')
+        return parsed
+
+    def _compare(self, results, path):
+        with open(path) as previous_file:
+            previous = json.load(previous_file)
+        self.stdout.write(f"\nCompared with {previous.get('driver')} ({path}):")
+        for label, row in results.items():
+            before = previous['results'].get(label)
+            if not before or not before['raw_rows_per_sec'] or not before['orm_rows_per_sec']:
+                continue
+            raw = row['raw_rows_per_sec'] / before['raw_rows_per_sec']
+            orm = row['orm_rows_per_sec'] / before['orm_rows_per_sec']
+            self.stdout.write(f'{label:<24} raw x{raw:.2f}  orm x{orm:.2f}')
+
+    def _write_json(self, results, options):
+        payload = {
+            'driver': config.db_driver,
+            'vendor': connection.vendor,
+            'options': {key: options[key] for key in ('repeat', 'limit', 'since', 'until')},
+            'results': results,
+        }
+        directory = os.path.dirname(options['json_path'])
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(options['json_path'], 'w') as output:
+            json.dump(payload, output, indent=2)
+        self.stdout.write(f"Results written to {options['json_path']}")
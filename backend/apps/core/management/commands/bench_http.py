@@ -0,0 +1,196 @@
+"""
+Load-test the hot read endpoints of a running server.
+Run with: python manage.py bench_http --base-url http://127.0.0.1:8000 --email admin@example.com
+              --password ... --label sync --json bench/http-sync.json
+     then the same against the ASGI server with --label asgi --compare bench/http-sync.json
+
+Each endpoint (certificate verify, /auth/me/, course and batch lists) gets
+--requests GET requests from --concurrency client threads, each on its own
+keep-alive connection. The command reports requests per second, p50 and p99
+latency, and how many requests failed or were turned away (429/503).
+On the server under test, relax the verify limits
+(CERTIFICATE_VERIFY_RATE=100000/min, LOAD_SHEDDING_VERIFY_CONCURRENCY=0),
+or most verify requests are turned away. Run the client on another machine, or at least
+on spare cores: at high rates a Python client can become the bottleneck.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.certificates.models import Certificate
+
+ENDPOINTS = ('verify', 'me', 'courses', 'batches')
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _connect(base_url):
+    parts = urlsplit(base_url)
+    connection_class = HTTPSConnection if parts.scheme == 'https' else HTTPConnection
+    return connection_class(parts.hostname, parts.port, timeout=30)
+
+
+def _login(base_url, email, password):
+    connection = _connect(base_url)
+    body = json.dumps({'email': email, 'password': password})
+    connection.request('POST', '/api/auth/login/', body=body, headers={'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    payload = json.loads(response.read() or b'{}')
+    connection.close()
+    if response.status != 200:
+        raise CommandError(f'Login failed ({response.status}): {payload}')
+    return payload.get('access') or payload['tokens']['access']
+
+
+def _run_client(base_url, path, headers, count, results, lock):
+    connection = _connect(base_url)
+    latencies = []
+    failed = rejected = 0
+    for _ in range(count):
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status in (429, 503):
+                rejected += 1
+            elif response.status >= 400:
+                failed += 1
+        except (OSError, HTTPException):
+            failed += 1
+            connection.close()
+            connection = _connect(base_url)
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+    with lock:
+        results['latencies'].extend(latencies)
+        results['failed'] += failed
+        results['rejected'] += rejected
+
+
+class Command(BaseCommand):
+    help = 'Measure requests/sec and p99 latency of the hot read endpoints under concurrency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Server under test.')
+        parser.add_argument('--email', help='Account for the authenticated endpoints.')
+        parser.add_argument('--password', help='Password for --email.')
+        parser.add_argument('--certificate-id', help='Certificate to verify (default: the newest).')
+        parser.add_argument('--endpoint', action='append', choices=ENDPOINTS,
+                            help='Endpoint to test; repeat for several (default: all).')
+        parser.add_argument('--concurrency', type=int, default=50, help='Client threads.')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=100, help='Untimed requests per endpoint.')
+        parser.add_argument('--label', default='', help='Name for this run, e.g. sync or asgi.')
+        parser.add_argument('--json', dest='json_path', help='Write the results to this JSON file.')
+        parser.add_argument('--compare', help='Earlier JSON results to compare against.')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] <= 0 or options['requests'] < options['concurrency']:
+            raise CommandError('--requests must be at least --concurrency, and both positive.')
+
+        endpoints = options['endpoint'] or list(ENDPOINTS)
+        paths = self._paths(endpoints, options)
+        headers = {'Connection': 'keep-alive'}
+        if set(endpoints) - {'verify'}:
+            if not options['email'] or not options['password']:
+                raise CommandError('--email and --password are needed for me, courses and batches.')
+            headers['Authorization'] = f"Bearer {_login(options['base_url'], options['email'], options['password'])}"
+
+        self.stdout.write(
+            f"{options['label'] or options['base_url']}: {options['requests']} requests per endpoint, "
+            f"{options['concurrency']} concurrent"
+        )
+        self.stdout.write(f"{'endpoint':<10} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'failed':>7} {'429/503':>8}")
+
+        results = {}
+        for endpoint in endpoints:
+            if options['warmup']:
+                self._load(options['base_url'], paths[endpoint], headers, options['warmup'],
+                           min(options['concurrency'], options['warmup']))
+            row = self._load(options['base_url'], paths[endpoint], headers, options['requests'],
+                             options['concurrency'])
+            results[endpoint] = row
+            self.stdout.write(
+                f"{endpoint:<10} {row['requests_per_sec']:>9.1f} {row['p50_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+                f"{row['failed']:>7} {row['rejected']:>8}"
+            )
+
+        if options['compare']:
+            self._compare(results, options['compare'])
+        if options['json_path']:
+            self._write_json(results, options)
+
+    def _paths(self, endpoints, options):
+        paths = {
+            'me': '/api/auth/me/',
+            'courses': '/api/courses/',
+            'batches': '/api/batches/',
+        }
+        if 'verify' in endpoints:
+            certificate_id = options['certificate_id'] or Certificate.objects.order_by(
+                '-issued_at'
+            ).values_list('certificate_id', flat=True).first()
+            if not certificate_id:
+                raise CommandError('No certificate to verify; pass --certificate-id.')
+            paths['verify'] = f'/api/certificates/verify/?certificate_id={certificate_id}'
+        return paths
+
+    def _load(self, base_url, path, headers, total, concurrency):
+        results = {'latencies': [], 'failed': 0, 'rejected': 0}
+        lock = threading.Lock()
+        per_client = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            clients = [
+                executor.submit(_run_client, base_url, path, headers, count, results, lock)
+                for count in per_client
+            ]
+            for client in clients:
+                client.result()
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(results['latencies'])
+        return {
+            'requests': len(latencies),
+            'requests_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+            'p50_ms': _percentile(latencies, 0.50) * 1000,
+            'p99_ms': _percentile(latencies, 0.99) * 1000,
+            'failed': results['failed'],
+            'rejected': results['rejected'],
+        }
+
+    def _compare(self, results, path):
+        with open(path) as previous_file:
+            previous = json.load(previous_file)
+        self.stdout.write(f"\nCompared with {previous.get('label') or path}:")
+        for endpoint, row in results.items():
+            before = previous['results'].get(endpoint)
+            if not before or not before['requests_per_sec'] or not before['p99_ms']:
+                continue
+            throughput = (row['requests_per_sec'] / before['requests_per_sec'] - 1) * 100
+            p99 = (row['p99_ms'] / before['p99_ms'] - 1) * 100
+            self.stdout.write(f'{endpoint:<10} req/s {throughput:+.1f}%  p99 {p99:+.1f}%')
+
+    def _write_json(self, results, options):
+        payload = {
+            'label': options['label'],
+            'base_url': options['base_url'],
+            'options': {key: options[key] for key in ('concurrency', 'requests', 'warmup')},
+            'results': results,
+        }
+        directory = os.path.dirname(options['json_path'])
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(options['json_path'], 'w') as output:
+            json.dump(payload, output, indent=2)
+        self.stdout.write(f"Results written to {options['json_path']}")
@@ -0,0 +1,215 @@
+"""
+Benchmark the PDF renderers over the synthetic sample corpus.
+Run with: python manage.py bench_pdf --count 100 --json bench/pdf.json
+
+Reports p50/p95/p99 render time, throughput per core and peak RSS for each
+document shape (plain and long-name invoices, short and very long custom
+invoices, certificates). --json stores the results together with the git
+commit, and --compare prints the change against an earlier JSON file.
+"""
+import cProfile
+import io
+import json
+import multiprocessing
+import os
+import platform
+import pstats
+import resource
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import reportlab
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.utils.module_loading import import_string
+
+from apps.core.pdf_pool import RENDERERS, RenderServer, render_pdf
+from apps.core.pdf_samples import SAMPLE_SHAPES, sample_corpus
+
+
+def _render_all(kind, contexts, through_pool=False):
+    """
+    Render `contexts` one after another and return per-document seconds.
+    """
+    renderer = import_string(RENDERERS[kind])
+    timings = []
+    for context in contexts:
+        start = time.perf_counter()
+        if through_pool:
+            render_pdf(kind, context)
+        else:
+            renderer(context)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _render_chunk(args):
+    kind, contexts = args
+    start = time.perf_counter()
+    timings = _render_all(kind, contexts)
+    elapsed = time.perf_counter() - start
+    return timings, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = 'Measure PDF render latency, throughput and memory over synthetic documents.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=50, help='Documents per shape.')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed renders per shape.')
+        parser.add_argument(
+            '--shape', action='append', choices=[label for label, _, _ in SAMPLE_SHAPES],
+            help='Shape to run (repeatable). Defaults to all.'
+        )
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Render in this many parallel processes to measure scaling across cores.'
+        )
+        parser.add_argument(
+            '--pool', type=int, default=0,
+            help='Render through render_pdf and a renderer with this many processes, including socket cost.'
+        )
+        parser.add_argument('--profile-dir', help='Write a cProfile dump per shape to this directory.')
+        parser.add_argument('--json', dest='json_path', help='Write the results to this JSON file.')
+        parser.add_argument('--compare', help='Earlier JSON results to compare against.')
+
+    def handle(self, *args, **options):
+        if options['processes'] > 1 and (options['pool'] or options['profile_dir']):
+            raise CommandError('--processes cannot be combined with --pool or --profile-dir.')
+
+        corpus = sample_corpus(options['count'] + options['warmup'], shapes=options['shape'])
+        results = {}
+
+        self.stdout.write(
+            f"{'shape':<24} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'docs/s/core':>12} {'peak RSS MB':>12}"
+        )
+        with override_settings(PDF_RENDER_POOL_SIZE=options['pool']), self._renderer(options['pool']):
+            for label, (kind, contexts) in corpus.items():
+                warmup, timed = contexts[:options['warmup']], contexts[options['warmup']:]
+                _render_all(kind, warmup, through_pool=bool(options['pool']))
+                results[label] = self._run_shape(label, kind, timed, options)
+                row = results[label]
+                self.stdout.write(
+                    f"{label:<24} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+                    f"{row['docs_per_sec_per_core']:>12.1f} {row['peak_rss_mb']:>12.1f}"
+                )
+
+        if options['compare']:
+            self._compare(results, options['compare'])
+        if options['json_path']:
+            self._write_json(results, options)
+
+    @contextmanager
+    def _renderer(self, size):
+        """
+        Run a renderer with `size` processes on a private socket for the block.
+        """
+        if not size:
+            yield
+            return
+        with tempfile.TemporaryDirectory() as directory:
+            address = os.path.join(directory, 'render.sock')
+            server = RenderServer(address, size)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                with override_settings(PDF_RENDER_SOCKET=address):
+                    yield
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def _run_shape(self, label, kind, contexts, options):
+        processes = options['processes']
+        if processes > 1:
+            chunks = [(kind, contexts[i::processes]) for i in range(processes)]
+            # fork: the children only render, they never touch the database
+            with multiprocessing.get_context('fork').Pool(processes) as pool:
+                outputs = pool.map(_render_chunk, chunks)
+            timings = [t for chunk_timings, _, _ in outputs for t in chunk_timings]
+            # Each process's own render time, so pool startup is not counted
+            busy = sum(elapsed for _, elapsed, _ in outputs)
+            peak_rss_kb = max(rss for _, _, rss in outputs)
+        else:
+            profiler = cProfile.Profile() if options['profile_dir'] else None
+            start = time.perf_counter()
+            if profiler:
+                profiler.enable()
+            timings = _render_all(kind, contexts, through_pool=bool(options['pool']))
+            if profiler:
+                profiler.disable()
+            busy = time.perf_counter() - start
+            if profiler:
+                self._dump_profile(profiler, label, options['profile_dir'])
+            peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        timings.sort()
+        return {
+            'kind': kind,
+            'documents': len(timings),
+            'p50_ms': _percentile(timings, 0.50) * 1000,
+            'p95_ms': _percentile(timings, 0.95) * 1000,
+            'p99_ms': _percentile(timings, 0.99) * 1000,
+            'mean_ms': statistics.fmean(timings) * 1000,
+            'docs_per_sec_per_core': len(timings) / busy,
+            # ru_maxrss is reported in kilobytes on Linux
+            'peak_rss_mb': peak_rss_kb / 1024,
+        }
+
+    def _dump_profile(self, profiler, label, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{label}.prof')
+        profiler.dump_stats(path)
+        self.stdout.write(f'  profile written to {path} (open with snakeviz or flameprof)')
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(8)
+        self.stdout.write(report.getvalue())
+
+    def _compare(self, results, path):
+        with open(path) as previous_file:
+            previous = json.load(previous_file)
+        self.stdout.write(f"\nCompared with {previous.get('commit') or path}:")
+        for label, row in results.items():
+            before = previous['results'].get(label)
+            if not before:
+                continue
+            p50 = (row['p50_ms'] / before['p50_ms'] - 1) * 100
+            p95 = (row['p95_ms'] / before['p95_ms'] - 1) * 100
+            throughput = (row['docs_per_sec_per_core'] / before['docs_per_sec_per_core'] - 1) * 100
+            self.stdout.write(f'{label:<24} p50 {p50:+.1f}%  p95 {p95:+.1f}%  docs/s/core {throughput:+.1f}%')
+
+    def _write_json(self, results, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+
+        payload = {
+            'commit': commit,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'reportlab': reportlab.Version,
+            'cpu_count': os.cpu_count(),
+            'options': {
+                key: options[key] for key in ('count', 'warmup', 'processes', 'pool', 'shape')
+            },
+            'results': results,
+        }
+        directory = os.path.dirname(options['json_path'])
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(options['json_path'], 'w') as output:
+            json.dump(payload, output, indent=2)
+        self.stdout.write(f"Results written to {options['json_path']}")
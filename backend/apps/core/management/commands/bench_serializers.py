@@ -0,0 +1,80 @@
+"""
+Benchmark list-page serialization with and without the request identity map.
+Run with: python manage.py bench_serializers --rows 500 --repeat 10
+"""
+import cProfile
+import io
+import pstats
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.invoices.models import Invoice
+from apps.invoices.serializers import InvoiceSerializer
+from apps.students.models import StudentCourse
+from apps.students.serializers import StudentCourseSerializer
+
+
+class Command(BaseCommand):
+    help = 'Measure to_representation time for enrollment and invoice list pages.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200, help='Rows per list page.')
+        parser.add_argument('--repeat', type=int, default=5, help='Renders per measurement.')
+        parser.add_argument('--profile', action='store_true', help='Print the top cProfile entries.')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        targets = [
+            ('enrollments', StudentCourseSerializer,
+             StudentCourse.objects.select_related('student', 'course', 'batch__course')),
+            ('invoices', InvoiceSerializer,
+             Invoice.objects.select_related('student', 'course', 'batch__course')),
+        ]
+
+        for label, serializer_class, queryset in targets:
+            # Load rows once so only serialization is measured
+            instances = list(queryset[:rows])
+            if not instances:
+                self.stdout.write(f'{label}: no rows, skipped')
+                continue
+
+            results = {}
+            for enabled in (False, True):
+                with override_settings(SERIALIZER_IDENTITY_MAP=enabled):
+                    results[enabled] = self._measure(serializer_class, instances, options)
+
+            speedup = results[False] / results[True] if results[True] else 0
+            self.stdout.write(
+                f'{label}: {len(instances)} rows | '
+                f'without memo {results[False] * 1000:.1f} ms | '
+                f'with memo {results[True] * 1000:.1f} ms | '
+                f'{speedup:.2f}x'
+            )
+
+    def _measure(self, serializer_class, instances, options):
+        factory = APIRequestFactory()
+        profiler = cProfile.Profile() if options['profile'] else None
+        # Warm up once so lazy imports and field binding do not skew the first run
+        self._render(serializer_class, instances, factory)
+
+        if profiler:
+            profiler.enable()
+        start = time.perf_counter()
+        for _ in range(options['repeat']):
+            self._render(serializer_class, instances, factory)
+        elapsed = (time.perf_counter() - start) / options['repeat']
+        if profiler:
+            profiler.disable()
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(15)
+            self.stdout.write(report.getvalue())
+        return elapsed
+
+    def _render(self, serializer_class, instances, factory):
+        # A fresh request per render, as in production
+        request = Request(factory.get('/'))
+        return serializer_class(instances, many=True, context={'request': request}).data
@@ -0,0 +1,58 @@
+"""
+Compare file size and render time of the PDF output profiles over the
+synthetic sample corpus.
+Run with: python manage.py compare_pdf_profiles --count 20
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from apps.core.pdf_pool import RENDERERS
+from apps.core.pdf_profiles import PDF_PROFILES
+from apps.core.pdf_samples import sample_corpus
+
+
+class Command(BaseCommand):
+    help = 'Report PDF size and render time for each output profile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10, help='Documents per sample shape.')
+        parser.add_argument(
+            '--profile', action='append', choices=list(PDF_PROFILES),
+            help='Profile to include (repeatable). Defaults to all.'
+        )
+
+    def handle(self, *args, **options):
+        profiles = options['profile'] or list(PDF_PROFILES)
+        corpus = sample_corpus(options['count'])
+
+        self.stdout.write(f"{'shape':<24} {'profile':<8} {'avg KB':>9} {'avg ms':>9}")
+        totals = {profile: [0, 0.0] for profile in profiles}
+        for label, (kind, contexts) in corpus.items():
+            renderer = import_string(RENDERERS[kind])
+            # Warm up so imports and style caches are not measured
+            renderer(contexts[0])
+            for profile in profiles:
+                size, elapsed = self._measure(renderer, contexts, profile)
+                totals[profile][0] += size
+                totals[profile][1] += elapsed
+                self.stdout.write(
+                    f'{label:<24} {profile:<8} {size / len(contexts) / 1024:>9.1f} '
+                    f'{elapsed / len(contexts) * 1000:>9.1f}'
+                )
+
+        self.stdout.write('')
+        baseline = totals[profiles[0]]
+        for profile, (size, elapsed) in totals.items():
+            self.stdout.write(
+                f'{profile:<8} total {size / 1024:.1f} KB ({size / baseline[0] * 100:.0f}% of {profiles[0]}), '
+                f'{elapsed:.2f} s ({elapsed / baseline[1] * 100:.0f}%)'
+            )
+
+    def _measure(self, renderer, contexts, profile):
+        size = 0
+        start = time.perf_counter()
+        for context in contexts:
+            size += len(renderer({**context, 'pdf_profile': profile}))
+        return size, time.perf_counter() - start
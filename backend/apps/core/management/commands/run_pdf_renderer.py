@@ -0,0 +1,39 @@
+"""
+Run this machine's PDF renderer.
+Run with: python manage.py run_pdf_renderer
+
+Every gunicorn worker on the machine sends its render jobs here over
+PDF_RENDER_SOCKET, so PDF_RENDER_POOL_SIZE bounds the render processes and
+concurrent renders of the whole machine. See apps.core.pdf_pool.
+"""
+import signal
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.pdf_pool import RenderServer
+
+
+def _exit(signum, frame):
+    sys.exit(0)
+
+
+class Command(BaseCommand):
+    help = 'Serve PDF render jobs for the web workers on this machine.'
+
+    def handle(self, *args, **options):
+        size = settings.PDF_RENDER_POOL_SIZE
+        if size <= 0:
+            raise CommandError('PDF_RENDER_POOL_SIZE is 0, so PDFs are rendered inline; no renderer is needed.')
+
+        # systemd stops the service with SIGTERM; exit through the finally below
+        signal.signal(signal.SIGTERM, _exit)
+        server = RenderServer(settings.PDF_RENDER_SOCKET, size)
+        self.stdout.write(f'Rendering PDFs with {size} processes on {settings.PDF_RENDER_SOCKET}.')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,71 @@
+"""
+Move generated PDFs from the old flat directories into the sharded layout
+and rewrite pdf_path.
+Run with: python manage.py shard_media_files [--batch-size 500] [--dry-run]
+
+Safe to interrupt and re-run: rows already pointing at their sharded path
+are skipped, and a file that was moved before its row was updated is
+picked up from its new location.
+"""
+import posixpath
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from apps.certificates.models import Certificate
+from apps.core.storage import sharded_path, save_media_file
+from apps.invoices.models import Invoice, CustomInvoice
+
+# Model and the media directory its PDFs are sharded under
+SHARDED_MODELS = [
+    (Invoice, 'invoices'),
+    (CustomInvoice, 'invoices/custom'),
+    (Certificate, 'certificates'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Move generated PDFs into hashed subdirectories and update pdf_path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per batch.')
+        parser.add_argument('--dry-run', action='store_true', help='Report moves without touching anything.')
+
+    def handle(self, *args, **options):
+        for model, directory in SHARDED_MODELS:
+            moved, missing = self._shard_model(model, directory, options['batch_size'], options['dry_run'])
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {moved} moved, {missing} missing')
+
+    def _shard_model(self, model, directory, batch_size, dry_run):
+        moved = missing = 0
+        last_pk = 0
+        while True:
+            rows = list(
+                model.objects.filter(pk__gt=last_pk).exclude(pdf_path='')
+                .order_by('pk').values_list('pk', 'pdf_path')[:batch_size]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+
+            updates = []
+            for pk, pdf_path in rows:
+                target = sharded_path(directory, posixpath.basename(pdf_path))
+                if pdf_path == target:
+                    continue
+
+                if default_storage.exists(pdf_path):
+                    if not dry_run:
+                        # Copy then delete, which works on any storage backend
+                        with default_storage.open(pdf_path, 'rb') as source:
+                            target = save_media_file(target, source)
+                        default_storage.delete(pdf_path)
+                elif not default_storage.exists(target):
+                    # Leave the row untouched so the missing file is still reported
+                    missing += 1
+                    continue
+
+                moved += 1
+                updates.append(model(pk=pk, pdf_path=target))
+
+            if updates and not dry_run:
+                model.objects.bulk_update(updates, ['pdf_path'])
+        return moved, missing
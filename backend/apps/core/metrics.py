@@ -0,0 +1,306 @@
+"""
+Request metrics in Prometheus text format.
+
+MetricsMiddleware times every request and counts its SQL queries, cache
+hits and PDF render time. It adds them to the response as a Server-Timing
+header and to this process's registry: per-view latency histograms, request,
+query and cache counters, and a PDF render histogram.
+
+gunicorn workers are separate processes, so each one writes its registry
+to its own JSON file in METRICS_SPOOL_DIR/<pool>/, at most every
+METRICS_FLUSH_INTERVAL seconds. /api/metrics/ adds up every file. Files of
+exited workers are kept so counters never go down; gunicorn clears the pool's
+directory when its master starts (see gunicorn_config.py).
+"""
+import glob
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Seconds; the last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+HELP = {
+    'http_request_duration_seconds': ('histogram', 'Request latency by view.'),
+    'http_requests_total': ('counter', 'Requests by view, method and status.'),
+    'db_queries_total': ('counter', 'SQL queries run by requests, by view.'),
+    'db_query_duration_seconds_total': ('counter', 'Time spent in SQL queries, by view.'),
+    'cache_hits_total': ('counter', 'Cache reads that found a value, by key namespace.'),
+    'cache_misses_total': ('counter', 'Cache reads that found nothing, by key namespace.'),
+    'pdf_render_duration_seconds': ('histogram', 'PDF render time, including the wait for a render process.'),
+}
+
+_current = ContextVar('request_metrics', default=None)
+
+NAMESPACE_PATTERN = re.compile(r'[a-z-]+')
+
+
+class RequestMetrics:
+    """
+    What one request spent; shown in its Server-Timing header.
+    """
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.pdf_seconds = 0.0
+
+
+@contextmanager
+def measuring():
+    """
+    Collect the block's queries, cache reads and PDF renders in a RequestMetrics.
+    """
+    request_metrics = RequestMetrics()
+    token = _current.set(request_metrics)
+    try:
+        yield request_metrics
+    finally:
+        _current.reset(token)
+
+
+def labels(**values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in values.items())
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Registry:
+    """
+    This process's counters and histograms, keyed by metric and label string.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.started_at = time.time_ns()
+        self.flushed_at = 0.0
+
+    def inc(self, name, label_string, amount=1):
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[label_string] = series.get(label_string, 0) + amount
+
+    def observe(self, name, label_string, seconds):
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(label_string)
+            if histogram is None:
+                histogram = series[label_string] = {
+                    'buckets': [0] * (len(LATENCY_BUCKETS) + 1), 'sum': 0.0, 'count': 0
+                }
+            index = next(
+                (i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS)
+            )
+            histogram['buckets'][index] += 1
+            histogram['sum'] += seconds
+            histogram['count'] += 1
+
+    def snapshot(self):
+        # Only loaded when DB_POOL is on
+        pool_backend = sys.modules.get('apps.core.db_backends.mysql_pool.base')
+        with self.lock:
+            return {
+                'pid': os.getpid(),
+                'counters': json.loads(json.dumps(self.counters)),
+                'histograms': json.loads(json.dumps(self.histograms)),
+                'db_pool': pool_backend.pool_stats() if pool_backend else {},
+            }
+
+    def flush(self, force=False):
+        """
+        Write the snapshot to this process's spool file, at most every
+        METRICS_FLUSH_INTERVAL seconds unless forced.
+        """
+        now = time.monotonic()
+        if not force and now - self.flushed_at < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self.flushed_at = now
+        directory = spool_directory()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}-{self.started_at}.json')
+        # Write and rename, so a reader never sees half a file
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary, 'w') as spool_file:
+            json.dump(self.snapshot(), spool_file)
+        os.replace(temporary, path)
+
+
+_registry = None
+_registry_pid = None
+
+
+def get_registry():
+    global _registry, _registry_pid
+    # A fresh registry per process: a forked worker must not report its parent's counts
+    if _registry_pid != os.getpid():
+        _registry = Registry()
+        _registry_pid = os.getpid()
+    return _registry
+
+
+def spool_directory(pool=None):
+    return os.path.join(settings.METRICS_SPOOL_DIR, pool or os.environ.get('GUNICORN_POOL', 'default'))
+
+
+def clear_spool(pool=None):
+    shutil.rmtree(spool_directory(pool), ignore_errors=True)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper counting each query against the current request.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_queries += 1
+        metrics.db_seconds += time.perf_counter() - started
+
+
+def record_cache_reads(key, hits, misses):
+    match = NAMESPACE_PATTERN.match(str(key))
+    label_string = labels(namespace=match.group() if match else 'other')
+    registry = get_registry()
+    if hits:
+        registry.inc('cache_hits_total', label_string, hits)
+    if misses:
+        registry.inc('cache_misses_total', label_string, misses)
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+def record_pdf_render(kind, seconds):
+    get_registry().observe('pdf_render_duration_seconds', labels(kind=kind), seconds)
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.pdf_seconds += seconds
+
+
+def record_request(view, method, status, seconds, metrics):
+    registry = get_registry()
+    view_labels = labels(view=view)
+    registry.observe('http_request_duration_seconds', labels(view=view, method=method), seconds)
+    registry.inc('http_requests_total', labels(view=view, method=method, status=status))
+    registry.inc('db_queries_total', view_labels, metrics.db_queries)
+    registry.inc('db_query_duration_seconds_total', view_labels, metrics.db_seconds)
+    try:
+        registry.flush()
+    except OSError:
+        # Metrics must never fail a request
+        pass
+
+
+def server_timing(seconds, metrics):
+    """
+    Server-Timing header value for a request.
+    """
+    parts = [
+        f'total;dur={seconds * 1000:.1f}',
+        f'db;dur={metrics.db_seconds * 1000:.1f};desc="{metrics.db_queries} queries"',
+    ]
+    if metrics.cache_hits or metrics.cache_misses:
+        parts.append(f'cache;desc="{metrics.cache_hits} hits, {metrics.cache_misses} misses"')
+    if metrics.pdf_seconds:
+        parts.append(f'pdf;dur={metrics.pdf_seconds * 1000:.1f}')
+    return ', '.join(parts)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """
+    Add up the spool files of every worker in every pool.
+    """
+    counters, histograms, db_pool = {}, {}, {}
+    for path in glob.glob(os.path.join(settings.METRICS_SPOOL_DIR, '*', '*.json')):
+        try:
+            with open(path) as spool_file:
+                snapshot = json.load(spool_file)
+        except (OSError, ValueError):
+            continue
+        for name, series in snapshot['counters'].items():
+            totals = counters.setdefault(name, {})
+            for label_string, value in series.items():
+                totals[label_string] = totals.get(label_string, 0) + value
+        for name, series in snapshot['histograms'].items():
+            totals = histograms.setdefault(name, {})
+            for label_string, histogram in series.items():
+                total = totals.setdefault(
+                    label_string, {'buckets': [0] * len(histogram['buckets']), 'sum': 0.0, 'count': 0}
+                )
+                total['buckets'] = [a + b for a, b in zip(total['buckets'], histogram['buckets'])]
+                total['sum'] += histogram['sum']
+                total['count'] += histogram['count']
+        # Connection pool sizes are current values; only count live workers
+        if _alive(snapshot['pid']):
+            for alias, stats in snapshot.get('db_pool', {}).items():
+                totals = db_pool.setdefault(alias, {})
+                for key, value in stats.items():
+                    totals[key] = totals.get(key, 0) + value
+    return counters, histograms, db_pool
+
+
+def render_prometheus():
+    from apps.authentication.hashing import hashing_stats
+
+    get_registry().flush(force=True)
+    counters, histograms, db_pool = collect()
+    lines = []
+
+    for name, series in sorted(counters.items()):
+        kind, text = HELP.get(name, ('counter', ''))
+        lines += [f'# HELP {name} {text}', f'# TYPE {name} {kind}']
+        for label_string, value in sorted(series.items()):
+            lines.append(f'{name}{{{label_string}}} {value}')
+
+    for name, series in sorted(histograms.items()):
+        kind, text = HELP.get(name, ('histogram', ''))
+        lines += [f'# HELP {name} {text}', f'# TYPE {name} {kind}']
+        for label_string, histogram in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip((*LATENCY_BUCKETS, '+Inf'), histogram['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{label_string},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{label_string}}} {histogram['sum']}")
+            lines.append(f"{name}_count{{{label_string}}} {histogram['count']}")
+
+    if db_pool:
+        for key in ('size', 'in_use', 'idle', 'waiting', 'checkouts', 'waits', 'timeouts'):
+            kind = 'counter' if key in ('checkouts', 'waits', 'timeouts') else 'gauge'
+            name = f'db_pool_{key}' + ('_total' if kind == 'counter' else '')
+            lines += [f'# HELP {name} Database connection pool {key}, live workers.', f'# TYPE {name} {kind}']
+            for alias, stats in sorted(db_pool.items()):
+                lines.append(f'{name}{{{labels(alias=alias)}}} {stats.get(key, 0)}')
+
+    for key, value in hashing_stats().items():
+        name = f'login_hash_{key}'
+        lines += [f'# HELP {name} Password hashes {key} on this machine.', f'# TYPE {name} gauge']
+        lines.append(f'{name} {value}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,208 @@
+"""
+Load shedding for low-priority endpoints.
+
+With sync gunicorn workers every in-flight request holds a whole worker, so
+a burst of public verify lookups or PDF renders can leave none for admin
+work. LoadSheddingMiddleware caps how many requests of each configured group
+run at once across all workers, and answers the rest straight away with the
+group's status (429 or 503) and a Retry-After header.
+
+Running requests hold a numbered slot: a flock()ed file in
+LOAD_SHEDDING_LOCK_DIR, as with the login hashing slots. The kernel takes
+the lock atomically and releases it when a worker dies, so limits hold per
+machine without a shared cache and a killed worker never leaks a slot.
+
+ReplicaRoutingMiddleware lets safe-method API requests read from the
+read replicas; see apps.core.db_router. MetricsMiddleware records request
+metrics; see apps.core.metrics.
+
+Both run natively under ASGI as well, so async views are not forced
+through a thread on their way in.
+"""
+import fcntl
+import os
+import random
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+
+from . import metrics
+from .db_router import (
+    ais_pinned, apin_to_primary, is_pinned, pin_to_primary, replica_reads, token_user_id
+)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def _slot_paths(group, limit):
+    directory = os.path.join(settings.LOAD_SHEDDING_LOCK_DIR, group)
+    os.makedirs(directory, exist_ok=True)
+    # Start at a random slot so concurrent requests rarely collide
+    start = random.randrange(limit)
+    return [os.path.join(directory, f'slot-{(start + offset) % limit}.lock') for offset in range(limit)]
+
+
+def acquire_slot(group, limit):
+    """
+    Take a free slot of `group` and return its open lock file, or None if
+    all `limit` slots are in use. Closing the file releases the slot.
+
+    Never blocks, so async requests call it directly. Each call opens its
+    own files: a flock() belongs to the open file, and a shared one would
+    let threads of a worker take the same slot.
+    """
+    for path in _slot_paths(group, limit):
+        slot_file = open(path, 'a')
+        try:
+            fcntl.flock(slot_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            slot_file.close()
+            continue
+        return slot_file
+    return None
+
+
+class AsyncCapableMiddleware:
+    """
+    Base for middleware with both a sync __call__ and an async __acall__;
+    Django picks the one matching the rest of the chain.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.call(request)
+
+
+class LoadSheddingMiddleware(AsyncCapableMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.groups = [
+            (name, re.compile(group['path']), group['concurrency'], group['status'])
+            for name, group in settings.LOAD_SHEDDING.items()
+            if group['concurrency'] > 0
+        ]
+        if not self.groups:
+            raise MiddlewareNotUsed
+
+    def match(self, request):
+        for name, pattern, limit, status in self.groups:
+            if pattern.match(request.path_info):
+                return name, limit, status
+        return None
+
+    def busy_response(self, status):
+        response = JsonResponse(
+            {'detail': 'The server is busy. Please try again shortly.'}, status=status
+        )
+        response['Retry-After'] = str(settings.LOAD_SHEDDING_RETRY_AFTER)
+        return response
+
+    def call(self, request):
+        group = self.match(request)
+        if group is None:
+            return self.get_response(request)
+
+        name, limit, status = group
+        slot = acquire_slot(name, limit)
+        if slot is None:
+            return self.busy_response(status)
+
+        try:
+            return self.get_response(request)
+        finally:
+            slot.close()
+
+    async def __acall__(self, request):
+        group = self.match(request)
+        if group is None:
+            return await self.get_response(request)
+
+        name, limit, status = group
+        slot = acquire_slot(name, limit)
+        if slot is None:
+            return self.busy_response(status)
+
+        try:
+            return await self.get_response(request)
+        finally:
+            slot.close()
+
+
+class ReplicaRoutingMiddleware(AsyncCapableMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.path = re.compile(settings.DB_REPLICA_PATHS)
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+
+    def call(self, request):
+        if not self.path.match(request.path_info):
+            return self.get_response(request)
+
+        user_id = token_user_id(request)
+        if request.method in SAFE_METHODS:
+            allowed = user_id is None or not is_pinned(user_id)
+            with replica_reads(allowed):
+                return self.get_response(request)
+
+        response = self.get_response(request)
+        if user_id is not None:
+            # Pin after the write so the user's next reads see it
+            pin_to_primary(user_id)
+        return response
+
+    async def __acall__(self, request):
+        if not self.path.match(request.path_info):
+            return await self.get_response(request)
+
+        user_id = token_user_id(request)
+        if request.method in SAFE_METHODS:
+            allowed = user_id is None or not await ais_pinned(user_id)
+            with replica_reads(allowed):
+                return await self.get_response(request)
+
+        response = await self.get_response(request)
+        if user_id is not None:
+            await apin_to_primary(user_id)
+        return response
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+
+    def finish(self, request, response, started, request_metrics):
+        seconds = time.perf_counter() - started
+        match = request.resolver_match
+        view = (match.view_name or match.route) if match else 'unresolved'
+        metrics.record_request(view, request.method, response.status_code, seconds, request_metrics)
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = metrics.server_timing(seconds, request_metrics)
+        return response
+
+    def call(self, request):
+        started = time.perf_counter()
+        with metrics.measuring() as request_metrics:
+            response = self.get_response(request)
+        return self.finish(request, response, started, request_metrics)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with metrics.measuring() as request_metrics:
+            response = await self.get_response(request)
+        return self.finish(request, response, started, request_metrics)
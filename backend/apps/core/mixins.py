@@ -0,0 +1,192 @@
+import hashlib
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from .models import IdempotencyKey
+
+
+class SideloadMixin:
+    """
+    ViewSet mixin for compound list responses: ?include=course,batch
+
+    Primary rows are rendered without their nested *_details objects and the
+    requested related objects are returned once each in an `included` map,
+    keyed by type and id, fetched with one query per type.
+
+    sideload_serializers maps an include name (the FK field on the model) to
+    (serializer class, fields to omit from the included objects).
+    sideload_omit_fields lists the nested fields dropped from primary rows.
+    Override get_sideload_queryset to annotate what an included serializer
+    would otherwise query per object.
+    """
+    sideload_serializers = {}
+    sideload_omit_fields = ()
+
+    def get_sideload_includes(self):
+        raw = self.request.query_params.get('include', '')
+        includes = [name.strip() for name in raw.split(',') if name.strip()]
+        unknown = [name for name in includes if name not in self.sideload_serializers]
+        if unknown:
+            raise ValidationError({
+                'include': f"Unknown include: {', '.join(unknown)}. "
+                           f"Allowed: {', '.join(self.sideload_serializers)}."
+            })
+        return list(dict.fromkeys(includes))
+
+    def list(self, request, *args, **kwargs):
+        includes = self.get_sideload_includes()
+        if not includes:
+            return super().list(request, *args, **kwargs)
+
+        # Related rows are loaded separately, so the joins are not needed
+        queryset = self.filter_queryset(self.get_queryset()).select_related(None)
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+
+        context = self.get_serializer_context()
+        context['omit_fields'] = self.sideload_omit_fields
+        data = self.get_serializer_class()(rows, many=True, context=context).data
+
+        included = {name: self.get_sideload_data(name, rows) for name in includes}
+
+        if page is not None:
+            response = self.get_paginated_response(data)
+            response.data['included'] = included
+            return response
+        return Response({'results': data, 'included': included})
+
+    def get_sideload_data(self, name, rows):
+        serializer_class, omit_fields = self.sideload_serializers[name]
+        attname = self.get_queryset().model._meta.get_field(name).attname
+        ids = {getattr(row, attname) for row in rows} - {None}
+        if not ids:
+            return {}
+
+        objects = self.get_sideload_queryset(name, serializer_class.Meta.model).filter(pk__in=ids)
+        context = self.get_serializer_context()
+        context['omit_fields'] = omit_fields
+        data = serializer_class(objects, many=True, context=context).data
+        return {str(item['id']): item for item in data}
+
+    def get_sideload_queryset(self, name, model):
+        return model.objects.all()
+
+
+def request_fingerprint(data):
+    """
+    Stable hash of a request body. Uploaded files count by name and size.
+    """
+    if hasattr(data, 'lists'):
+        data = {key: values for key, values in data.lists()}
+
+    def encode(value):
+        if isinstance(value, UploadedFile):
+            return f'file:{value.name}:{value.size}'
+        return str(value)
+
+    body = json.dumps(data, sort_keys=True, default=encode)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class IdempotentCreateMixin:
+    """
+    ViewSet mixin that honours an Idempotency-Key header on create.
+
+    The first request with a key inserts an IdempotencyKey row and runs
+    normally. Its successful response is stored on the row and kept for
+    IDEMPOTENCY_KEY_TTL seconds. A retry with the same key and body gets the
+    stored response back, marked with Idempotent-Replayed: true, without
+    running the serializer, number allocation or PDF generation again. Keys
+    are scoped per user and endpoint. Reusing a key with a different body is
+    rejected with 422, and a retry that arrives while the first request is
+    still running gets 409.
+
+    The row's unique key is the lock, so only one request per key runs the
+    create, across every worker and whatever the cache backend. A row left
+    by a request that died mid-create is taken over after
+    IDEMPOTENCY_LOCK_TIMEOUT seconds.
+    """
+    idempotency_header = 'Idempotency-Key'
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(self.idempotency_header)
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {'error': f'{self.idempotency_header} must be at most 255 characters.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        digest = hashlib.sha256(f'{self.basename}:{request.user.pk}:{key}'.encode()).hexdigest()
+        fingerprint = request_fingerprint(request.data)
+
+        record, claimed = self.claim_idempotency_key(digest, fingerprint)
+        if not claimed:
+            return self.replay_idempotent_response(record, fingerprint)
+
+        # Only touch the row while it is still ours
+        owned = IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at)
+        try:
+            response = super().create(request, *args, **kwargs)
+        except Exception:
+            owned.delete()
+            raise
+        if status.is_success(response.status_code):
+            owned.update(
+                status_code=response.status_code,
+                response_data=response.data,
+                location=response.get('Location', ''),
+            )
+        else:
+            # Failed requests are not stored, so a corrected retry can reuse the key
+            owned.delete()
+        return response
+
+    def claim_idempotency_key(self, digest, fingerprint):
+        """
+        Return (record, claimed). claimed is True when this request must run
+        the create: it inserted the row, or took over an expired or abandoned one.
+        """
+        now = timezone.now()
+        record, created = IdempotencyKey.objects.get_or_create(
+            key=digest, defaults={'fingerprint': fingerprint, 'created_at': now}
+        )
+        if created:
+            return record, True
+
+        running = record.status_code is None
+        lifetime = settings.IDEMPOTENCY_LOCK_TIMEOUT if running else settings.IDEMPOTENCY_KEY_TTL
+        if record.created_at > now - timedelta(seconds=lifetime):
+            return record, False
+
+        claimed = IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).update(
+            fingerprint=fingerprint, status_code=None, response_data=None, location='', created_at=now
+        )
+        if claimed:
+            record.fingerprint, record.status_code, record.created_at = fingerprint, None, now
+            return record, True
+        # Another retry took it over first and is running now
+        record.status_code = None
+        return record, False
+
+    def replay_idempotent_response(self, record, fingerprint):
+        if record.status_code is None:
+            return Response(
+                {'error': 'A request with this Idempotency-Key is still being processed.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        if record.fingerprint != fingerprint:
+            return Response(
+                {'error': 'This Idempotency-Key was already used with a different request body.'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        headers = {'Idempotent-Replayed': 'true'}
+        if record.location:
+            headers['Location'] = record.location
+        return Response(record.response_data, status=record.status_code, headers=headers)
@@ -0,0 +1,270 @@
+"""
+Out-of-process PDF rendering.
+
+Each PDF generator is split in two: a context step that reads the database
+into a plain dict, and a render step that turns that dict into PDF bytes.
+render_pdf() sends the render step to the machine's PDF renderer
+(manage.py run_pdf_renderer) over the unix socket PDF_RENDER_SOCKET. The
+renderer keeps PDF_RENDER_POOL_SIZE long-lived processes that import
+ReportLab, load the fonts and build the paragraph styles once at startup,
+and runs at most that many jobs at once for every web worker on the
+machine. Each job has a time limit and each render process has a memory
+limit, so a pathological document fails its own request instead of taking
+a web worker down with it.
+
+Jobs and results are pickled. The socket is created readable by its owner
+only, so just the app user's processes can reach the renderer.
+
+PDF_RENDER_POOL_SIZE=0 renders inline in the calling process.
+"""
+import logging
+import multiprocessing
+import os
+import pickle
+import resource
+import signal
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from .metrics import record_pdf_render
+
+logger = logging.getLogger(__name__)
+
+# Render functions by document kind
+RENDERERS = {
+    'invoice': 'apps.invoices.pdf_generator.render_invoice',
+    'custom_invoice': 'apps.invoices.pdf_generator.render_custom_invoice',
+    'certificate': 'apps.certificates.pdf_generator.render_certificate',
+}
+
+# Called once in every render process so the first job does not pay for them
+WARMUP = [
+    'apps.invoices.pdf_generator.invoice_styles',
+]
+
+PRELOAD_FONTS = ['Helvetica', 'Helvetica-Bold']
+
+# Length prefix of each pickled message on the socket
+_HEADER = struct.Struct('!Q')
+
+
+class PdfRenderError(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The PDF could not be generated right now. Please try again shortly.'
+    default_code = 'pdf_render_failed'
+
+
+class RenderTimeout(Exception):
+    pass
+
+
+def _init_worker(memory_limit):
+    """
+    Render process initializer: set up Django, cap memory and warm caches.
+    """
+    import django
+    django.setup()
+
+    if memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+    from reportlab.pdfbase import pdfmetrics
+    for font_name in PRELOAD_FONTS:
+        pdfmetrics.getFont(font_name)
+    for path in RENDERERS.values():
+        import_string(path)
+    for path in WARMUP:
+        import_string(path)()
+
+
+def _raise_timeout(signum, frame):
+    raise RenderTimeout()
+
+
+def _run_job(kind, context, time_limit):
+    """
+    Render one document inside a render process, aborting it after
+    `time_limit` seconds.
+    """
+    renderer = import_string(RENDERERS[kind])
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, time_limit)
+    try:
+        return renderer(context)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _send(sock, message):
+    data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise EOFError('Connection closed mid-message.')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _recv(sock):
+    (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    return pickle.loads(_recv_exactly(sock, size))
+
+
+class RenderHandler(socketserver.BaseRequestHandler):
+    """
+    One job per connection: receive (kind, context), reply (outcome, value).
+    """
+    def handle(self):
+        try:
+            kind, context = _recv(self.request)
+        except (EOFError, OSError):
+            return
+        outcome = self.server.render(kind, context)
+        try:
+            _send(self.request, outcome)
+        except OSError:
+            # The web worker gave up waiting
+            pass
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # A render exception that cannot be pickled
+            _send(self.request, ('failed', None))
+
+
+class RenderServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    The machine's PDF renderer: a pool of `size` render processes serving
+    every web worker, with at most `size` jobs running at once. Later jobs
+    wait up to PDF_RENDER_QUEUE_TIMEOUT for a free process.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, size):
+        # A socket left behind by a renderer that was killed
+        if os.path.exists(address):
+            os.unlink(address)
+        os.makedirs(os.path.dirname(address) or '.', exist_ok=True)
+        umask = os.umask(0o177)
+        try:
+            super().__init__(address, RenderHandler)
+        finally:
+            os.umask(umask)
+        self.size = size
+        self.slots = threading.BoundedSemaphore(size)
+        self.pool = None
+        self.pool_lock = threading.Lock()
+
+    def get_pool(self):
+        with self.pool_lock:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.size,
+                    # spawn: render processes must not inherit the renderer's threads
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(settings.PDF_RENDER_MEMORY_LIMIT_MB * 1024 * 1024,),
+                    max_tasks_per_child=settings.PDF_RENDER_MAX_TASKS or None,
+                )
+            return self.pool
+
+    def discard_pool(self, pool):
+        """
+        Kill the render processes of a broken or stuck pool; the next job
+        starts a fresh one.
+        """
+        with self.pool_lock:
+            if self.pool is pool:
+                self.pool = None
+        # ProcessPoolExecutor has no public way to stop a busy worker
+        for process in list((getattr(pool, '_processes', None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, kind, context):
+        """
+        Render one job and return ('ok', pdf bytes), ('error', exception) or
+        ('busy' | 'too_big' | 'failed', None).
+        """
+        if not self.slots.acquire(timeout=settings.PDF_RENDER_QUEUE_TIMEOUT):
+            return 'busy', None
+        try:
+            pool = self.get_pool()
+            time_limit = settings.PDF_RENDER_TIMEOUT
+            future = pool.submit(_run_job, kind, context, time_limit)
+            try:
+                # The job aborts itself at time_limit; the margin covers a cold start
+                return 'ok', future.result(timeout=time_limit + 30)
+            except (RenderTimeout, MemoryError):
+                return 'too_big', None
+            except (BrokenProcessPool, FutureTimeoutError):
+                logger.warning('PDF render process failed; restarting the pool.')
+                self.discard_pool(pool)
+                return 'failed', None
+            except Exception as e:
+                return 'error', e
+        finally:
+            self.slots.release()
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        if self.pool is not None:
+            self.discard_pool(self.pool)
+
+
+def render_pdf(kind, context):
+    """
+    Render a document of `kind` from its context dict and return the bytes.
+    """
+    started = time.perf_counter()
+    try:
+        return _render(kind, context)
+    finally:
+        record_pdf_render(kind, time.perf_counter() - started)
+
+
+def _render(kind, context):
+    if not settings.PDF_RENDER_POOL_SIZE:
+        return import_string(RENDERERS[kind])(context)
+
+    outcome, value = _render_remote(kind, context)
+    if outcome == 'ok':
+        return value
+    if outcome == 'error':
+        raise value
+    if outcome == 'busy':
+        raise PdfRenderError('Too many PDFs are being generated. Please try again shortly.')
+    if outcome == 'too_big':
+        raise PdfRenderError('The PDF took too many resources to generate.')
+    raise PdfRenderError()
+
+
+def _render_remote(kind, context):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Queue wait, the render itself and the renderer's cold-start margin
+    sock.settimeout(settings.PDF_RENDER_QUEUE_TIMEOUT + settings.PDF_RENDER_TIMEOUT + 60)
+    with sock:
+        try:
+            sock.connect(settings.PDF_RENDER_SOCKET)
+        except OSError as e:
+            logger.error('PDF renderer is not reachable at %s: %s', settings.PDF_RENDER_SOCKET, e)
+            raise PdfRenderError()
+        try:
+            _send(sock, (kind, context))
+            return _recv(sock)
+        except (EOFError, OSError):
+            return 'failed', None
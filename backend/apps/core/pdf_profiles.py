@@ -0,0 +1,42 @@
+"""
+PDF output profiles.
+
+A profile sets how ReportLab writes the finished document. The layouts use
+the standard PDF fonts (Helvetica), which viewers provide and which are
+never embedded, so every profile keeps fonts referenced by name and there
+is nothing to subset.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from reportlab import rl_config
+
+# ReportLab wraps compressed streams in ASCII85 by default, which makes them
+# a quarter larger. PDF is a binary format and every consumer here (browsers,
+# mail, storage) handles binary files, so write the compressed bytes as they are.
+rl_config.useA85 = 0
+
+PDF_PROFILES = {
+    # Compressed content streams: the smallest files, for download and email
+    'print': {'pageCompression': 1, 'invariant': 0},
+    # As print, but reproducible: the same data always renders to the same
+    # bytes (no random document ID or creation timestamp), so stored copies
+    # can be checksummed and deduplicated
+    'archive': {'pageCompression': 1, 'invariant': 1},
+    # Uncompressed content streams, for reading the generated PDF operators
+    'debug': {'pageCompression': 0, 'invariant': 0},
+}
+
+PDF_AUTHOR = 'Student Management System'
+
+
+def pdf_options(context):
+    """
+    Return the ReportLab document options for a render context.
+    context['pdf_profile'] overrides the PDF_OUTPUT_PROFILE setting.
+    """
+    profile = context.get('pdf_profile') or settings.PDF_OUTPUT_PROFILE
+    if profile not in PDF_PROFILES:
+        raise ImproperlyConfigured(
+            f"Unknown PDF output profile '{profile}'. Choose from: {', '.join(PDF_PROFILES)}."
+        )
+    return dict(PDF_PROFILES[profile])
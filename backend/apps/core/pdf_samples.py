@@ -0,0 +1,124 @@
+"""
+Synthetic render contexts for PDF benchmarks.
+
+The contexts have the same shape as the ones built by invoice_context,
+custom_invoice_context and certificate_context, so the renderers can be
+measured without touching the database. Generation is seeded, so runs
+on different commits render the same documents.
+"""
+import random
+
+FIRST_NAMES = ['Ayesha', 'Rahim', 'Nusrat', 'Tanvir', 'Farhana', 'Imran', 'Sadia', 'Karim']
+LAST_NAMES = ['Rahman', 'Hossain', 'Akter', 'Chowdhury', 'Islam', 'Ahmed', 'Begum', 'Uddin']
+COURSES = ['Web Development', 'Data Science', 'Graphic Design', 'Digital Marketing', 'Mobile App Development']
+ITEMS = ['Tuition fee', 'Lab access', 'Course materials', 'Exam fee', 'Workshop seat', 'Mentoring session']
+
+LONG_NAME = 'Mohammad Abdullah Al Mamun Chowdhury Bin Rahman Siddiqui Talukder'
+LONG_COURSE = 'Advanced Full Stack Web Application Development with Cloud Deployment and DevOps'
+
+# (label, kind, options) for each document shape in the corpus
+SAMPLE_SHAPES = [
+    ('invoice', 'invoice', {}),
+    ('invoice-long-names', 'invoice', {'long_names': True}),
+    ('custom-5-items', 'custom_invoice', {'items': 5}),
+    ('custom-60-items', 'custom_invoice', {'items': 60}),
+    ('custom-400-items', 'custom_invoice', {'items': 400}),
+    ('custom-long-names', 'custom_invoice', {'items': 20, 'long_names': True}),
+    ('certificate', 'certificate', {}),
+    ('certificate-long-names', 'certificate', {'long_names': True}),
+]
+
+
+def _person(rng, long_names):
+    if long_names:
+        return LONG_NAME
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+
+def sample_invoice_context(rng, number, long_names=False):
+    fee = rng.choice([8000, 12000, 15000, 25000])
+    return {
+        'invoice_number': f'INV-2026-{number:04d}',
+        'invoice_date': 'March 02, 2026',
+        'payment_date': 'March 05, 2026',
+        'student_name': _person(rng, long_names),
+        'student_email': f'student{number}@example.com',
+        'student_phone': f'+8801{rng.randint(100000000, 999999999)}',
+        'student_address': 'House 12, Road 5, Dhanmondi, Dhaka' * (4 if long_names else 1),
+        'course_name': LONG_COURSE if long_names else rng.choice(COURSES),
+        'course_description': 'Hands-on projects and weekly reviews. ' * (8 if long_names else 2),
+        'course_duration': rng.choice([3, 6, 12]),
+        'course_fee': float(fee),
+        'batch_name': f'Batch {rng.randint(1, 40)}',
+        'amount': float(fee / 2),
+        'total_fees': float(fee),
+        'total_paid': float(fee / 2),
+        'generated_at': 'March 05, 2026 at 10:00 AM',
+    }
+
+
+def sample_custom_invoice_context(rng, number, items=5, long_names=False):
+    lines = []
+    for position in range(items):
+        name = rng.choice(ITEMS)
+        if long_names:
+            name = f'{name} for {LONG_COURSE} ({position + 1})'
+        lines.append({
+            'name': name,
+            'quantity': rng.randint(1, 5),
+            'unit_price': float(rng.choice([250, 500, 1200, 3000])),
+        })
+    subtotal = sum(line['quantity'] * line['unit_price'] for line in lines)
+    tax_amount = round(subtotal * 0.05, 2)
+    return {
+        'invoice_number': f'CINV-2026-{number:04d}',
+        'invoice_date': 'March 02, 2026',
+        'payment_date': 'March 05, 2026',
+        'recipient_name': _person(rng, long_names),
+        'recipient_email': f'billing{number}@example.com',
+        'recipient_phone': '+8801700000000',
+        'recipient_address': 'Level 4, Gulshan Avenue, Dhaka',
+        'items': lines,
+        'subtotal': float(subtotal),
+        'tax_percentage': '5.00',
+        'tax_amount': tax_amount,
+        'discount': 0.0,
+        'total_amount': float(subtotal + tax_amount),
+        'notes': 'Paid in full.\nThank you.',
+        'generated_at': 'March 05, 2026 at 10:00 AM',
+    }
+
+
+def sample_certificate_context(rng, number, long_names=False):
+    return {
+        'student_name': _person(rng, long_names),
+        'course_name': LONG_COURSE if long_names else rng.choice(COURSES),
+        'batch_name': f'Batch {rng.randint(1, 40)}',
+        'duration': rng.choice([3, 6, 12]),
+        'completion_date': 'February 28, 2026',
+        'certificate_id': f'CERT-2026-{number:04d}',
+        'issued_at': 'March 05, 2026',
+        # Same length as a real signed token link
+        'verify_url': 'http://localhost:3000/verify?token=' + 'x' * 160,
+    }
+
+
+SAMPLE_BUILDERS = {
+    'invoice': sample_invoice_context,
+    'custom_invoice': sample_custom_invoice_context,
+    'certificate': sample_certificate_context,
+}
+
+
+def sample_corpus(count, seed=2026, shapes=None):
+    """
+    Return {label: (kind, [context, ...])} with `count` contexts per shape.
+    """
+    rng = random.Random(seed)
+    corpus = {}
+    for label, kind, options in SAMPLE_SHAPES:
+        if shapes and label not in shapes:
+            continue
+        builder = SAMPLE_BUILDERS[kind]
+        corpus[label] = (kind, [builder(rng, number, **options) for number in range(1, count + 1)])
+    return corpus
@@ -0,0 +1,49 @@
+from django.conf import settings
+from rest_framework import serializers
+
+
+class IdentityMapMixin:
+    """
+    Serializer mixin that memoizes representations for the current request.
+
+    List pages serialize the same related object many times (every enrollment
+    row carries its course, and again inside its batch). The first
+    representation of each (serializer class, pk, updated_at) is stored on
+    the request and reused for the rest of the response render. The field
+    set is part of the key, since OmitFieldsMixin can trim it per request.
+    """
+
+    def to_representation(self, instance):
+        request = self.context.get('request')
+        if request is None or not getattr(settings, 'SERIALIZER_IDENTITY_MAP', True):
+            return super().to_representation(instance)
+
+        memo = getattr(request, '_representation_memo', None)
+        if memo is None:
+            memo = {}
+            request._representation_memo = memo
+
+        key = (type(self), tuple(self.fields), instance.pk, getattr(instance, 'updated_at', None))
+        data = memo.get(key)
+        if data is None:
+            data = super().to_representation(instance)
+            memo[key] = data
+        # Hand out a copy so callers that tweak the dict do not leak into other rows
+        return data.copy()
+
+
+class OmitFieldsMixin:
+    """
+    Serializer mixin that drops the top-level fields listed in
+    context['omit_fields']. Nested serializers keep all of their fields.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is None:
+            for name in self.context.get('omit_fields', ()):
+                fields.pop(name, None)
+        return fields
@@ -0,0 +1,110 @@
+"""
+Media storage helpers.
+
+All generated files go through Django's default storage, so media can live
+on the local MEDIA_ROOT or in an S3-compatible bucket (STORAGE_BACKEND=s3).
+Files are spread over two levels of hashed subdirectories
+(invoices/3f/a2/invoice_INV-2026-0001.pdf) so that no single directory
+grows to hundreds of thousands of entries.
+"""
+import hashlib
+import os
+import tempfile
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import FileResponse, HttpResponseRedirect
+from django.utils import timezone
+
+
+def sharded_path(directory, filename):
+    """
+    Return the media-relative path for `filename` inside `directory`.
+    """
+    digest = hashlib.md5(filename.encode()).hexdigest()
+    return f'{directory}/{digest[:2]}/{digest[2:4]}/{filename}'
+
+
+def save_media_file(name, content):
+    """
+    Store bytes or a File under `name`, replacing any existing file.
+    Returns the stored name.
+
+    On local storage the file is written to a temporary name and renamed
+    into place, so readers see either the old file or the complete new one.
+    """
+    if isinstance(content, bytes):
+        content = ContentFile(content)
+
+    try:
+        path = default_storage.path(name)
+    except NotImplementedError:
+        # Object stores only publish an upload once it has completed
+        if not getattr(default_storage, 'file_overwrite', False) and default_storage.exists(name):
+            default_storage.delete(name)
+        return default_storage.save(name, content)
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            for chunk in content.chunks():
+                tmp_file.write(chunk)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.chmod(tmp_path, default_storage.file_permissions_mode or 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return name
+
+
+def ensure_pdf(instance, generate):
+    """
+    Make sure `instance` has a generated PDF and return its pdf_path.
+
+    Concurrent downloads of a document without a PDF would all render it.
+    The row is locked with SELECT ... FOR UPDATE, so the first request
+    renders and the others wait, then reuse the path it stored.
+    """
+    if instance.pdf_path:
+        return instance.pdf_path
+
+    model = type(instance)
+    with transaction.atomic():
+        locked = model.objects.select_for_update().only('pk', 'pdf_path').get(pk=instance.pk)
+        if not locked.pdf_path:
+            # Render from the caller's instance, which has its relations loaded
+            locked.pdf_path = generate(instance)
+            # update() so saving the path does not re-run save() side effects
+            model.objects.filter(pk=instance.pk).update(
+                pdf_path=locked.pdf_path, updated_at=timezone.now()
+            )
+    instance.pdf_path = locked.pdf_path
+    return instance.pdf_path
+
+
+def media_download_response(name, filename, content_type='application/pdf'):
+    """
+    Response that delivers a stored file as an attachment, or None if the
+    file is missing. With MEDIA_DOWNLOAD_REDIRECT the client is redirected
+    to a short-lived presigned URL and the bytes never pass through Django.
+    """
+    if settings.MEDIA_DOWNLOAD_REDIRECT:
+        return HttpResponseRedirect(default_storage.url(name, parameters={
+            'ResponseContentDisposition': f'attachment; filename="{filename}"',
+            'ResponseContentType': content_type,
+        }))
+
+    if not default_storage.exists(name):
+        return None
+    return FileResponse(
+        default_storage.open(name, 'rb'),
+        content_type=content_type,
+        as_attachment=True,
+        filename=filename
+    )
@@ -0,0 +1,194 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from apps.core.db_backends.mysql_pool import pool as pool_module
+from apps.core.db_backends.mysql_pool.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.alive = True
+        # Set to an Event to make ping/close hang like a half-dead socket
+        self.hang = None
+        self.hanging = threading.Event()
+
+    def wait_if_hung(self):
+        if self.hang:
+            self.hanging.set()
+            self.hang.wait(5)
+
+    def ping(self):
+        self.wait_if_hung()
+        if not self.alive:
+            raise OSError('gone away')
+
+    def close(self):
+        self.wait_if_hung()
+        self.closed = True
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.opened = []
+
+    def connect(self):
+        connection = FakeConnection(len(self.opened))
+        self.opened.append(connection)
+        return connection
+
+    def make_pool(self, **options):
+        return ConnectionPool(self.connect, **options)
+
+    def use_clock(self):
+        clock = Clock()
+        patcher = mock.patch.object(pool_module.time, 'monotonic', clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return clock
+
+    def test_released_connection_is_reused(self):
+        pool = self.make_pool()
+        connection = pool.acquire()
+        pool.release(connection)
+
+        self.assertIs(pool.acquire(), connection)
+        stats = pool.stats()
+        self.assertEqual(stats['connections_created'], 1)
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_fill_opens_min_size(self):
+        pool = self.make_pool(min_size=3)
+        pool.fill()
+
+        self.assertEqual(len(self.opened), 3)
+        self.assertEqual(pool.stats()['idle'], 3)
+
+    def test_unreusable_connection_is_closed(self):
+        pool = self.make_pool()
+        connection = pool.acquire()
+        pool.release(connection, reusable=False)
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+        self.assertIsNot(pool.acquire(), connection)
+
+    def test_times_out_when_full(self):
+        pool = self.make_pool(max_size=1, timeout=0.05)
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_waiting_caller_gets_released_connection(self):
+        pool = self.make_pool(max_size=1, timeout=5)
+        connection = pool.acquire()
+        acquired = []
+        thread = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+        thread.start()
+        while pool.stats()['waiting'] == 0:
+            thread.join(0.01)
+
+        pool.release(connection)
+        thread.join(5)
+        self.assertEqual(acquired, [connection])
+        self.assertEqual(pool.stats()['timeouts'], 0)
+
+    def test_failed_connect_frees_slot(self):
+        pool = ConnectionPool(mock.Mock(side_effect=OSError('refused')), max_size=1)
+        with self.assertRaises(OSError):
+            pool.acquire()
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_old_connection_is_recycled_on_release(self):
+        clock = self.use_clock()
+        pool = self.make_pool(recycle=60)
+        connection = pool.acquire()
+        clock.now += 61
+        pool.release(connection)
+
+        self.assertTrue(connection.closed)
+        self.assertIsNot(pool.acquire(), connection)
+        self.assertEqual(pool.stats()['connections_closed'], 1)
+
+    def test_old_idle_connection_is_recycled_on_checkout(self):
+        clock = self.use_clock()
+        pool = self.make_pool(recycle=60, ping_after=300)
+        connection = pool.acquire()
+        clock.now += 30
+        pool.release(connection)
+        clock.now += 31
+
+        self.assertIsNot(pool.acquire(), connection)
+        self.assertTrue(connection.closed)
+
+    def test_dead_idle_connection_is_replaced(self):
+        clock = self.use_clock()
+        pool = self.make_pool(ping_after=5)
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.alive = False
+        clock.now += 6
+
+        self.assertIsNot(pool.acquire(), connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def run_in_thread(self, target):
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        return thread
+
+    def assert_not_blocked(self, target):
+        thread = self.run_in_thread(target)
+        thread.join(2)
+        self.assertFalse(thread.is_alive(), 'blocked behind a hanging connection')
+
+    def test_hanging_ping_does_not_block_other_threads(self):
+        pool = self.make_pool(max_size=3, ping_after=0)
+        hanging = pool.acquire()
+        other = pool.acquire()
+        pool.release(hanging)
+        hanging.hang = threading.Event()
+        self.addCleanup(hanging.hang.set)
+
+        # Takes the idle connection and hangs in its ping
+        pinging = self.run_in_thread(pool.acquire)
+        self.assertTrue(hanging.hanging.wait(2))
+        self.assert_not_blocked(lambda: pool.release(other))
+        self.assert_not_blocked(pool.stats)
+
+        hanging.hang.set()
+        pinging.join(5)
+        self.assertFalse(pinging.is_alive())
+
+    def test_hanging_close_does_not_block_other_threads(self):
+        pool = self.make_pool(max_size=2)
+        hanging = pool.acquire()
+        hanging.hang = threading.Event()
+        self.addCleanup(hanging.hang.set)
+
+        closing = self.run_in_thread(lambda: pool.release(hanging, reusable=False))
+        self.assertTrue(hanging.hanging.wait(2))
+        # The closing connection's slot is already free
+        self.assert_not_blocked(lambda: pool.release(pool.acquire()))
+
+        hanging.hang.set()
+        closing.join(5)
+        self.assertTrue(hanging.closed)
@@ -0,0 +1,115 @@
+import base64
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from apps.core import db_router
+from apps.core.db_router import (
+    ReplicaRouter, is_pinned, pin_to_primary, read_from_primary, replica_reads
+)
+from apps.core.middleware import ReplicaRoutingMiddleware
+
+
+def bearer_token(user_id):
+    payload = base64.urlsafe_b64encode(json.dumps({'user_id': user_id}).encode()).decode().rstrip('=')
+    return f'Bearer header.{payload}.signature'
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(db_router, 'healthy_replicas', return_value=['replica'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = ReplicaRouter()
+
+    def test_reads_use_primary_outside_a_request(self):
+        self.assertEqual(self.router.db_for_read(None), DEFAULT_DB_ALIAS)
+
+    def test_marked_reads_use_a_replica(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(None), 'replica')
+            with read_from_primary():
+                self.assertEqual(self.router.db_for_read(None), DEFAULT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_write(None), DEFAULT_DB_ALIAS)
+
+    def test_reads_in_a_transaction_use_primary(self):
+        with replica_reads(), mock.patch.object(connections[DEFAULT_DB_ALIAS], 'in_atomic_block', True):
+            self.assertEqual(self.router.db_for_read(None), DEFAULT_DB_ALIAS)
+
+    def test_no_healthy_replica_falls_back_to_primary(self):
+        with replica_reads(), mock.patch.object(db_router, 'healthy_replicas', return_value=[]):
+            self.assertEqual(self.router.db_for_read(None), DEFAULT_DB_ALIAS)
+
+    def test_pin_is_per_user(self):
+        pin_to_primary(7)
+        self.assertTrue(is_pinned(7))
+        self.assertFalse(is_pinned(8))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(db_router, 'healthy_replicas', return_value=['replica'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+
+    def read_alias(self, middleware, method, path='/api/students/', user_id=None):
+        """
+        Run a request through the middleware; return the alias a read in the view would use.
+        """
+        headers = {'HTTP_AUTHORIZATION': bearer_token(user_id)} if user_id is not None else {}
+        request = getattr(self.factory, method)(path, **headers)
+        middleware(request)
+        return self.aliases[-1]
+
+    def make_middleware(self):
+        self.aliases = []
+
+        def get_response(request):
+            self.aliases.append(ReplicaRouter().db_for_read(None))
+            return HttpResponse()
+
+        return ReplicaRoutingMiddleware(get_response)
+
+    def test_write_pins_the_user_to_primary(self):
+        middleware = self.make_middleware()
+        self.assertEqual(self.read_alias(middleware, 'get', user_id=5), 'replica')
+
+        self.assertEqual(self.read_alias(middleware, 'post', user_id=5), DEFAULT_DB_ALIAS)
+        self.assertTrue(is_pinned(5))
+        self.assertEqual(self.read_alias(middleware, 'get', user_id=5), DEFAULT_DB_ALIAS)
+
+        # Other users and anonymous requests still read from the replica
+        self.assertEqual(self.read_alias(middleware, 'get', user_id=6), 'replica')
+        self.assertEqual(self.read_alias(middleware, 'get'), 'replica')
+
+    def test_pin_expires(self):
+        middleware = self.make_middleware()
+        with override_settings(DB_REPLICA_PIN_SECONDS=-1):
+            self.read_alias(middleware, 'post', user_id=5)
+        self.assertEqual(self.read_alias(middleware, 'get', user_id=5), 'replica')
+
+    def test_other_paths_read_from_primary(self):
+        middleware = self.make_middleware()
+        self.assertEqual(self.read_alias(middleware, 'get', path='/admin/'), DEFAULT_DB_ALIAS)
+
+    async def test_async_write_pins_the_user_to_primary(self):
+        aliases = []
+
+        async def get_response(request):
+            aliases.append(ReplicaRouter().db_for_read(None))
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        await middleware(self.factory.post('/api/students/', HTTP_AUTHORIZATION=bearer_token(5)))
+        await middleware(self.factory.get('/api/students/', HTTP_AUTHORIZATION=bearer_token(5)))
+        await middleware(self.factory.get('/api/students/', HTTP_AUTHORIZATION=bearer_token(6)))
+        self.assertEqual(aliases, [DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS, 'replica'])
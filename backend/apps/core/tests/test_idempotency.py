@@ -0,0 +1,103 @@
+import hashlib
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User
+from apps.core.models import IdempotencyKey
+from apps.invoices.models import CustomInvoice
+
+URL = '/api/invoices/custom/'
+
+
+def invoice_body(**overrides):
+    return {
+        'recipient_name': 'Acme Ltd',
+        'items': [{'name': 'Workshop seat', 'quantity': 2, 'unit_price': 500}],
+        'tax_percentage': 0,
+        'discount': 0,
+        'total_amount': 1000,
+        'payment_date': '2026-01-10',
+        **overrides,
+    }
+
+
+class IdempotentCreateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin@example.com', email='admin@example.com', password='x', role=User.Role.ADMIN
+        )
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def post(self, body, key='key-1'):
+        return self.client.post(URL, body, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def stored_key(self, key='key-1'):
+        return hashlib.sha256(f'custom-invoice:{self.admin.pk}:{key}'.encode()).hexdigest()
+
+    def test_retry_replays_the_first_response(self):
+        first = self.post(invoice_body())
+        second = self.post(invoice_body())
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.data['invoice_number'], first.data['invoice_number'])
+        self.assertEqual(CustomInvoice.objects.count(), 1)
+
+    def test_same_key_with_another_body_is_rejected(self):
+        self.post(invoice_body())
+        response = self.post(invoice_body(recipient_name='Other Ltd'))
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(CustomInvoice.objects.count(), 1)
+
+    def test_retry_while_first_request_runs_conflicts(self):
+        IdempotencyKey.objects.create(key=self.stored_key(), fingerprint='running', created_at=timezone.now())
+        response = self.post(invoice_body())
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(CustomInvoice.objects.count(), 0)
+
+    @override_settings(IDEMPOTENCY_LOCK_TIMEOUT=60)
+    def test_abandoned_key_is_taken_over(self):
+        IdempotencyKey.objects.create(
+            key=self.stored_key(), fingerprint='crashed', created_at=timezone.now() - timedelta(seconds=61)
+        )
+        response = self.post(invoice_body())
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 201)
+
+    def test_failed_request_frees_the_key(self):
+        invalid = self.post(invoice_body(items=[]))
+        corrected = self.post(invoice_body())
+
+        self.assertEqual(invalid.status_code, 400)
+        self.assertEqual(corrected.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', corrected)
+
+    def test_keys_are_scoped_per_user(self):
+        self.post(invoice_body())
+        other = User.objects.create_user(
+            username='other@example.com', email='other@example.com', password='x', role=User.Role.ADMIN
+        )
+        self.client.force_authenticate(other)
+        response = self.post(invoice_body())
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(CustomInvoice.objects.count(), 2)
@@ -0,0 +1,74 @@
+import shutil
+import tempfile
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from apps.core.middleware import LoadSheddingMiddleware, acquire_slot
+
+VERIFY_URL = '/api/certificates/verify/'
+
+
+class LoadSheddingTests(SimpleTestCase):
+    def setUp(self):
+        lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, lock_dir, ignore_errors=True)
+        settings_override = override_settings(
+            LOAD_SHEDDING_LOCK_DIR=lock_dir,
+            LOAD_SHEDDING={
+                'certificate_verify': {'path': r'^/api/certificates/verify/', 'concurrency': 2, 'status': 429},
+            },
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.factory = RequestFactory()
+
+    def hold_slots(self, count):
+        slots = [acquire_slot('certificate_verify', 2) for _ in range(count)]
+        for slot in slots:
+            self.addCleanup(slot.close)
+        return slots
+
+    def test_slots_are_limited(self):
+        self.assertNotIn(None, self.hold_slots(2))
+        self.assertIsNone(acquire_slot('certificate_verify', 2))
+
+    def test_closing_frees_the_slot(self):
+        first, _ = self.hold_slots(2)
+        first.close()
+        slot = acquire_slot('certificate_verify', 2)
+        self.assertIsNotNone(slot)
+        slot.close()
+
+    def test_sheds_when_full(self):
+        middleware = LoadSheddingMiddleware(lambda request: HttpResponse())
+        self.hold_slots(2)
+
+        response = middleware(self.factory.get(VERIFY_URL))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '2')
+        # Other paths are not limited
+        self.assertEqual(middleware(self.factory.get('/api/students/')).status_code, 200)
+
+    def test_slot_is_released_after_the_request(self):
+        def get_response(request):
+            # This request holds one slot; one is left
+            self.hold_slots(1)
+            self.assertIsNone(acquire_slot('certificate_verify', 2))
+            raise ValueError
+
+        middleware = LoadSheddingMiddleware(get_response)
+        with self.assertRaises(ValueError):
+            middleware(self.factory.get(VERIFY_URL))
+        slot = acquire_slot('certificate_verify', 2)
+        self.assertIsNotNone(slot)
+        slot.close()
+
+    async def test_async_sheds_when_full(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = LoadSheddingMiddleware(get_response)
+        self.assertEqual((await middleware(self.factory.get(VERIFY_URL))).status_code, 200)
+        self.hold_slots(2)
+        self.assertEqual((await middleware(self.factory.get(VERIFY_URL))).status_code, 429)
@@ -0,0 +1,23 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool_dir, ignore_errors=True)
+        settings_override = override_settings(METRICS_SPOOL_DIR=spool_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def verify(self):
+        return self.client.get('/api/certificates/verify/', {'certificate_id': 'CERT-2026-0001'})
+
+    def test_off_by_default(self):
+        self.assertNotIn('Server-Timing', self.verify())
+
+    @override_settings(SERVER_TIMING=True)
+    def test_sent_when_enabled(self):
+        self.assertIn('db;dur=', self.verify()['Server-Timing'])
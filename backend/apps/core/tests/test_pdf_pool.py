@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import threading
+
+from django.test import SimpleTestCase, override_settings
+
+from apps.core.pdf_pool import PdfRenderError, RenderServer, render_pdf
+from apps.core.pdf_samples import sample_corpus
+
+
+class RenderServerTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        directory = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, directory, ignore_errors=True)
+        cls.address = os.path.join(directory, 'render.sock')
+        cls.server = RenderServer(cls.address, 1)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+        kind, contexts = sample_corpus(1, shapes=['invoice'])['invoice']
+        cls.kind, cls.context = kind, contexts[0]
+
+    def setUp(self):
+        settings_override = override_settings(
+            PDF_RENDER_POOL_SIZE=1, PDF_RENDER_SOCKET=self.address, PDF_RENDER_QUEUE_TIMEOUT=0
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_renders_through_the_socket(self):
+        with override_settings(PDF_RENDER_QUEUE_TIMEOUT=30):
+            pdf = render_pdf(self.kind, self.context)
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertEqual(oct(os.stat(self.address).st_mode & 0o777), '0o600')
+
+    def test_renderer_errors_reach_the_caller(self):
+        with override_settings(PDF_RENDER_QUEUE_TIMEOUT=30):
+            with self.assertRaises(KeyError):
+                render_pdf('unknown', {})
+
+    def test_busy_when_every_process_is_rendering(self):
+        # The bound is the renderer's, shared by every caller on the machine
+        self.server.slots.acquire()
+        try:
+            with self.assertRaisesMessage(PdfRenderError, 'Too many PDFs'):
+                render_pdf(self.kind, self.context)
+        finally:
+            self.server.slots.release()
+
+    def test_unreachable_renderer(self):
+        with override_settings(PDF_RENDER_SOCKET=self.address + '.missing'):
+            with self.assertLogs('apps.core.pdf_pool', 'ERROR'), self.assertRaises(PdfRenderError):
+                render_pdf(self.kind, self.context)
+
+    @override_settings(PDF_RENDER_POOL_SIZE=0)
+    def test_pool_size_zero_renders_inline(self):
+        with override_settings(PDF_RENDER_SOCKET=self.address + '.missing'):
+            self.assertTrue(render_pdf(self.kind, self.context).startswith(b'%PDF'))
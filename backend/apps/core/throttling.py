@@ -0,0 +1,76 @@
+"""
+Token-bucket throttling for public and expensive endpoints.
+
+Each client gets a bucket per scope, kept in the shared cache so every
+gunicorn worker sees the same state. A bucket holds up to `burst` tokens and
+refills at the configured rate; each request takes one token. Rates come from
+REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] in DRF's 'number/period' format, with
+an optional ':burst' suffix, e.g. '60/min:10' allows bursts of 10 and then
+one request per second. Without a suffix the burst equals the number.
+
+Like DRF's own throttles, the read-modify-write is not atomic, so a burst of
+exactly simultaneous requests can overshoot by a token or two.
+"""
+import math
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket keyed by the view's throttle_scope and the client: the user
+    for authenticated requests, the client address otherwise.
+    Views without a throttle_scope are not throttled.
+    """
+    cache_format = 'throttle:bucket:%(scope)s:%(ident)s'
+
+    def __init__(self):
+        # The scope is only known once the view is, see allow_request
+        pass
+
+    def parse_rate(self, rate):
+        """
+        Return (refill per second, burst) for a 'number/period[:burst]' rate.
+        """
+        if rate is None:
+            return (None, None)
+        rate, _, burst = rate.partition(':')
+        num_requests, duration = super().parse_rate(rate)
+        return (num_requests / duration, int(burst) if burst else num_requests)
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, 'throttle_scope', None)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.refill_rate, self.burst = self.parse_rate(self.rate)
+        if self.refill_rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        self.now = self.timer()
+        tokens, updated = self.cache.get(self.key, (self.burst, self.now))
+        self.tokens = min(self.burst, tokens + (self.now - updated) * self.refill_rate)
+
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        # Expire once the bucket would be full again, like an untouched one
+        timeout = math.ceil((self.burst - self.tokens) / self.refill_rate) + 1
+        self.cache.set(self.key, (self.tokens, self.now), timeout)
+        return True
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def wait(self):
+        """
+        Seconds until the next token, sent as Retry-After.
+        """
+        return (1 - self.tokens) / self.refill_rate
@@ -0,0 +1,21 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+from .metrics import render_prometheus
+
+
+@require_GET
+def metrics_view(request):
+    """
+    GET /api/metrics/ - request metrics of all workers in Prometheus text format.
+    With METRICS_TOKEN set, requires "Authorization: Bearer <METRICS_TOKEN>";
+    nginx only lets local scrapers through either way.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return HttpResponse('Forbidden\n', status=403, content_type='text/plain')
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
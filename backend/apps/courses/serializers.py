@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from apps.core.serializers import IdentityMapMixin
 from .models import Course
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(IdentityMapMixin, serializers.ModelSerializer):
     """
     Serializer for Course model.
     """
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CourseViewSet
+from apps.core.async_views import read_async
+from .views import AsyncCourseListView, CourseViewSet
 
 router = DefaultRouter()
 router.register(r'', CourseViewSet, basename='course')
@@ -8,3 +10,9 @@ router.register(r'', CourseViewSet, basename='course')
 urlpatterns = [
     path('', include(router.urls)),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    # Under ASGI the list is async; POST still creates through the viewset
+    urlpatterns.insert(0, path('', read_async(
+        AsyncCourseListView.as_view(), CourseViewSet.as_view({'post': 'create'})
+    ), name='course-list'))
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-18 22:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0002_add_custom_invoice'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='custominvoice',
+            name='payment_date',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='invoice',
+            name='payment_date',
+            field=models.DateField(db_index=True),
+        ),
+    ]
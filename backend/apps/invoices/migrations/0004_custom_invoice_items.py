@@ -0,0 +1,60 @@
+# Generated by Django 5.0.1 on 2026-10-18 22:16
+
+from decimal import Decimal, ROUND_HALF_UP
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_json_items(apps, schema_editor):
+    CustomInvoice = apps.get_model('invoices', 'CustomInvoice')
+    CustomInvoiceItem = apps.get_model('invoices', 'CustomInvoiceItem')
+
+    line_items = []
+    for invoice in CustomInvoice.objects.only('id', 'items', 'payment_date').iterator(chunk_size=500):
+        for position, item in enumerate(invoice.items or [], 1):
+            quantity = Decimal(str(item.get('quantity', 1)))
+            unit_price = Decimal(str(item.get('unit_price', 0)))
+            line_items.append(CustomInvoiceItem(
+                invoice_id=invoice.id,
+                position=position,
+                name=str(item.get('name', 'Item'))[:200],
+                quantity=quantity,
+                unit_price=unit_price,
+                line_total=(quantity * unit_price).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+                payment_date=invoice.payment_date,
+            ))
+        if len(line_items) >= 1000:
+            CustomInvoiceItem.objects.bulk_create(line_items)
+            line_items = []
+    CustomInvoiceItem.objects.bulk_create(line_items)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0003_payment_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomInvoiceItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('name', models.CharField(max_length=200)),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('line_total', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('payment_date', models.DateField()),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='line_items', to='invoices.custominvoice')),
+            ],
+            options={
+                'verbose_name': 'Custom Invoice Item',
+                'verbose_name_plural': 'Custom Invoice Items',
+                'db_table': 'custom_invoice_items',
+                'ordering': ['invoice', 'position'],
+                'indexes': [models.Index(fields=['name', 'payment_date'], name='custom_invo_name_2fe83b_idx'), models.Index(fields=['payment_date'], name='custom_invo_payment_32af6f_idx')],
+            },
+        ),
+        migrations.RunPython(copy_json_items, migrations.RunPython.noop),
+    ]
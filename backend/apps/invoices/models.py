@@ -1,9 +1,21 @@
-from django.db import models
+import copy
+from django.db import models, transaction
 from apps.students.models import Student
 from apps.courses.models import Course
 from apps.batches.models import Batch
 from datetime import datetime
-import json
+from decimal import Decimal, ROUND_HALF_UP
+
+CENT = Decimal('0.01')
+
+
+def item_amounts(item):
+    """
+    Return (quantity, unit_price, line_total) of a JSON invoice item as Decimals.
+    """
+    quantity = Decimal(str(item.get('quantity', 1)))
+    unit_price = Decimal(str(item.get('unit_price', 0)))
+    return quantity, unit_price, (quantity * unit_price).quantize(CENT, rounding=ROUND_HALF_UP)
 
 
 class Invoice(models.Model):
@@ -29,7 +41,7 @@ class Invoice(models.Model):
         related_name='invoices'
     )
     amount = models.DecimalField(max_digits=10, decimal_places=2)
-    payment_date = models.DateField()
+    payment_date = models.DateField(db_index=True)
     pdf_path = models.CharField(max_length=500, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -86,7 +98,7 @@ class CustomInvoice(models.Model):
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
 
     # Payment details
-    payment_date = models.DateField()
+    payment_date = models.DateField(db_index=True)
     notes = models.TextField(blank=True)
 
     pdf_path = models.CharField(max_length=500, blank=True)
@@ -102,6 +114,19 @@ class CustomInvoice(models.Model):
     def __str__(self):
         return f"{self.invoice_number} - {self.recipient_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'items' in field_names and 'payment_date' in field_names:
+            instance._line_items_source = instance.line_items_source()
+        return instance
+
+    def line_items_source(self):
+        """
+        What the line items are written from; they are rewritten only when it changes.
+        """
+        return copy.deepcopy(self.items), self.payment_date
+
     def save(self, *args, **kwargs):
         if not self.invoice_number:
             # Generate invoice number: CINV-YYYY-XXXX
@@ -120,11 +145,77 @@ class CustomInvoice(models.Model):
 
         # Calculate totals from items
         if self.items:
-            self.subtotal = sum(
-                float(item.get('quantity', 1)) * float(item.get('unit_price', 0))
-                for item in self.items
-            )
-            self.tax_amount = float(self.subtotal) * float(self.tax_percentage) / 100
-            self.total_amount = float(self.subtotal) + float(self.tax_amount) - float(self.discount)
+            self.subtotal = sum((item_amounts(item)[2] for item in self.items), Decimal('0'))
+            tax_percentage = Decimal(str(self.tax_percentage))
+            self.tax_amount = (self.subtotal * tax_percentage / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+            self.total_amount = self.subtotal + self.tax_amount - Decimal(str(self.discount))
+
+        update_fields = kwargs.get('update_fields')
+        source = self.line_items_source()
+        sync = (
+            (update_fields is None or {'items', 'payment_date'} & set(update_fields))
+            and source != getattr(self, '_line_items_source', None)
+        )
+        if not sync:
+            super().save(*args, **kwargs)
+            return
+
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.sync_line_items(replace=not adding)
+        self._line_items_source = source
+
+    def sync_line_items(self, replace=True):
+        """
+        Mirror the JSON items into CustomInvoiceItem rows. A new invoice has
+        none to replace.
+        """
+        if replace:
+            self.line_items.all().delete()
+        line_items = []
+        for position, item in enumerate(self.items or [], 1):
+            quantity, unit_price, line_total = item_amounts(item)
+            line_items.append(CustomInvoiceItem(
+                invoice=self,
+                position=position,
+                name=str(item.get('name', 'Item'))[:200],
+                quantity=quantity,
+                unit_price=unit_price,
+                line_total=line_total,
+                payment_date=self.payment_date,
+            ))
+        CustomInvoiceItem.objects.bulk_create(line_items)
+
+
+class CustomInvoiceItem(models.Model):
+    """
+    Line item of a custom invoice.
+    Written from CustomInvoice.items whenever they change so that item-level
+    totals can be aggregated in SQL; the JSON stays the API format.
+    """
+    invoice = models.ForeignKey(
+        CustomInvoice,
+        on_delete=models.CASCADE,
+        related_name='line_items'
+    )
+    position = models.PositiveIntegerField()
+    name = models.CharField(max_length=200)
+    quantity = models.DecimalField(max_digits=10, decimal_places=2)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    line_total = models.DecimalField(max_digits=12, decimal_places=2)
+    # Copied from the invoice so date-range item queries need no join
+    payment_date = models.DateField()
 
-        super().save(*args, **kwargs)
+    class Meta:
+        db_table = 'custom_invoice_items'
+        ordering = ['invoice', 'position']
+        indexes = [
+            models.Index(fields=['name', 'payment_date']),
+            models.Index(fields=['payment_date']),
+        ]
+        verbose_name = 'Custom Invoice Item'
+        verbose_name_plural = 'Custom Invoice Items'
+
+    def __str__(self):
+        return f"{self.invoice.invoice_number} - {self.name}"
@@ -10,102 +10,197 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
 from reportlab.graphics.shapes import Drawing, Rect, String
 from reportlab.graphics.charts.textlabels import Label
-from django.conf import settings
-import os
-from datetime import datetime
+from django.db.models import Sum
+from django.utils import timezone
+from apps.core.pdf_pool import render_pdf
+from apps.core.pdf_profiles import PDF_AUTHOR, pdf_options
+from apps.core.storage import sharded_path, save_media_file
+from functools import lru_cache
+from io import BytesIO
+
+
+@lru_cache(maxsize=None)
+def invoice_styles():
+    """
+    Paragraph styles shared by both invoice layouts.
+    Built once per process and reused by every render.
+    """
+    styles = getSampleStyleSheet()
+    return {
+        # Company name
+        'company': ParagraphStyle(
+            'Company',
+            parent=styles['Heading1'],
+            fontSize=28,
+            textColor=colors.HexColor('#9D4EDD'),
+            fontName='Helvetica-Bold',
+            alignment=TA_LEFT,
+            spaceAfter=2*mm,
+        ),
+        # Invoice title
+        'invoice_title': ParagraphStyle(
+            'InvoiceTitle',
+            parent=styles['Heading1'],
+            fontSize=36,
+            textColor=colors.HexColor('#333333'),
+            fontName='Helvetica-Bold',
+            alignment=TA_RIGHT,
+            spaceAfter=5*mm,
+        ),
+        # Section header
+        'section': ParagraphStyle(
+            'Section',
+            parent=styles['Heading2'],
+            fontSize=11,
+            textColor=colors.HexColor('#666666'),
+            fontName='Helvetica-Bold',
+            spaceBefore=3*mm,
+            spaceAfter=2*mm,
+        ),
+        # Normal text
+        'normal': ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor=colors.HexColor('#333333'),
+            fontName='Helvetica',
+            leading=14,
+        ),
+        # Bold text
+        'bold': ParagraphStyle(
+            'CustomBold',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor=colors.HexColor('#333333'),
+            fontName='Helvetica-Bold',
+            leading=14,
+        ),
+        # Small text
+        'small': ParagraphStyle(
+            'Small',
+            parent=styles['Normal'],
+            fontSize=9,
+            textColor=colors.HexColor('#666666'),
+            fontName='Helvetica',
+            leading=12,
+        ),
+        # Invoice details (right side info)
+        'invoice_info': ParagraphStyle(
+            'InvoiceInfo',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor=colors.HexColor('#333333'),
+            fontName='Helvetica',
+            alignment=TA_RIGHT,
+        ),
+        # Payment status box
+        'status': ParagraphStyle(
+            'Status',
+            parent=styles['Normal'],
+            fontSize=14,
+            textColor=colors.white,
+            fontName='Helvetica-Bold',
+            alignment=TA_CENTER,
+        ),
+        # Footer
+        'footer': ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=8,
+            textColor=colors.HexColor('#999999'),
+            alignment=TA_CENTER,
+        ),
+    }
+
+
+def generated_at(invoice):
+    """
+    Footer timestamp: when the invoice was created, which is when its PDF is
+    first rendered. Taken from the record rather than the clock, so a later
+    re-render (and the archive profile) produces the same document.
+    """
+    return timezone.localtime(invoice.created_at).strftime('%B %d, %Y at %I:%M %p')
 
 
 def generate_invoice_pdf(invoice):
     """
     Generate a professional A4 PDF invoice.
     """
-    # Create directory if it doesn't exist
-    invoice_dir = os.path.join(settings.MEDIA_ROOT, 'invoices')
-    os.makedirs(invoice_dir, exist_ok=True)
+    # PDF path inside the sharded invoices directory
+    relative_path = sharded_path('invoices', f'invoice_{invoice.invoice_number}.pdf')
+    pdf = render_pdf('invoice', invoice_context(invoice))
+    return save_media_file(relative_path, pdf)
 
-    # Create PDF filename
-    filename = f'invoice_{invoice.invoice_number}.pdf'
-    filepath = os.path.join(invoice_dir, filename)
+
+def invoice_context(invoice):
+    """
+    Collect everything the invoice layout needs from the database
+    into a plain dict that can be sent to a render worker.
+    """
+    student = invoice.student
+    course = invoice.course
+
+    # Student's total fees and payments for the account summary
+    total_fees = student.enrollments.aggregate(
+        total=Sum('course__fee')
+    )['total'] or 0
+    total_paid = student.invoices.aggregate(
+        total=Sum('amount')
+    )['total'] or 0
+
+    return {
+        'invoice_number': invoice.invoice_number,
+        'invoice_date': invoice.created_at.strftime('%B %d, %Y'),
+        'payment_date': invoice.payment_date.strftime('%B %d, %Y'),
+        'student_name': student.name,
+        'student_email': student.email,
+        'student_phone': student.phone,
+        'student_address': getattr(student, 'present_address', '') or '',
+        'course_name': course.name,
+        'course_description': course.description or '',
+        'course_duration': course.duration,
+        'course_fee': float(course.fee),
+        'batch_name': invoice.batch.name if invoice.batch else None,
+        'amount': float(invoice.amount),
+        'total_fees': float(total_fees),
+        'total_paid': float(total_paid),
+        'generated_at': generated_at(invoice),
+    }
+
+
+def render_invoice(context):
+    """
+    Render the student invoice layout to PDF bytes.
+    """
+    buffer = BytesIO()
 
     # A4 size: 210mm x 297mm
     doc = SimpleDocTemplate(
-        filepath,
+        buffer,
         pagesize=A4,
         rightMargin=20*mm,
         leftMargin=20*mm,
         topMargin=15*mm,
-        bottomMargin=15*mm
+        bottomMargin=15*mm,
+        title=f"Invoice {context['invoice_number']}",
+        author=PDF_AUTHOR,
+        creator=PDF_AUTHOR,
+        **pdf_options(context)
     )
 
     elements = []
-    styles = getSampleStyleSheet()
+    styles = invoice_styles()
+    company_style = styles['company']
+    invoice_title_style = styles['invoice_title']
+    section_style = styles['section']
+    normal_style = styles['normal']
+    bold_style = styles['bold']
+    small_style = styles['small']
+    invoice_info_style = styles['invoice_info']
+    status_style = styles['status']
+    footer_style = styles['footer']
     width, height = A4
 
-    # ==================== CUSTOM STYLES ====================
-
-    # Company name style
-    company_style = ParagraphStyle(
-        'Company',
-        parent=styles['Heading1'],
-        fontSize=28,
-        textColor=colors.HexColor('#9D4EDD'),
-        fontName='Helvetica-Bold',
-        alignment=TA_LEFT,
-        spaceAfter=2*mm,
-    )
-
-    # Invoice title style
-    invoice_title_style = ParagraphStyle(
-        'InvoiceTitle',
-        parent=styles['Heading1'],
-        fontSize=36,
-        textColor=colors.HexColor('#333333'),
-        fontName='Helvetica-Bold',
-        alignment=TA_RIGHT,
-        spaceAfter=5*mm,
-    )
-
-    # Section header style
-    section_style = ParagraphStyle(
-        'Section',
-        parent=styles['Heading2'],
-        fontSize=11,
-        textColor=colors.HexColor('#666666'),
-        fontName='Helvetica-Bold',
-        spaceBefore=3*mm,
-        spaceAfter=2*mm,
-    )
-
-    # Normal text style
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor('#333333'),
-        fontName='Helvetica',
-        leading=14,
-    )
-
-    # Bold text style
-    bold_style = ParagraphStyle(
-        'CustomBold',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor('#333333'),
-        fontName='Helvetica-Bold',
-        leading=14,
-    )
-
-    # Small text style
-    small_style = ParagraphStyle(
-        'Small',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=colors.HexColor('#666666'),
-        fontName='Helvetica',
-        leading=12,
-    )
-
     # ==================== HEADER SECTION ====================
 
     # Create header table with company info and invoice title
@@ -139,34 +234,24 @@ def generate_invoice_pdf(invoice):
 
     # ==================== INVOICE INFO & BILL TO ====================
 
-    # Invoice details (right side info)
-    invoice_info_style = ParagraphStyle(
-        'InvoiceInfo',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor('#333333'),
-        fontName='Helvetica',
-        alignment=TA_RIGHT,
-    )
-
     # Left side: Bill To
     bill_to_content = f"""
     <b>BILL TO:</b><br/>
-    <b>{invoice.student.name}</b><br/>
-    {invoice.student.email}<br/>
-    {invoice.student.phone}<br/>
+    <b>{context['student_name']}</b><br/>
+    {context['student_email']}<br/>
+    {context['student_phone']}<br/>
     """
-    if hasattr(invoice.student, 'present_address') and invoice.student.present_address:
-        bill_to_content += f"{invoice.student.present_address}<br/>"
+    if context['student_address']:
+        bill_to_content += f"{context['student_address']}<br/>"
 
     bill_to = Paragraph(bill_to_content, normal_style)
 
     # Right side: Invoice details
     invoice_details_content = f"""
-    <b>Invoice Number:</b> {invoice.invoice_number}<br/>
-    <b>Invoice Date:</b> {invoice.created_at.strftime('%B %d, %Y')}<br/>
-    <b>Payment Date:</b> {invoice.payment_date.strftime('%B %d, %Y')}<br/>
-    <b>Due Date:</b> {invoice.payment_date.strftime('%B %d, %Y')}<br/>
+    <b>Invoice Number:</b> {context['invoice_number']}<br/>
+    <b>Invoice Date:</b> {context['invoice_date']}<br/>
+    <b>Payment Date:</b> {context['payment_date']}<br/>
+    <b>Due Date:</b> {context['payment_date']}<br/>
     """
     invoice_details = Paragraph(invoice_details_content, invoice_info_style)
 
@@ -189,13 +274,13 @@ def generate_invoice_pdf(invoice):
     items_header = ['#', 'Description', 'Duration', 'Rate', 'Amount']
 
     # Course description
-    course_desc = invoice.course.name
-    if invoice.batch:
-        course_desc += f"\nBatch: {invoice.batch.name}"
-    if invoice.course.description:
+    course_desc = context['course_name']
+    if context['batch_name']:
+        course_desc += f"\nBatch: {context['batch_name']}"
+    if context['course_description']:
         # Truncate description if too long
-        desc = invoice.course.description[:100]
-        if len(invoice.course.description) > 100:
+        desc = context['course_description'][:100]
+        if len(context['course_description']) > 100:
             desc += "..."
         course_desc += f"\n{desc}"
 
@@ -204,9 +289,9 @@ def generate_invoice_pdf(invoice):
         [
             '1',
             course_desc,
-            f"{invoice.course.duration} months",
-            f"৳{invoice.course.fee:,.2f}",
-            f"৳{invoice.amount:,.2f}"
+            f"{context['course_duration']} months",
+            f"৳{context['course_fee']:,.2f}",
+            f"৳{context['amount']:,.2f}"
         ]
     ]
 
@@ -249,7 +334,7 @@ def generate_invoice_pdf(invoice):
     # ==================== TOTALS SECTION ====================
 
     # Calculate totals (you can add subtotal, tax if needed)
-    subtotal = float(invoice.amount)
+    subtotal = context['amount']
     tax = 0  # No tax for now
     total = subtotal + tax
 
@@ -282,15 +367,9 @@ def generate_invoice_pdf(invoice):
 
     # ==================== STUDENT ACCOUNT SUMMARY ====================
 
-    # Calculate student's total fees, paid, and due
-    from django.db.models import Sum
-
-    total_fees = invoice.student.enrollments.aggregate(
-        total=Sum('course__fee')
-    )['total'] or 0
-    total_paid = invoice.student.invoices.aggregate(
-        total=Sum('amount')
-    )['total'] or 0
+    # Calculate student's balance due
+    total_fees = context['total_fees']
+    total_paid = context['total_paid']
     due_amount = max(0, float(total_fees) - float(total_paid))
 
     account_section = Paragraph("<b>STUDENT ACCOUNT SUMMARY</b>", section_style)
@@ -331,15 +410,6 @@ def generate_invoice_pdf(invoice):
 
     # ==================== PAYMENT STATUS BOX ====================
 
-    status_style = ParagraphStyle(
-        'Status',
-        parent=styles['Normal'],
-        fontSize=14,
-        textColor=colors.white,
-        fontName='Helvetica-Bold',
-        alignment=TA_CENTER,
-    )
-
     # Determine payment status based on due amount
     if due_amount <= 0:
         status_text = "FULLY PAID"
@@ -396,17 +466,9 @@ def generate_invoice_pdf(invoice):
     elements.append(HRFlowable(width="100%", thickness=1, color=colors.HexColor('#CCCCCC')))
     elements.append(Spacer(1, 3*mm))
 
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.HexColor('#999999'),
-        alignment=TA_CENTER,
-    )
-
     footer_text = f"""
     Student Management System | www.sms.edu | billing@sms.edu<br/>
-    Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}<br/>
+    Generated on {context['generated_at']}<br/>
     This is an electronically generated document.
     """
     elements.append(Paragraph(footer_text, footer_style))
@@ -414,83 +476,72 @@ def generate_invoice_pdf(invoice):
     # Build PDF
     doc.build(elements)
 
-    return f'invoices/{filename}'
+    return buffer.getvalue()
 
 
 def generate_custom_invoice_pdf(invoice):
     """
     Generate a professional A4 PDF for custom invoices with multiple items.
     """
-    # Create directory if it doesn't exist
-    invoice_dir = os.path.join(settings.MEDIA_ROOT, 'invoices', 'custom')
-    os.makedirs(invoice_dir, exist_ok=True)
+    # PDF path inside the sharded custom invoices directory
+    relative_path = sharded_path('invoices/custom', f'custom_invoice_{invoice.invoice_number}.pdf')
+    pdf = render_pdf('custom_invoice', custom_invoice_context(invoice))
+    return save_media_file(relative_path, pdf)
+
 
-    # Create PDF filename
-    filename = f'custom_invoice_{invoice.invoice_number}.pdf'
-    filepath = os.path.join(invoice_dir, filename)
+def custom_invoice_context(invoice):
+    """
+    Collect the custom invoice fields into a plain dict for rendering.
+    """
+    return {
+        'invoice_number': invoice.invoice_number,
+        'invoice_date': invoice.created_at.strftime('%B %d, %Y'),
+        'payment_date': invoice.payment_date.strftime('%B %d, %Y'),
+        'recipient_name': invoice.recipient_name,
+        'recipient_email': invoice.recipient_email,
+        'recipient_phone': invoice.recipient_phone,
+        'recipient_address': invoice.recipient_address,
+        'items': list(invoice.items),
+        'subtotal': float(invoice.subtotal),
+        'tax_percentage': str(invoice.tax_percentage),
+        'tax_amount': float(invoice.tax_amount),
+        'discount': float(invoice.discount),
+        'total_amount': float(invoice.total_amount),
+        'notes': invoice.notes,
+        'generated_at': generated_at(invoice),
+    }
+
+
+def render_custom_invoice(context):
+    """
+    Render the custom invoice layout to PDF bytes.
+    """
+    buffer = BytesIO()
 
     # A4 size: 210mm x 297mm
     doc = SimpleDocTemplate(
-        filepath,
+        buffer,
         pagesize=A4,
         rightMargin=20*mm,
         leftMargin=20*mm,
         topMargin=15*mm,
-        bottomMargin=15*mm
+        bottomMargin=15*mm,
+        title=f"Invoice {context['invoice_number']}",
+        author=PDF_AUTHOR,
+        creator=PDF_AUTHOR,
+        **pdf_options(context)
     )
 
     elements = []
-    styles = getSampleStyleSheet()
-
-    # ==================== CUSTOM STYLES ====================
-
-    company_style = ParagraphStyle(
-        'Company',
-        parent=styles['Heading1'],
-        fontSize=28,
-        textColor=colors.HexColor('#9D4EDD'),
-        fontName='Helvetica-Bold',
-        alignment=TA_LEFT,
-        spaceAfter=2*mm,
-    )
-
-    invoice_title_style = ParagraphStyle(
-        'InvoiceTitle',
-        parent=styles['Heading1'],
-        fontSize=36,
-        textColor=colors.HexColor('#333333'),
-        fontName='Helvetica-Bold',
-        alignment=TA_RIGHT,
-        spaceAfter=5*mm,
-    )
-
-    section_style = ParagraphStyle(
-        'Section',
-        parent=styles['Heading2'],
-        fontSize=11,
-        textColor=colors.HexColor('#666666'),
-        fontName='Helvetica-Bold',
-        spaceBefore=3*mm,
-        spaceAfter=2*mm,
-    )
-
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor('#333333'),
-        fontName='Helvetica',
-        leading=14,
-    )
-
-    small_style = ParagraphStyle(
-        'Small',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=colors.HexColor('#666666'),
-        fontName='Helvetica',
-        leading=12,
-    )
+    styles = invoice_styles()
+    company_style = styles['company']
+    invoice_title_style = styles['invoice_title']
+    section_style = styles['section']
+    normal_style = styles['normal']
+    small_style = styles['small']
+    invoice_info_style = styles['invoice_info']
+    status_style = styles['status']
+    footer_style = styles['footer']
 
     # ==================== HEADER SECTION ====================
 
@@ -522,32 +573,23 @@ def generate_custom_invoice_pdf(invoice):
 
     # ==================== INVOICE INFO & BILL TO ====================
 
-    invoice_info_style = ParagraphStyle(
-        'InvoiceInfo',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor('#333333'),
-        fontName='Helvetica',
-        alignment=TA_RIGHT,
-    )
-
     bill_to_content = f"""
     <b>BILL TO:</b><br/>
-    <b>{invoice.recipient_name}</b><br/>
+    <b>{context['recipient_name']}</b><br/>
     """
-    if invoice.recipient_email:
-        bill_to_content += f"{invoice.recipient_email}<br/>"
-    if invoice.recipient_phone:
-        bill_to_content += f"{invoice.recipient_phone}<br/>"
-    if invoice.recipient_address:
-        bill_to_content += f"{invoice.recipient_address}<br/>"
+    if context['recipient_email']:
+        bill_to_content += f"{context['recipient_email']}<br/>"
+    if context['recipient_phone']:
+        bill_to_content += f"{context['recipient_phone']}<br/>"
+    if context['recipient_address']:
+        bill_to_content += f"{context['recipient_address']}<br/>"
 
     bill_to = Paragraph(bill_to_content, normal_style)
 
     invoice_details_content = f"""
-    <b>Invoice Number:</b> {invoice.invoice_number}<br/>
-    <b>Invoice Date:</b> {invoice.created_at.strftime('%B %d, %Y')}<br/>
-    <b>Payment Date:</b> {invoice.payment_date.strftime('%B %d, %Y')}<br/>
+    <b>Invoice Number:</b> {context['invoice_number']}<br/>
+    <b>Invoice Date:</b> {context['invoice_date']}<br/>
+    <b>Payment Date:</b> {context['payment_date']}<br/>
     """
     invoice_details = Paragraph(invoice_details_content, invoice_info_style)
 
@@ -568,7 +610,7 @@ def generate_custom_invoice_pdf(invoice):
     items_header = ['#', 'Description', 'Qty', 'Unit Price', 'Amount']
 
     items_data = [items_header]
-    for i, item in enumerate(invoice.items, 1):
+    for i, item in enumerate(context['items'], 1):
         qty = float(item.get('quantity', 1))
         unit_price = float(item.get('unit_price', 0))
         amount = qty * unit_price
@@ -622,17 +664,17 @@ def generate_custom_invoice_pdf(invoice):
 
     # ==================== TOTALS SECTION ====================
 
-    subtotal = float(invoice.subtotal)
-    tax_amount = float(invoice.tax_amount)
-    discount = float(invoice.discount)
-    total = float(invoice.total_amount)
+    subtotal = context['subtotal']
+    tax_amount = context['tax_amount']
+    discount = context['discount']
+    total = context['total_amount']
 
     totals_data = [
         ['', '', 'Subtotal:', f"৳{subtotal:,.2f}"],
     ]
 
-    if float(invoice.tax_percentage) > 0:
-        totals_data.append(['', '', f'Tax ({invoice.tax_percentage}%):', f"৳{tax_amount:,.2f}"])
+    if float(context['tax_percentage']) > 0:
+        totals_data.append(['', '', f"Tax ({context['tax_percentage']}%):", f"৳{tax_amount:,.2f}"])
 
     if discount > 0:
         totals_data.append(['', '', 'Discount:', f"-৳{discount:,.2f}"])
@@ -662,15 +704,6 @@ def generate_custom_invoice_pdf(invoice):
 
     # ==================== PAYMENT STATUS BOX ====================
 
-    status_style = ParagraphStyle(
-        'Status',
-        parent=styles['Normal'],
-        fontSize=14,
-        textColor=colors.white,
-        fontName='Helvetica-Bold',
-        alignment=TA_CENTER,
-    )
-
     status_text = "PAID"
     status_data = [[Paragraph(f"<b>PAYMENT STATUS: {status_text}</b>", status_style)]]
 
@@ -688,10 +721,10 @@ def generate_custom_invoice_pdf(invoice):
 
     # ==================== NOTES ====================
 
-    if invoice.notes:
+    if context['notes']:
         notes_section = Paragraph("<b>NOTES</b>", section_style)
         elements.append(notes_section)
-        elements.append(Paragraph(invoice.notes.replace('\n', '<br/>'), small_style))
+        elements.append(Paragraph(context['notes'].replace('\n', '<br/>'), small_style))
         elements.append(Spacer(1, 8*mm))
 
     # ==================== PAYMENT DETAILS ====================
@@ -727,17 +760,9 @@ def generate_custom_invoice_pdf(invoice):
     elements.append(HRFlowable(width="100%", thickness=1, color=colors.HexColor('#CCCCCC')))
     elements.append(Spacer(1, 3*mm))
 
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.HexColor('#999999'),
-        alignment=TA_CENTER,
-    )
-
     footer_text = f"""
     Student Management System | www.sms.edu | billing@sms.edu<br/>
-    Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}<br/>
+    Generated on {context['generated_at']}<br/>
     This is an electronically generated document.
     """
     elements.append(Paragraph(footer_text, footer_style))
@@ -745,4 +770,4 @@ def generate_custom_invoice_pdf(invoice):
     # Build PDF
     doc.build(elements)
 
-    return f'invoices/custom/{filename}'
+    return buffer.getvalue()
@@ -0,0 +1,110 @@
+import shutil
+import tempfile
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User
+from apps.courses.models import Course
+from apps.reports.models import DailyRevenue
+from apps.students.models import Student
+from .models import CustomInvoice, CustomInvoiceItem, Invoice
+from .pdf_generator import invoice_context, render_invoice
+
+
+class InvoicePdfTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(name='Course', description='', duration=3, fee=Decimal('1000.00'))
+        user = User.objects.create_user(username='student@example.com', email='student@example.com', password='x')
+        student = Student.objects.create(
+            user=user, name='Student', email=user.email, phone='0100000000', enrollment_date=date(2026, 1, 1)
+        )
+        cls.invoice = Invoice.objects.create(
+            student=student, course=course, amount=Decimal('500.00'), payment_date=date(2026, 1, 10)
+        )
+
+    def test_footer_timestamp_comes_from_the_record(self):
+        Invoice.objects.filter(pk=self.invoice.pk).update(created_at=datetime(2026, 1, 10, 9, 30, tzinfo=timezone.utc))
+        context = invoice_context(Invoice.objects.get(pk=self.invoice.pk))
+        self.assertEqual(context['generated_at'], 'January 10, 2026 at 09:30 AM')
+
+    @override_settings(PDF_OUTPUT_PROFILE='archive')
+    def test_archive_profile_is_reproducible(self):
+        first = render_invoice(invoice_context(self.invoice))
+        second = render_invoice(invoice_context(Invoice.objects.get(pk=self.invoice.pk)))
+        self.assertEqual(first, second)
+
+    def test_streams_are_binary(self):
+        pdf = render_invoice(invoice_context(self.invoice))
+        self.assertNotIn(b'/ASCII85Decode', pdf)
+        self.assertIn(b'/FlateDecode', pdf)
+
+
+def line_item_writes(queries):
+    return [
+        query['sql'] for query in queries
+        if 'custom_invoice_items' in query['sql'] and not query['sql'].startswith('SELECT')
+    ]
+
+
+class CustomInvoiceLineItemTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin@example.com', email='admin@example.com', password='x', role=User.Role.ADMIN
+        )
+
+    def create(self, **fields):
+        return CustomInvoice.objects.create(
+            recipient_name='Acme Ltd', items=[{'name': 'Seat', 'quantity': 2, 'unit_price': 500}],
+            total_amount=0, payment_date=date(2026, 1, 10), **fields
+        )
+
+    def test_unchanged_items_are_not_rewritten(self):
+        invoice = CustomInvoice.objects.get(pk=self.create().pk)
+        invoice.notes = 'Paid in cash'
+        with CaptureQueriesContext(connection) as queries:
+            invoice.save()
+        self.assertEqual(line_item_writes(queries), [])
+
+    def test_changed_items_are_rewritten(self):
+        invoice = self.create()
+        invoice.items = [{'name': 'Seat', 'quantity': 3, 'unit_price': 500}]
+        invoice.save()
+        invoice.payment_date = date(2026, 2, 1)
+        invoice.save()
+
+        item = CustomInvoiceItem.objects.get(invoice=invoice)
+        self.assertEqual(item.line_total, Decimal('1500.00'))
+        self.assertEqual(item.payment_date, date(2026, 2, 1))
+
+    def test_update_fields_without_items_skip_the_sync(self):
+        invoice = self.create()
+        invoice.items = [{'name': 'Seat', 'quantity': 3, 'unit_price': 500}]
+        with CaptureQueriesContext(connection) as queries:
+            invoice.save(update_fields=['notes'])
+        self.assertEqual(line_item_writes(queries), [])
+
+    def test_create_writes_items_and_revenue_once(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        with override_settings(MEDIA_ROOT=media_root), CaptureQueriesContext(connection) as queries:
+            response = client.post('/api/invoices/custom/', {
+                'recipient_name': 'Acme Ltd',
+                'items': [{'name': 'Seat', 'quantity': 2, 'unit_price': 500}],
+                'tax_percentage': 0, 'discount': 0, 'total_amount': 1000, 'payment_date': '2026-01-10',
+            }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(line_item_writes(queries)), 1)
+        self.assertTrue(CustomInvoice.objects.get(pk=response.data['id']).pdf_path)
+        rollup = DailyRevenue.objects.get(kind=DailyRevenue.Kind.CUSTOM)
+        self.assertEqual((rollup.amount, rollup.invoice_count), (Decimal('1000.00'), 1))
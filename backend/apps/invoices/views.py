@@ -2,16 +2,15 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.http import FileResponse
-from django.conf import settings
 from apps.authentication.permissions import IsAdmin
+from apps.core.mixins import IdempotentCreateMixin
+from apps.core.storage import ensure_pdf, media_download_response
 from .models import Invoice, CustomInvoice
 from .serializers import InvoiceSerializer, CustomInvoiceSerializer
 from .pdf_generator import generate_invoice_pdf, generate_custom_invoice_pdf
-import os
 
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+class InvoiceViewSet(IdempotentCreateMixin, viewsets.ModelViewSet):
     """
     ViewSet for Invoice CRUD operations.
     Admin can create, update, delete, and view all invoices.
@@ -20,6 +19,8 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     queryset = Invoice.objects.select_related('student', 'course', 'batch').all()
     serializer_class = InvoiceSerializer
     permission_classes = [IsAuthenticated]
+    # Set per action; see download
+    throttle_scope = None
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['invoice_number', 'student__name', 'course__name']
     ordering_fields = ['invoice_number', 'payment_date', 'created_at']
@@ -36,10 +37,9 @@ class InvoiceViewSet(viewsets.ModelViewSet):
 
         # Students can only see their own invoices
         if user.is_student:
-            try:
-                student = user.student_profile
-                queryset = queryset.filter(student=student)
-            except:
+            if user.student_id:
+                queryset = queryset.filter(student_id=user.student_id)
+            else:
                 queryset = queryset.none()
 
         return queryset
@@ -47,42 +47,33 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         invoice = serializer.save()
         # Generate PDF after creating invoice
-        pdf_path = generate_invoice_pdf(invoice)
-        invoice.pdf_path = pdf_path
-        invoice.save()
+        invoice.pdf_path = generate_invoice_pdf(invoice)
+        # update() so saving the path does not re-run save() side effects
+        Invoice.objects.filter(pk=invoice.pk).update(pdf_path=invoice.pdf_path)
 
-    @action(detail=True, methods=['get'])
+    @action(detail=True, methods=['get'], throttle_scope='pdf_download')
     def download(self, request, pk=None):
         """
         Download invoice PDF.
         """
         invoice = self.get_object()
 
-        if not invoice.pdf_path:
-            # Generate PDF if it doesn't exist
-            pdf_path = generate_invoice_pdf(invoice)
-            invoice.pdf_path = pdf_path
-            invoice.save()
+        # Generate PDF if it doesn't exist; concurrent requests share one render
+        ensure_pdf(invoice, generate_invoice_pdf)
 
-        # Get full file path
-        file_path = os.path.join(settings.MEDIA_ROOT, invoice.pdf_path)
+        # Stream the file, or redirect to object storage
+        response = media_download_response(invoice.pdf_path, f'invoice_{invoice.invoice_number}.pdf')
 
-        if not os.path.exists(file_path):
+        if response is None:
             return Response(
                 {'error': 'PDF file not found.'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Return file
-        return FileResponse(
-            open(file_path, 'rb'),
-            content_type='application/pdf',
-            as_attachment=True,
-            filename=f'invoice_{invoice.invoice_number}.pdf'
-        )
+        return response
 
 
-class CustomInvoiceViewSet(viewsets.ModelViewSet):
+class CustomInvoiceViewSet(IdempotentCreateMixin, viewsets.ModelViewSet):
     """
     ViewSet for Custom Invoice CRUD operations.
     Admin only - for creating invoices to any recipient with custom items.
@@ -90,6 +81,8 @@ class CustomInvoiceViewSet(viewsets.ModelViewSet):
     queryset = CustomInvoice.objects.all()
     serializer_class = CustomInvoiceSerializer
     permission_classes = [IsAuthenticated, IsAdmin]
+    # Set per action; see download
+    throttle_scope = None
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['invoice_number', 'recipient_name', 'recipient_email']
     ordering_fields = ['invoice_number', 'payment_date', 'created_at', 'total_amount']
@@ -98,36 +91,27 @@ class CustomInvoiceViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         invoice = serializer.save()
         # Generate PDF after creating invoice
-        pdf_path = generate_custom_invoice_pdf(invoice)
-        invoice.pdf_path = pdf_path
-        invoice.save()
+        invoice.pdf_path = generate_custom_invoice_pdf(invoice)
+        # update() so saving the path does not re-run save() side effects or rewrite the line items
+        CustomInvoice.objects.filter(pk=invoice.pk).update(pdf_path=invoice.pdf_path)
 
-    @action(detail=True, methods=['get'])
+    @action(detail=True, methods=['get'], throttle_scope='pdf_download')
     def download(self, request, pk=None):
         """
         Download custom invoice PDF.
         """
         invoice = self.get_object()
 
-        if not invoice.pdf_path:
-            # Generate PDF if it doesn't exist
-            pdf_path = generate_custom_invoice_pdf(invoice)
-            invoice.pdf_path = pdf_path
-            invoice.save()
+        # Generate PDF if it doesn't exist; concurrent requests share one render
+        ensure_pdf(invoice, generate_custom_invoice_pdf)
 
-        # Get full file path
-        file_path = os.path.join(settings.MEDIA_ROOT, invoice.pdf_path)
+        # Stream the file, or redirect to object storage
+        response = media_download_response(invoice.pdf_path, f'invoice_{invoice.invoice_number}.pdf')
 
-        if not os.path.exists(file_path):
+        if response is None:
             return Response(
                 {'error': 'PDF file not found.'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Return file
-        return FileResponse(
-            open(file_path, 'rb'),
-            content_type='application/pdf',
-            as_attachment=True,
-            filename=f'invoice_{invoice.invoice_number}.pdf'
-        )
+        return response
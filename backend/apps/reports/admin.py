@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import DailyRevenue
+
+
+@admin.register(DailyRevenue)
+class DailyRevenueAdmin(admin.ModelAdmin):
+    list_display = ['date', 'kind', 'course', 'batch', 'amount', 'invoice_count']
+    list_filter = ['kind', 'date', 'course']
+    ordering = ['-date']
@@ -0,0 +1,37 @@
+"""
+Compare the DailyRevenue rollup against raw invoice sums per month, kind,
+course and batch.
+Run with: python manage.py check_revenue_rollup
+"""
+from django.core.management.base import BaseCommand, CommandError
+from apps.reports.revenue import group_sort_key, revenue_report
+
+
+class Command(BaseCommand):
+    help = 'Verify that rollup totals match the invoice tables.'
+
+    def handle(self, *args, **options):
+        group_by = ['month', 'kind', 'course', 'batch']
+        raw = {self._key(row): row for row in revenue_report(group_by, source='raw')['results']}
+        rollup = {self._key(row): row for row in revenue_report(group_by, source='rollup')['results']}
+
+        mismatches = []
+        for key in sorted(set(raw) | set(rollup), key=group_sort_key):
+            expected = raw.get(key, {'total': '0.00', 'count': 0})
+            actual = rollup.get(key, {'total': '0.00', 'count': 0})
+            if (expected['total'], expected['count']) != (actual['total'], actual['count']):
+                mismatches.append(key)
+                self.stdout.write(
+                    f"{' '.join(str(part) for part in key)}: invoices {expected['total']} ({expected['count']}) "
+                    f"!= rollup {actual['total']} ({actual['count']})"
+                )
+
+        if mismatches:
+            raise CommandError(
+                f'{len(mismatches)} rollup groups differ. '
+                f'Run rebuild_revenue_rollup for the affected months.'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Rollup matches invoices across {len(raw)} groups.'))
+
+    def _key(self, row):
+        return (row['month'], row['kind'], row['course_id'], row['batch_id'])
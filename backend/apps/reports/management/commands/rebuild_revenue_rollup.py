@@ -0,0 +1,55 @@
+"""
+Rebuild the DailyRevenue rollup from the invoice tables in date windows.
+Run with: python manage.py rebuild_revenue_rollup [--since 2026-01-01] [--until 2026-12-31]
+
+Each window is rebuilt in its own transaction, so the command can be
+stopped and re-run with --since to resume.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from apps.core.cache import bump_data_version
+from apps.reports.models import DailyRevenue
+from apps.reports.rollup import date_bounds, iter_windows, rebuild_window
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily revenue rollup in chunked date windows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First payment date to rebuild (YYYY-MM-DD).')
+        parser.add_argument('--until', help='Last payment date to rebuild (YYYY-MM-DD).')
+        parser.add_argument('--chunk-days', type=int, default=31, help='Days per window.')
+        parser.add_argument('--if-empty', action='store_true',
+                            help='Only run when the rollup table has no rows (first deploy).')
+
+    def handle(self, *args, **options):
+        if options['if_empty'] and DailyRevenue.objects.exists():
+            self.stdout.write('Rollup already populated, nothing to do.')
+            return
+
+        low, high = date_bounds()
+        if low is None:
+            self.stdout.write('No invoices found.')
+            return
+
+        since = self._parse(options['since']) or low
+        until = self._parse(options['until']) or high
+        if options['chunk_days'] <= 0:
+            raise CommandError('--chunk-days must be positive.')
+
+        total = 0
+        for start, end in iter_windows(since, until, options['chunk_days']):
+            written = rebuild_window(start, end)
+            total += written
+            self.stdout.write(f'{start} .. {end}: {written} rows')
+
+        bump_data_version('revenue')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} rollup rows from {since} to {until}.'))
+
+    def _parse(self, value):
+        if not value:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f'Invalid date: {value}')
+        return parsed
@@ -0,0 +1,49 @@
+from django.db import models
+from apps.courses.models import Course
+from apps.batches.models import Batch
+
+
+class DailyRevenue(models.Model):
+    """
+    Daily revenue rollup keyed by (date, course, batch, kind).
+
+    Kept up to date from invoice save/delete signals and rebuilt with
+    `manage.py rebuild_revenue_rollup`. Reports always SUM over matching
+    rows, so a rare duplicate key row from concurrent writers is harmless.
+    """
+    class Kind(models.TextChoices):
+        STUDENT = 'STUDENT', 'Student Invoice'
+        CUSTOM = 'CUSTOM', 'Custom Invoice'
+
+    date = models.DateField()
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    # Mirrors Invoice: deleting a course removes its invoices, deleting a
+    # batch detaches them.
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='daily_revenue'
+    )
+    batch = models.ForeignKey(
+        Batch,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='daily_revenue'
+    )
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    invoice_count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'daily_revenue'
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date', 'kind']),
+        ]
+        verbose_name = 'Daily Revenue'
+        verbose_name_plural = 'Daily Revenue'
+
+    def __str__(self):
+        return f"{self.date} {self.kind} - {self.amount}"
@@ -0,0 +1,127 @@
+"""
+Revenue aggregation over student and custom invoices.
+
+Reports read the DailyRevenue rollup by default (one small grouped query).
+source='raw' aggregates the invoice tables directly, one grouped query per
+table, and is used to cross-check the rollup. Grouping by item always reads
+the custom invoice line items; their totals are before tax and discount.
+"""
+from decimal import Decimal
+from django.db.models import Sum, Count
+from django.db.models.functions import TruncMonth
+from apps.invoices.models import CustomInvoiceItem
+from .models import DailyRevenue
+from .rollup import ROLLUP_SOURCES
+
+DIMENSIONS = ['course', 'batch', 'month', 'kind', 'item']
+KINDS = [kind.value for kind in DailyRevenue.Kind]
+SOURCES = ['rollup', 'raw']
+
+
+def group_sort_key(values):
+    """
+    Sort key for a tuple of group values; None (no course or batch) sorts last.
+    """
+    return tuple((value is None, value if value is not None else 0) for value in values)
+
+
+def _grouped_rows(queryset, group_by, date_field, total, count, kind=None, relations=('course', 'batch')):
+    """
+    Run one grouped query and yield report rows. `kind` is a constant for
+    raw invoice tables; the rollup has it as a column.
+    """
+    fields = []
+    if 'month' in group_by:
+        queryset = queryset.annotate(month=TruncMonth(date_field))
+        fields.append('month')
+    if 'kind' in group_by and kind is None:
+        fields.append('kind')
+    for name in ('course', 'batch'):
+        if name in group_by and name in relations:
+            fields += [f'{name}_id', f'{name}__name']
+    if 'item' in group_by:
+        fields.append('name')
+
+    for row in queryset.values(*fields).annotate(total=total, count=count):
+        result = {}
+        if 'kind' in group_by:
+            result['kind'] = kind or row['kind']
+        if 'month' in group_by:
+            result['month'] = row['month'].strftime('%Y-%m')
+        for name in ('course', 'batch'):
+            if name in group_by:
+                result[f'{name}_id'] = row.get(f'{name}_id')
+                result[f'{name}_name'] = row.get(f'{name}__name')
+        if 'item' in group_by:
+            result['item'] = row['name']
+        result['total'] = row['total'] or Decimal('0')
+        result['count'] = row['count'] or 0
+        yield result
+
+
+def _rollup_rows(group_by, date_from, date_to, kind):
+    # Drop the model's default ordering, it would leak into GROUP BY
+    queryset = DailyRevenue.objects.order_by()
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    if kind:
+        queryset = queryset.filter(kind=kind)
+    yield from _grouped_rows(queryset, group_by, 'date', Sum('amount'), Sum('invoice_count'))
+
+
+def _raw_rows(group_by, date_from, date_to, kind):
+    for source_kind in ([kind] if kind else KINDS):
+        model, amount_field, has_relations = ROLLUP_SOURCES[source_kind]
+        queryset = model.objects.order_by()
+        if date_from:
+            queryset = queryset.filter(payment_date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(payment_date__lte=date_to)
+        yield from _grouped_rows(
+            queryset, group_by, 'payment_date', Sum(amount_field), Count('id'),
+            kind=source_kind, relations=('course', 'batch') if has_relations else (),
+        )
+
+
+def _item_rows(group_by, date_from, date_to, kind):
+    if kind == DailyRevenue.Kind.STUDENT:
+        return
+    queryset = CustomInvoiceItem.objects.order_by()
+    if date_from:
+        queryset = queryset.filter(payment_date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(payment_date__lte=date_to)
+    yield from _grouped_rows(
+        queryset, group_by, 'payment_date', Sum('line_total'), Count('id'),
+        kind=DailyRevenue.Kind.CUSTOM.value, relations=(),
+    )
+
+
+def revenue_report(group_by, date_from=None, date_to=None, kind=None, source='rollup'):
+    """
+    Return revenue rows grouped by the requested dimensions, plus a grand total.
+    """
+    if 'item' in group_by:
+        rows_for = _item_rows
+    else:
+        rows_for = _rollup_rows if source == 'rollup' else _raw_rows
+    merged = {}
+    for row in rows_for(group_by, date_from, date_to, kind):
+        key = tuple(value for name, value in row.items() if name not in ('total', 'count'))
+        if key in merged:
+            merged[key]['total'] += row['total']
+            merged[key]['count'] += row['count']
+        else:
+            merged[key] = row
+
+    # Rollup rows that netted out to nothing (all invoices moved or deleted)
+    rows = [row for row in merged.values() if row['count'] or row['total']]
+    rows.sort(key=lambda row: group_sort_key(
+        value for name, value in row.items() if name not in ('total', 'count')
+    ))
+    grand_total = sum((row['total'] for row in rows), Decimal('0'))
+    for row in rows:
+        row['total'] = f"{row['total']:.2f}"
+    return {'results': rows, 'total': f'{grand_total:.2f}'}
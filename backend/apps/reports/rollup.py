@@ -0,0 +1,115 @@
+"""
+Incremental maintenance and chunked rebuild of the DailyRevenue rollup.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F, Sum, Count, Min, Max
+from apps.invoices.models import Invoice, CustomInvoice
+from .models import DailyRevenue
+
+# Per rollup kind: invoice model, amount column and whether it carries course/batch
+ROLLUP_SOURCES = {
+    DailyRevenue.Kind.STUDENT: (Invoice, 'amount', True),
+    DailyRevenue.Kind.CUSTOM: (CustomInvoice, 'total_amount', False),
+}
+
+
+def kind_for_model(model):
+    for kind, (source_model, _amount_field, _has_relations) in ROLLUP_SOURCES.items():
+        if source_model is model:
+            return kind
+    return None
+
+
+def revenue_key(kind, values):
+    """
+    Reduce an invoice (or a .values() row of one) to its rollup contribution:
+    (date, course_id, batch_id, amount).
+    """
+    model, amount_field, has_relations = ROLLUP_SOURCES[kind]
+    get = values.get if isinstance(values, dict) else lambda name: getattr(values, name)
+    return (
+        get('payment_date'),
+        get('course_id') if has_relations else None,
+        get('batch_id') if has_relations else None,
+        Decimal(str(get(amount_field) or 0)).quantize(Decimal('0.01')),
+    )
+
+
+def snapshot_fields(kind):
+    model, amount_field, has_relations = ROLLUP_SOURCES[kind]
+    fields = ['payment_date', amount_field]
+    if has_relations:
+        fields += ['course_id', 'batch_id']
+    return fields
+
+
+def apply_delta(kind, key, sign):
+    """
+    Add (sign=1) or remove (sign=-1) one invoice's contribution.
+    """
+    date, course_id, batch_id, amount = key
+    filters = {'date': date, 'kind': kind, 'course_id': course_id, 'batch_id': batch_id}
+    with transaction.atomic():
+        row_id = DailyRevenue.objects.filter(**filters).values_list('pk', flat=True).first()
+        if row_id:
+            DailyRevenue.objects.filter(pk=row_id).update(
+                amount=F('amount') + amount * sign,
+                invoice_count=F('invoice_count') + sign,
+            )
+        else:
+            DailyRevenue.objects.create(amount=amount * sign, invoice_count=sign, **filters)
+
+
+def date_bounds():
+    """
+    Earliest and latest payment_date over all invoice tables.
+    """
+    lows, highs = [], []
+    for model, _amount_field, _has_relations in ROLLUP_SOURCES.values():
+        bounds = model.objects.aggregate(low=Min('payment_date'), high=Max('payment_date'))
+        if bounds['low']:
+            lows.append(bounds['low'])
+            highs.append(bounds['high'])
+    if not lows:
+        return None, None
+    return min(lows), max(highs)
+
+
+def rebuild_window(date_from, date_to, batch_size=1000):
+    """
+    Recompute rollup rows for payment dates in [date_from, date_to] with one
+    grouped query per invoice table. Returns the number of rows written.
+    """
+    rows = []
+    for kind, (model, amount_field, has_relations) in ROLLUP_SOURCES.items():
+        fields = ['payment_date'] + (['course_id', 'batch_id'] if has_relations else [])
+        grouped = (
+            model.objects.order_by()
+            .filter(payment_date__gte=date_from, payment_date__lte=date_to)
+            .values(*fields)
+            .annotate(total=Sum(amount_field), count=Count('id'))
+        )
+        for row in grouped:
+            rows.append(DailyRevenue(
+                date=row['payment_date'],
+                kind=kind,
+                course_id=row.get('course_id'),
+                batch_id=row.get('batch_id'),
+                amount=row['total'] or 0,
+                invoice_count=row['count'],
+            ))
+
+    with transaction.atomic():
+        DailyRevenue.objects.filter(date__gte=date_from, date__lte=date_to).delete()
+        DailyRevenue.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def iter_windows(date_from, date_to, days):
+    start = date_from
+    while start <= date_to:
+        end = min(start + timedelta(days=days - 1), date_to)
+        yield start, end
+        start = end + timedelta(days=1)
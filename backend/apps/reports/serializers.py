@@ -0,0 +1,28 @@
+from rest_framework import serializers
+from .revenue import DIMENSIONS, KINDS, SOURCES
+
+
+class RevenueReportParamsSerializer(serializers.Serializer):
+    """
+    Query parameters for the revenue report.
+    """
+    group_by = serializers.CharField(required=False, default='month')
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    kind = serializers.ChoiceField(choices=KINDS, required=False)
+    source = serializers.ChoiceField(choices=SOURCES, required=False, default='rollup')
+
+    def validate_group_by(self, value):
+        dimensions = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in dimensions if name not in DIMENSIONS]
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown dimension: {', '.join(unknown)}. Allowed: {', '.join(DIMENSIONS)}."
+            )
+        return list(dict.fromkeys(dimensions))
+
+    def validate(self, data):
+        if data.get('date_from') and data.get('date_to'):
+            if data['date_to'] < data['date_from']:
+                raise serializers.ValidationError('date_to must be on or after date_from.')
+        return data
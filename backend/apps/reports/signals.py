@@ -0,0 +1,57 @@
+from functools import partial
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from apps.core.cache import bump_data_version
+from apps.courses.models import Course
+from apps.invoices.models import Invoice, CustomInvoice
+from .rollup import kind_for_model, revenue_key, snapshot_fields, apply_delta
+
+
+def bump_revenue_after_commit():
+    """
+    Invalidate cached reports once the write commits. Bumped earlier, a
+    report read before the commit would cache the old rows under the new
+    version.
+    """
+    transaction.on_commit(partial(bump_data_version, 'revenue'))
+
+
+@receiver(pre_save, sender=Invoice)
+@receiver(pre_save, sender=CustomInvoice)
+def remember_revenue_contribution(sender, instance, **kwargs):
+    """
+    Capture the stored values before an update so the old contribution
+    can be taken out of the rollup.
+    """
+    instance._revenue_previous = None
+    if instance.pk:
+        kind = kind_for_model(sender)
+        previous = sender.objects.filter(pk=instance.pk).values(*snapshot_fields(kind)).first()
+        if previous:
+            instance._revenue_previous = revenue_key(kind, previous)
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=CustomInvoice)
+def update_revenue_rollup(sender, instance, **kwargs):
+    kind = kind_for_model(sender)
+    previous = getattr(instance, '_revenue_previous', None)
+    current = revenue_key(kind, instance)
+    if previous != current:
+        if previous:
+            apply_delta(kind, previous, -1)
+        apply_delta(kind, current, 1)
+    bump_revenue_after_commit()
+
+
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=CustomInvoice)
+def remove_from_revenue_rollup(sender, instance, origin=None, **kwargs):
+    # Rollup rows of a deleted course are cascaded away with it
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model is not Course:
+        kind = kind_for_model(sender)
+        apply_delta(kind, revenue_key(kind, instance), -1)
+    bump_revenue_after_commit()
@@ -0,0 +1,79 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from apps.authentication.models import User
+from apps.batches.models import Batch
+from apps.core.cache import get_data_version
+from apps.courses.models import Course
+from apps.invoices.models import Invoice
+from apps.students.models import Student
+from .models import DailyRevenue
+
+
+class CheckRevenueRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(name='Course', description='', duration=3, fee=Decimal('1000.00'))
+        batch = Batch.objects.create(
+            name='Batch', course=course, start_date=date(2026, 1, 1),
+            end_date=date(2026, 6, 30), instructor_name='Instructor'
+        )
+        user = User.objects.create_user(username='student@example.com', email='student@example.com', password='x')
+        student = Student.objects.create(
+            user=user, name='Student', email=user.email, phone='0100000000', enrollment_date=date(2026, 1, 1)
+        )
+        # Same month and course, one with a batch and one without
+        Invoice.objects.create(
+            student=student, course=course, batch=batch, amount=Decimal('500.00'), payment_date=date(2026, 1, 10)
+        )
+        Invoice.objects.create(
+            student=student, course=course, amount=Decimal('250.00'), payment_date=date(2026, 1, 20)
+        )
+
+    def test_matches_with_and_without_batch(self):
+        output = StringIO()
+        call_command('check_revenue_rollup', stdout=output)
+        self.assertIn('Rollup matches invoices across 2 groups.', output.getvalue())
+
+    def test_reports_mismatched_group(self):
+        DailyRevenue.objects.filter(batch__isnull=True).update(amount=Decimal('1.00'))
+        output = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('check_revenue_rollup', stdout=output)
+        self.assertIn('invoices 250.00 (1) != rollup 1.00 (1)', output.getvalue())
+
+
+class RevenueVersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(name='Course', description='', duration=3, fee=Decimal('1000.00'))
+        user = User.objects.create_user(username='student@example.com', email='student@example.com', password='x')
+        cls.student = Student.objects.create(
+            user=user, name='Student', email=user.email, phone='0100000000', enrollment_date=date(2026, 1, 1)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_version_is_bumped_after_commit(self):
+        version = get_data_version('revenue')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            invoice = Invoice.objects.create(
+                student=self.student, course=self.course, amount=Decimal('500.00'), payment_date=date(2026, 1, 10)
+            )
+            # A report read before the commit still sees the old version
+            self.assertEqual(get_data_version('revenue'), version)
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(get_data_version('revenue'), version)
+
+        version = get_data_version('revenue')
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice.delete()
+            self.assertEqual(get_data_version('revenue'), version)
+        self.assertNotEqual(get_data_version('revenue'), version)
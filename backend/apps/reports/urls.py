@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import RevenueReportView
+
+urlpatterns = [
+    path('revenue/', RevenueReportView.as_view(), name='revenue-report'),
+]
@@ -0,0 +1,47 @@
+from hashlib import md5
+import json
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from apps.authentication.permissions import IsAdmin
+from apps.core.cache import get_data_version, recently_written
+from apps.core.db_router import read_from_primary
+from .revenue import revenue_report
+from .serializers import RevenueReportParamsSerializer
+
+
+class RevenueReportView(APIView):
+    """
+    Admin only.
+    GET /api/reports/revenue/?group_by=course,month&date_from=2026-01-01&date_to=2026-12-31
+
+    Revenue over student invoices and custom invoices grouped by any of
+    course, batch, month and kind. Served from the DailyRevenue rollup
+    unless ?source=raw. Results are cached until the next invoice write.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        params = RevenueReportParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        options = params.validated_data
+
+        fingerprint = md5(json.dumps(options, sort_keys=True, default=str).encode()).hexdigest()
+        cache_key = f"reports:revenue:{get_data_version('revenue')}:{fingerprint}"
+        report = cache.get(cache_key)
+        if report is None:
+            # Replicas may not have an invoice written seconds ago yet, and
+            # this result is cached under the new version
+            with read_from_primary(recently_written('revenue', settings.DB_REPLICA_PIN_SECONDS)):
+                report = revenue_report(**options)
+            cache.set(cache_key, report, settings.REPORT_CACHE_TIMEOUT)
+
+        return Response({
+            'group_by': options['group_by'],
+            'date_from': options.get('date_from'),
+            'date_to': options.get('date_to'),
+            'source': options['source'],
+            **report,
+        })
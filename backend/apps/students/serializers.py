@@ -1,7 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from decimal import Decimal
+from apps.core.serializers import OmitFieldsMixin
+from apps.invoices.models import Invoice
 from .models import Student, StudentCourse
 from apps.courses.serializers import CourseSerializer
 from apps.batches.serializers import BatchSerializer
@@ -9,7 +12,25 @@ from apps.batches.serializers import BatchSerializer
 User = get_user_model()
 
 
-class StudentCourseSerializer(serializers.ModelSerializer):
+def with_payment_totals(queryset):
+    """
+    Annotate each student's fee and payment totals, so StudentSerializer
+    does not run its aggregates once per student.
+    """
+    def total(subquery, field):
+        subquery = subquery.filter(student=OuterRef('pk')).values('student').annotate(total=Sum(field))
+        return Coalesce(
+            Subquery(subquery.values('total')), Value(Decimal('0')),
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        )
+
+    return queryset.annotate(
+        fees_total=total(StudentCourse.objects.all(), 'course__fee'),
+        paid_total=total(Invoice.objects.all(), 'amount'),
+    )
+
+
+class StudentCourseSerializer(OmitFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for StudentCourse enrollment.
     """
@@ -30,7 +51,7 @@ class StudentCourseSerializer(serializers.ModelSerializer):
         return data
 
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(OmitFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Student model.
     """
@@ -102,6 +123,8 @@ class StudentSerializer(serializers.ModelSerializer):
 
     def get_total_fees(self, obj):
         """Calculate total fees from all enrolled courses."""
+        if hasattr(obj, 'fees_total'):
+            return float(obj.fees_total)
         total = obj.enrollments.aggregate(
             total=Sum('course__fee')
         )['total']
@@ -109,6 +132,8 @@ class StudentSerializer(serializers.ModelSerializer):
 
     def get_total_paid(self, obj):
         """Calculate total paid from all invoices."""
+        if hasattr(obj, 'paid_total'):
+            return float(obj.paid_total)
         total = obj.invoices.aggregate(
             total=Sum('amount')
         )['total']
@@ -0,0 +1,76 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User
+from apps.batches.models import Batch
+from apps.courses.models import Course
+from apps.invoices.models import Invoice
+from .models import Student, StudentCourse
+
+
+class EnrollmentSideloadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin@example.com', email='admin@example.com', password='x', role=User.Role.ADMIN
+        )
+        courses = [
+            Course.objects.create(name=f'Course {i}', description='', duration=3, fee=Decimal('1000.00'))
+            for i in range(2)
+        ]
+        batches = [
+            Batch.objects.create(
+                name=f'Batch {i}', course=course, start_date=date(2026, 1, 1),
+                end_date=date(2026, 6, 30), instructor_name='Instructor'
+            )
+            for i, course in enumerate(courses)
+        ]
+        for i in range(5):
+            user = User.objects.create_user(
+                username=f'student{i}@example.com', email=f'student{i}@example.com', password='x'
+            )
+            student = Student.objects.create(
+                user=user, name=f'Student {i}', email=user.email, phone='0100000000',
+                enrollment_date=date(2026, 1, 1)
+            )
+            for course, batch in zip(courses, batches):
+                StudentCourse.objects.create(student=student, course=course, batch=batch)
+            Invoice.objects.create(
+                student=student, course=courses[0], amount=Decimal('400.00'), payment_date=date(2026, 1, 10)
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, include):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/students/enrollments/', {'include': include})
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def test_included_students_cost_one_query(self):
+        _, without_students = self.get('course,batch')
+        data, with_students = self.get('course,batch,student')
+
+        self.assertEqual(len(data['results']), 10)
+        self.assertEqual(len(data['included']['student']), 5)
+        self.assertEqual(with_students, without_students + 1)
+
+    def test_included_student_totals_match_student_endpoint(self):
+        data, _ = self.get('student')
+        student = Student.objects.first()
+        detail = self.client.get(f'/api/students/{student.pk}/').data
+
+        included = data['included']['student'][str(student.pk)]
+        for field in ('total_fees', 'total_paid', 'due_amount', 'payment_status'):
+            self.assertEqual(included[field], detail[field])
+        self.assertEqual(included['total_fees'], 2000.0)
+        self.assertEqual(included['payment_status'], 'PARTIAL')
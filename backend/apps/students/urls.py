@@ -3,8 +3,9 @@ from rest_framework.routers import DefaultRouter
 from .views import StudentViewSet, StudentCourseViewSet
 
 router = DefaultRouter()
-router.register(r'', StudentViewSet, basename='student')
+# Register enrollments first so "enrollments/" is not captured as a student pk
 router.register(r'enrollments', StudentCourseViewSet, basename='enrollment')
+router.register(r'', StudentViewSet, basename='student')
 
 urlpatterns = [
     path('', include(router.urls)),
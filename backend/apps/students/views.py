@@ -3,11 +3,14 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from apps.authentication.permissions import IsAdmin
+from apps.core.mixins import IdempotentCreateMixin, SideloadMixin
+from apps.courses.serializers import CourseSerializer
+from apps.batches.serializers import BatchSerializer
 from .models import Student, StudentCourse
-from .serializers import StudentSerializer, StudentCourseSerializer, EnrollmentSerializer
+from .serializers import StudentSerializer, StudentCourseSerializer, EnrollmentSerializer, with_payment_totals
 
 
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(IdempotentCreateMixin, viewsets.ModelViewSet):
     """
     ViewSet for Student CRUD operations.
     Admin only.
@@ -50,13 +53,20 @@ class StudentViewSet(viewsets.ModelViewSet):
         )
 
 
-class StudentCourseViewSet(viewsets.ReadOnlyModelViewSet):
+class StudentCourseViewSet(SideloadMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing student enrollments.
     Admin can view all, students can view their own.
+    Supports ?include=course,batch,student for a deduplicated compound response.
     """
     queryset = StudentCourse.objects.select_related('student', 'course', 'batch').all()
     serializer_class = StudentCourseSerializer
+    sideload_serializers = {
+        'course': (CourseSerializer, ()),
+        'batch': (BatchSerializer, ('course_details',)),
+        'student': (StudentSerializer, ('enrollments',)),
+    }
+    sideload_omit_fields = ('course_details', 'batch_details')
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['student__name', 'course__name']
@@ -69,10 +79,16 @@ class StudentCourseViewSet(viewsets.ReadOnlyModelViewSet):
 
         # Students can only see their own enrollments
         if user.is_student:
-            try:
-                student = user.student_profile
-                queryset = queryset.filter(student=student)
-            except Student.DoesNotExist:
+            if user.student_id:
+                queryset = queryset.filter(student_id=user.student_id)
+            else:
                 queryset = queryset.none()
 
         return queryset
+
+    def get_sideload_queryset(self, name, model):
+        queryset = super().get_sideload_queryset(name, model)
+        if name == 'student':
+            # One query for all included students instead of four aggregates each
+            queryset = with_payment_totals(queryset)
+        return queryset
@@ -1,4 +1,31 @@
-import pymysql
+import logging
+import os
+from pathlib import Path
 
-# Install PyMySQL as MySQLdb to work with Django
-pymysql.install_as_MySQLdb()
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# Read .env here as well as in settings: the driver is chosen before settings load
+load_dotenv(Path(__file__).resolve().parent.parent / '.env')
+
+# MySQL driver: 'mysqlclient' (C extension, fastest row decoding), 'pymysql'
+# (pure Python) or 'auto' to use mysqlclient when installed. A requested
+# mysqlclient that is not installed falls back to PyMySQL with a warning.
+DB_DRIVER = os.environ.get('DB_DRIVER', 'auto')
+
+db_driver = None
+if DB_DRIVER in ('auto', 'mysqlclient'):
+    try:
+        import MySQLdb  # noqa: F401
+        db_driver = 'mysqlclient'
+    except ImportError:
+        if DB_DRIVER == 'mysqlclient':
+            logger.warning('DB_DRIVER=mysqlclient but mysqlclient is not installed; using PyMySQL.')
+
+if db_driver is None:
+    import pymysql
+
+    # Install PyMySQL as MySQLdb to work with Django
+    pymysql.install_as_MySQLdb()
+    db_driver = 'pymysql'
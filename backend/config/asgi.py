@@ -1,10 +1,13 @@
 """
 ASGI config for Student Management System.
+Run with: GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker pipenv run gunicorn -c gunicorn_config.py
 """
 
 import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Route the hot read endpoints to their async views (see apps.core.async_views)
+os.environ.setdefault('ASYNC_READ_VIEWS', 'True')
 
 application = get_asgi_application()
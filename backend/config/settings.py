@@ -5,7 +5,9 @@ Django settings for Student Management System.
 from pathlib import Path
 from datetime import timedelta
 import os
+import tempfile
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -37,21 +39,26 @@ INSTALLED_APPS = [
     'corsheaders',
 
     # Local apps
+    'apps.core',
     'apps.authentication',
     'apps.courses',
     'apps.batches',
     'apps.students',
     'apps.invoices',
     'apps.certificates',
+    'apps.reports',
 ]
 
 MIDDLEWARE = [
+    'apps.core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'apps.core.middleware.LoadSheddingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -77,9 +84,14 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
+# Connections are kept for DB_CONN_MAX_AGE seconds and pinged before reuse,
+# so requests skip the TCP connect, login and init_command. DB_POOL=True
+# switches to a per-process pool for threaded or async workers, where each
+# request returns its connection to the pool when it finishes.
+DB_POOL = os.environ.get('DB_POOL', 'False') == 'True'
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'apps.core.db_backends.mysql_pool' if DB_POOL else 'django.db.backends.mysql',
         'NAME': os.environ.get('DB_NAME', 'student_management_db'),
         'USER': os.environ.get('DB_USER', 'root'),
         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
@@ -88,12 +100,70 @@ DATABASES = {
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
         },
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'POOL': {
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'RECYCLE': int(os.environ.get('DB_POOL_RECYCLE', 3600)),
+            'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        },
     }
 }
 
+# Read replicas: comma-separated host[:port] list, e.g. "10.0.0.5,10.0.0.6:3307".
+# Safe-method API requests read from a healthy replica; everything else, and
+# users who wrote in the last DB_REPLICA_PIN_SECONDS, use the primary.
+# Replicas more than DB_REPLICA_MAX_LAG seconds behind are skipped; lag is
+# checked every DB_REPLICA_CHECK_INTERVAL seconds per process.
+DB_REPLICA_HOSTS = [host.strip() for host in os.environ.get('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+for number, replica in enumerate(DB_REPLICA_HOSTS, start=1):
+    replica_host, _, replica_port = replica.partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': replica_host,
+        'PORT': replica_port or DATABASES['default']['PORT'],
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        # Give up quickly on a dead replica and read from the primary instead
+        'OPTIONS': {**DATABASES['default']['OPTIONS'], 'connect_timeout': 2},
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['apps.core.db_router.ReplicaRouter']
+DB_REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 10))
+DB_REPLICA_MAX_LAG = int(os.environ.get('DB_REPLICA_MAX_LAG', 5))
+DB_REPLICA_CHECK_INTERVAL = int(os.environ.get('DB_REPLICA_CHECK_INTERVAL', 5))
+# Requests whose path matches may read from replicas (not the Django admin)
+DB_REPLICA_PATHS = r'^/api/'
+
 # Custom User Model
 AUTH_USER_MODEL = 'authentication.User'
 
+# Logins check passwords through a bounded number of hashing slots per machine
+AUTHENTICATION_BACKENDS = ['apps.authentication.backends.BoundedHashingModelBackend']
+
+# PBKDF2 work factor; changing it re-hashes each password at its next login
+PASSWORD_HASHERS = [
+    'apps.authentication.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 0)) or None
+
+# Concurrent password hashes per machine (default: one per CPU core), seconds
+# a login waits for a free slot before a 503, and where the slot locks live
+LOGIN_HASH_CONCURRENCY = int(os.environ.get('LOGIN_HASH_CONCURRENCY', os.cpu_count() or 1))
+LOGIN_HASH_QUEUE_TIMEOUT = float(os.environ.get('LOGIN_HASH_QUEUE_TIMEOUT', 5))
+LOGIN_HASH_LOCK_DIR = os.environ.get(
+    'LOGIN_HASH_LOCK_DIR', os.path.join(tempfile.gettempdir(), 'studentmgmt-login-slots')
+)
+
+# last_login is only rewritten when older than this many seconds
+LAST_LOGIN_RESOLUTION = int(os.environ.get('LAST_LOGIN_RESOLUTION', 300))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -110,6 +180,38 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Cache
+# Shared by all gunicorn workers: Redis when REDIS_URL is set (requires the
+# `redis` package), otherwise a file-based cache on local disk.
+REDIS_URL = os.environ.get('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'apps.core.cache_backends.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'apps.core.cache_backends.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', str(BASE_DIR / 'cache')),
+        }
+    }
+
+# Request metrics (apps.core.metrics). Each worker writes its counters to
+# METRICS_SPOOL_DIR at most every METRICS_FLUSH_INTERVAL seconds, and
+# /api/metrics/ adds them up. SERVER_TIMING adds a Server-Timing header
+# with the request's total, SQL, cache and PDF time. It is off by default:
+# the header goes to every client, anonymous ones included.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+METRICS_SPOOL_DIR = os.environ.get(
+    'METRICS_SPOOL_DIR', os.path.join(tempfile.gettempdir(), 'studentmgmt-metrics')
+)
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+SERVER_TIMING = os.environ.get('SERVER_TIMING', 'False') == 'True'
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -124,13 +226,60 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Media storage
+# STORAGE_BACKEND=s3 keeps PDFs and student uploads in an S3-compatible bucket
+# (AWS S3, MinIO, ...) and requires the django-storages and boto3 packages.
+# Downloads then redirect to short-lived presigned URLs instead of streaming
+# through gunicorn.
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+if STORAGE_BACKEND == 's3':
+    from boto3.s3.transfer import TransferConfig
+
+    STORAGES = {
+        'default': {
+            'BACKEND': 'storages.backends.s3.S3Storage',
+            'OPTIONS': {
+                'bucket_name': os.environ.get('AWS_STORAGE_BUCKET_NAME', ''),
+                'access_key': os.environ.get('AWS_ACCESS_KEY_ID', ''),
+                'secret_key': os.environ.get('AWS_SECRET_ACCESS_KEY', ''),
+                'region_name': os.environ.get('AWS_S3_REGION_NAME') or None,
+                # Set for MinIO or other S3-compatible stores, e.g. http://127.0.0.1:9000
+                'endpoint_url': os.environ.get('AWS_S3_ENDPOINT_URL') or None,
+                'addressing_style': os.environ.get('AWS_S3_ADDRESSING_STYLE') or None,
+                'default_acl': None,
+                'file_overwrite': True,
+                'querystring_auth': True,
+                'querystring_expire': int(os.environ.get('MEDIA_URL_EXPIRE_SECONDS', 300)),
+                # Uploads above the threshold are streamed in multipart chunks
+                'transfer_config': TransferConfig(
+                    multipart_threshold=8 * 1024 * 1024,
+                    multipart_chunksize=8 * 1024 * 1024,
+                ),
+            },
+        },
+        'staticfiles': {
+            'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+        },
+    }
+    MEDIA_DOWNLOAD_REDIRECT = True
+else:
+    STORAGES = {
+        'default': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        },
+        'staticfiles': {
+            'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+        },
+    }
+    MEDIA_DOWNLOAD_REDIRECT = False
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.authentication.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -141,7 +290,94 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    # Token buckets per client; only views that set throttle_scope are limited.
+    # Rates are 'number/period[:burst]'
+    'DEFAULT_THROTTLE_CLASSES': [
+        'apps.core.throttling.TokenBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'certificate_verify': os.environ.get('CERTIFICATE_VERIFY_RATE', '120/min:20'),
+        'certificate_verify_bulk': os.environ.get('CERTIFICATE_VERIFY_BULK_RATE', '30/min'),
+        'pdf_download': os.environ.get('PDF_DOWNLOAD_RATE', '30/min:10'),
+    },
+    # Behind nginx the client address is the last X-Forwarded-For entry
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 1)),
+}
+
+# Serve certificate verify, /auth/me/ and the course and batch lists with
+# async views. config.asgi turns this on; keep it off under sync workers
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS', 'False') == 'True'
+
+# Reuse nested representations (courses, batches) within a single response render
+SERIALIZER_IDENTITY_MAP = os.environ.get('SERIALIZER_IDENTITY_MAP', 'True') == 'True'
+
+# Seconds a computed report stays cached; writes invalidate it earlier
+REPORT_CACHE_TIMEOUT = int(os.environ.get('REPORT_CACHE_TIMEOUT', 3600))
+
+# PDF rendering: number of warm render processes in the machine's renderer
+# (manage.py run_pdf_renderer; 0 renders inline in the request), the socket
+# web workers reach it on, seconds allowed per document, memory cap per render
+# process, documents rendered before a process is recycled, and seconds a job
+# waits for a free render process
+PDF_RENDER_POOL_SIZE = int(os.environ.get('PDF_RENDER_POOL_SIZE', 0))
+PDF_RENDER_SOCKET = os.environ.get(
+    'PDF_RENDER_SOCKET', os.path.join(tempfile.gettempdir(), 'studentmgmt-pdf-render.sock')
+)
+PDF_RENDER_TIMEOUT = int(os.environ.get('PDF_RENDER_TIMEOUT', 30))
+PDF_RENDER_MEMORY_LIMIT_MB = int(os.environ.get('PDF_RENDER_MEMORY_LIMIT_MB', 512))
+PDF_RENDER_MAX_TASKS = int(os.environ.get('PDF_RENDER_MAX_TASKS', 500))
+PDF_RENDER_QUEUE_TIMEOUT = int(os.environ.get('PDF_RENDER_QUEUE_TIMEOUT', 10))
+
+# Load shedding: at most `concurrency` requests of each group run at once
+# across all gunicorn workers (0 disables the group); the rest are answered
+# with `status` right away. Keep the total well below GUNICORN_WORKERS so
+# admin requests always find a free worker.
+LOAD_SHEDDING = {
+    'certificate_verify': {
+        'path': r'^/api/certificates/verify/',
+        'concurrency': int(os.environ.get('LOAD_SHEDDING_VERIFY_CONCURRENCY', 2)),
+        'status': 429,
+    },
+    'pdf': {
+        'path': r'^/api/(invoices/student|invoices/custom|certificates)/[^/]+/download/$',
+        'concurrency': int(os.environ.get('LOAD_SHEDDING_PDF_CONCURRENCY', 2)),
+        'status': 503,
+    },
 }
+# Where the per-machine slot locks live
+LOAD_SHEDDING_LOCK_DIR = os.environ.get(
+    'LOAD_SHEDDING_LOCK_DIR', os.path.join(tempfile.gettempdir(), 'studentmgmt-load-shedding')
+)
+LOAD_SHEDDING_RETRY_AFTER = int(os.environ.get('LOAD_SHEDDING_RETRY_AFTER', 2))
+
+# PDF output profile: print (compressed), archive (compressed and reproducible) or debug
+PDF_OUTPUT_PROFILE = os.environ.get('PDF_OUTPUT_PROFILE', 'print')
+
+# Idempotency-Key support on create endpoints (apps.core.models.IdempotencyKey):
+# how long a stored response can be replayed, and how long a key stays locked
+# while its first request runs before a retry may take it over
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 86400))
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.environ.get('IDEMPOTENCY_LOCK_TIMEOUT', 60))
+
+# Public certificate verification: seconds a payload stays in the shared cache
+# (edits invalidate it earlier), seconds an unknown ID is remembered, and the
+# max-age sent to browsers, nginx and CDNs
+CERTIFICATE_VERIFY_CACHE_TIMEOUT = int(os.environ.get('CERTIFICATE_VERIFY_CACHE_TIMEOUT', 3600))
+CERTIFICATE_VERIFY_MISS_TIMEOUT = int(os.environ.get('CERTIFICATE_VERIFY_MISS_TIMEOUT', 60))
+CERTIFICATE_VERIFY_MAX_AGE = int(os.environ.get('CERTIFICATE_VERIFY_MAX_AGE', 60))
+# Most certificate IDs accepted by one bulk verify request
+CERTIFICATE_VERIFY_BULK_MAX = int(os.environ.get('CERTIFICATE_VERIFY_BULK_MAX', 200))
+
+# Signed certificate tokens (QR codes): signing key, the public verify page the
+# QR code links to, and the max-age of signature-only verify responses.
+# Changing the key invalidates every printed QR code.
+CERTIFICATE_TOKEN_KEY = os.environ.get('CERTIFICATE_TOKEN_KEY', SECRET_KEY)
+CERTIFICATE_VERIFY_URL = os.environ.get('CERTIFICATE_VERIFY_URL', 'http://localhost:3000/verify')
+CERTIFICATE_TOKEN_MAX_AGE = int(os.environ.get('CERTIFICATE_TOKEN_MAX_AGE', 86400))
+
+# Seconds a user's active flag, role and student profile ID stay cached for
+# read requests; saving the user or student profile clears it earlier
+AUTH_USER_STATUS_TIMEOUT = int(os.environ.get('AUTH_USER_STATUS_TIMEOUT', 300))
 
 # JWT settings
 SIMPLE_JWT = {
@@ -149,7 +385,8 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # Done by CustomTokenObtainPairSerializer, which skips redundant writes
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -158,8 +395,14 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.authentication.serializers.FilteredTokenRefreshSerializer',
 }
 
+# Per-process Bloom filter of blacklisted refresh tokens: entries it is sized
+# for before growing, and seconds between reads of new blacklist rows
+TOKEN_BLACKLIST_FILTER_CAPACITY = int(os.environ.get('TOKEN_BLACKLIST_FILTER_CAPACITY', 100000))
+TOKEN_BLACKLIST_FILTER_REFRESH = int(os.environ.get('TOKEN_BLACKLIST_FILTER_REFRESH', 10))
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     origin.strip()
@@ -167,6 +410,8 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 
 # Security settings
 SECURE_BROWSER_XSS_FILTER = True
@@ -5,6 +5,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from apps.core.views import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -14,6 +15,8 @@ urlpatterns = [
     path('api/students/', include('apps.students.urls')),
     path('api/invoices/', include('apps.invoices.urls')),
     path('api/certificates/', include('apps.certificates.urls')),
+    path('api/reports/', include('apps.reports.urls')),
+    path('api/metrics/', metrics_view, name='metrics'),
 ]
 
 # Serve media files in development
@@ -1,27 +1,65 @@
 """
 Gunicorn configuration for Student Management System.
-Run with: pipenv run gunicorn config.wsgi:application -c gunicorn_config.py
+Run with: GUNICORN_POOL=api pipenv run gunicorn -c gunicorn_config.py
+
+Run one gunicorn per named pool (systemd/backend@.service does this, with
+the pool as the instance name). nginx sends PDF downloads and bulk requests
+to the pdf pool and public certificate verification to the public pool, so
+slow renders and anonymous bursts never hold the workers serving CRUD.
+Each pool's defaults can be overridden with GUNICORN_<POOL>_WORKERS,
+GUNICORN_<POOL>_WORKER_CLASS, GUNICORN_<POOL>_TIMEOUT and GUNICORN_<POOL>_BIND.
+
+A uvicorn worker class (uvicorn.workers.UvicornWorker) serves config.asgi
+instead of config.wsgi, with async views for the hot read endpoints.
 """
 import multiprocessing
 import os
 
+cpu_count = multiprocessing.cpu_count()
+
+# Set GUNICORN_WORKER_CLASS to change every pool's default worker class
+default_worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+
+POOLS = {
+    # Admin and student CRUD, lists, reports. GUNICORN_WORKERS still applies here
+    "api": {
+        "port": 8000,
+        "workers": int(os.environ.get("GUNICORN_WORKERS", cpu_count * 2 + 1)),
+        "timeout": 60,
+    },
+    # PDF downloads and bulk verification: slow and CPU-bound
+    "pdf": {"port": 8001, "workers": cpu_count, "timeout": 120},
+    # Anonymous certificate verification: short and mostly served from cache
+    "public": {"port": 8002, "workers": 2, "timeout": 15},
+}
+
+pool = os.environ.get("GUNICORN_POOL", "api")
+if pool not in POOLS:
+    raise RuntimeError(f"Unknown GUNICORN_POOL {pool!r}; expected one of {', '.join(POOLS)}")
+
+
+def pool_setting(name, default):
+    return os.environ.get(f"GUNICORN_{pool.upper()}_{name}", default)
+
+
 # Bind to localhost only - Nginx will reverse proxy
-bind = "127.0.0.1:8000"
+bind = pool_setting("BIND", f"127.0.0.1:{POOLS[pool]['port']}")
 
-# Workers: (2 x CPU cores) + 1
-workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
-worker_class = "sync"
+workers = int(pool_setting("WORKERS", POOLS[pool]["workers"]))
+worker_class = pool_setting("WORKER_CLASS", default_worker_class)
+# Used when no app is given on the command line
+wsgi_app = "config.asgi:application" if "uvicorn" in worker_class.lower() else "config.wsgi:application"
 worker_connections = 1000
-timeout = 120
+timeout = int(pool_setting("TIMEOUT", POOLS[pool]["timeout"]))
 keepalive = 5
 
 # Logging
-accesslog = "/home/app/student-management/logs/gunicorn-access.log"
-errorlog = "/home/app/student-management/logs/gunicorn-error.log"
+accesslog = f"/home/app/student-management/logs/gunicorn-{pool}-access.log"
+errorlog = f"/home/app/student-management/logs/gunicorn-{pool}-error.log"
 loglevel = "info"
 
 # Process naming
-proc_name = "studentmgmt-backend"
+proc_name = f"studentmgmt-backend-{pool}"
 
 # Limit request sizes (16MB for file uploads)
 limit_request_body = 16777216
@@ -29,3 +67,26 @@ limit_request_body = 16777216
 # Graceful restart
 graceful_timeout = 30
 preload_app = True
+
+
+def on_starting(server):
+    # Request metrics restart from zero with the master (see apps.core.metrics).
+    # Runs after preload_app has loaded Django.
+    from apps.core.metrics import clear_spool
+    clear_spool(pool)
+
+
+def worker_exit(server, worker):
+    # Counts recorded since the last METRICS_FLUSH_INTERVAL flush would be
+    # lost with the worker; write them out before it goes.
+    from django.conf import settings
+    from apps.core.metrics import get_registry
+    if settings.METRICS_ENABLED:
+        get_registry().flush(force=True)
+
+
+def pre_fork(server, worker):
+    # preload_app loads Django in the master. Drop any database connection it
+    # opened, so workers do not inherit (and share) the same socket.
+    from django.db import connections
+    connections.close_all()
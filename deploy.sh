@@ -19,11 +19,14 @@ set -euo pipefail
 #
 #   # Passwordless sudo for service management only
 #   cat > /etc/sudoers.d/app << 'SUDOEOF'
-#   app ALL=(ALL) NOPASSWD: /bin/systemctl restart studentmgmt-backend
+#   app ALL=(ALL) NOPASSWD: /bin/systemctl restart studentmgmt-backend@*
 #   app ALL=(ALL) NOPASSWD: /bin/systemctl restart studentmgmt-frontend
+#   app ALL=(ALL) NOPASSWD: /bin/systemctl restart studentmgmt-pdf-renderer
 #   app ALL=(ALL) NOPASSWD: /bin/systemctl reload nginx
 #   app ALL=(ALL) NOPASSWD: /usr/sbin/nginx -t
 #   app ALL=(ALL) NOPASSWD: /bin/systemctl daemon-reload
+#   app ALL=(ALL) NOPASSWD: /bin/systemctl disable --now studentmgmt-backend
+#   app ALL=(ALL) NOPASSWD: /bin/rm -f /etc/systemd/system/studentmgmt-backend.service
 #   SUDOEOF
 #   chmod 0440 /etc/sudoers.d/app
 #
@@ -114,10 +117,22 @@ set -euo pipefail
 #   rm -f /etc/nginx/sites-enabled/default
 #   nginx -t && systemctl reload nginx
 #
-#   cp /home/app/student-management/systemd/backend.service /etc/systemd/system/studentmgmt-backend.service
+#   # Servers set up before the worker pools ran one studentmgmt-backend unit,
+#   # which still holds port 8000. Stop, disable and remove it first, or the
+#   # api pool cannot bind. deploy.sh does the same if it finds the old unit.
+#   systemctl disable --now studentmgmt-backend
+#   rm -f /etc/systemd/system/studentmgmt-backend.service
+#
+#   # One backend unit per gunicorn pool (api, pdf, public); see backend/gunicorn_config.py
+#   cp /home/app/student-management/systemd/backend@.service /etc/systemd/system/studentmgmt-backend@.service
 #   cp /home/app/student-management/systemd/frontend.service /etc/systemd/system/studentmgmt-frontend.service
+#   # One PDF renderer per machine, shared by every backend worker
+#   cp /home/app/student-management/systemd/pdf-renderer.service /etc/systemd/system/studentmgmt-pdf-renderer.service
+#   cp /home/app/student-management/systemd/token-compaction.service /etc/systemd/system/studentmgmt-token-compaction.service
+#   cp /home/app/student-management/systemd/token-compaction.timer /etc/systemd/system/studentmgmt-token-compaction.timer
 #   systemctl daemon-reload
-#   systemctl enable studentmgmt-backend studentmgmt-frontend
+#   systemctl enable studentmgmt-pdf-renderer studentmgmt-backend@api studentmgmt-backend@pdf studentmgmt-backend@public studentmgmt-frontend
+#   systemctl enable --now studentmgmt-token-compaction.timer
 #
 # STEP 11: First deployment - run this script
 # -------------------------------------------------------
@@ -136,6 +151,10 @@ PROJECT_DIR="/home/app/student-management"
 BACKEND_DIR="$PROJECT_DIR/backend"
 FRONTEND_DIR="$PROJECT_DIR/frontend"
 LOG_FILE="$PROJECT_DIR/logs/deploy.log"
+# Gunicorn pools, one studentmgmt-backend@<pool> unit each
+BACKEND_POOLS="api pdf public"
+# Single backend unit from before the pools; it holds port 8000
+LEGACY_BACKEND_UNIT="/etc/systemd/system/studentmgmt-backend.service"
 
 # Ensure logs directory exists
 mkdir -p "$PROJECT_DIR/logs"
@@ -162,6 +181,9 @@ pipenv install --deploy --ignore-pipfile
 log "Running database migrations..."
 pipenv run python manage.py migrate --noinput
 
+# Populate the revenue rollup on first deploy (no-op once it has rows)
+pipenv run python manage.py rebuild_revenue_rollup --if-empty
+
 # 4. Backend: Collect static files
 log "Collecting static files..."
 pipenv run python manage.py collectstatic --noinput
@@ -175,8 +197,20 @@ log "Building frontend..."
 npm run build
 
 # 6. Restart services
-log "Restarting backend service..."
-sudo systemctl restart studentmgmt-backend
+if [ -f "$LEGACY_BACKEND_UNIT" ]; then
+    log "Removing legacy studentmgmt-backend service..."
+    sudo systemctl disable --now studentmgmt-backend
+    sudo rm -f "$LEGACY_BACKEND_UNIT"
+    sudo systemctl daemon-reload
+fi
+
+log "Restarting PDF renderer..."
+sudo systemctl restart studentmgmt-pdf-renderer
+
+log "Restarting backend services..."
+for pool in $BACKEND_POOLS; do
+    sudo systemctl restart "studentmgmt-backend@$pool"
+done
 
 log "Restarting frontend service..."
 sudo systemctl restart studentmgmt-frontend
@@ -188,11 +222,13 @@ sudo nginx -t && sudo systemctl reload nginx
 log "========== DEPLOYMENT COMPLETED =========="
 
 # Show service status
-if systemctl is-active --quiet studentmgmt-backend; then
-    log "Backend: RUNNING"
-else
-    log "Backend: FAILED - check logs with: journalctl -u studentmgmt-backend -n 50"
-fi
+for pool in $BACKEND_POOLS; do
+    if systemctl is-active --quiet "studentmgmt-backend@$pool"; then
+        log "Backend ($pool): RUNNING"
+    else
+        log "Backend ($pool): FAILED - check logs with: journalctl -u studentmgmt-backend@$pool -n 50"
+    fi
+done
 
 if systemctl is-active --quiet studentmgmt-frontend; then
     log "Frontend: RUNNING"
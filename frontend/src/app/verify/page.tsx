@@ -1,6 +1,6 @@
 'use client';
 
-import { useState, FormEvent } from 'react';
+import { useState, useEffect, FormEvent } from 'react';
 import { publicAPI } from '@/lib/api';
 
 // ─── Types ────────────────────────────────────────────────────────────────────
@@ -26,6 +26,8 @@ interface CertificateData {
 
 interface VerifyResponse {
   valid: boolean;
+  // 'signature': checked from the QR token alone, with only the signed fields
+  verified_by?: 'signature' | 'record';
   certificate?: CertificateData;
   error?: string;
 }
@@ -133,6 +135,34 @@ export default function VerifyCertificatePage() {
   const [loading, setLoading] = useState(false);
   const [result, setResult] = useState<VerifyResponse | null>(null);
   const [inputError, setInputError] = useState('');
+  const [token, setToken] = useState<string | null>(null);
+
+  function verifyToken(value: string, checkRevocation: boolean) {
+    setLoading(true);
+    publicAPI
+      .verifyToken(value, checkRevocation)
+      .then((response) => {
+        const data = response.data as VerifyResponse;
+        setResult(data);
+        if (data.certificate) setCertificateId(data.certificate.certificate_id);
+      })
+      .catch((err: any) => {
+        setResult({
+          valid: false,
+          error: err?.response?.data?.error || 'This verification link could not be checked.',
+        });
+      })
+      .finally(() => setLoading(false));
+  }
+
+  // Opened from a certificate's QR code: /verify?token=...
+  // The signature check needs no database; the revocation check is on request.
+  useEffect(() => {
+    const value = new URLSearchParams(window.location.search).get('token');
+    if (!value) return;
+    setToken(value);
+    verifyToken(value, false);
+  }, []);
 
   async function handleSubmit(e: FormEvent) {
     e.preventDefault();
@@ -159,6 +189,7 @@ export default function VerifyCertificatePage() {
   }
 
   const cert = result?.certificate;
+  const signatureOnly = result?.verified_by === 'signature';
 
   return (
     <div className="min-h-screen bg-gray-50 flex flex-col">
@@ -275,8 +306,56 @@ export default function VerifyCertificatePage() {
               </div>
             )}
 
+            {/* Signed QR token: only the signed fields are known */}
+            {result.valid && cert && signatureOnly && (
+              <div className="bg-white rounded-2xl border border-emerald-200 shadow-sm overflow-hidden">
+                <div className="flex flex-wrap items-center gap-4 bg-emerald-50 px-6 py-5">
+                  <div className="flex-shrink-0 w-10 h-10 rounded-full bg-emerald-100 border border-emerald-200
+                    flex items-center justify-center text-emerald-600">
+                    {Icons.check}
+                  </div>
+                  <div className="flex-1 min-w-0">
+                    <span className="text-base font-semibold text-emerald-800">Genuine Certificate</span>
+                    <p className="text-xs text-emerald-600 mt-0.5">
+                      The QR code carries a valid signature from Student Management System.
+                    </p>
+                  </div>
+                  <div className="text-right flex-shrink-0">
+                    <p className="text-[10px] uppercase tracking-wider font-semibold text-emerald-500">
+                      Certificate ID
+                    </p>
+                    <p className="font-mono text-sm font-bold text-emerald-800">
+                      {cert.certificate_id}
+                    </p>
+                  </div>
+                </div>
+
+                <div className="px-6 py-5 grid grid-cols-1 sm:grid-cols-3 gap-5">
+                  <Field label="Student" value={cert.student_name} />
+                  <Field label="Course" value={cert.course_name} />
+                  <Field label="Completed" value={fmt(cert.completion_date)} />
+                </div>
+
+                <div className="px-6 py-4 bg-gray-50 border-t border-gray-100 flex flex-wrap items-center justify-between gap-3">
+                  <p className="text-xs text-gray-500">
+                    Confirm the certificate has not been revoked and view the full record.
+                  </p>
+                  <button
+                    type="button"
+                    disabled={loading || !token}
+                    onClick={() => token && verifyToken(token, true)}
+                    className="flex items-center gap-2 bg-gray-900 hover:bg-gray-800
+                      disabled:bg-gray-400 disabled:cursor-not-allowed
+                      text-white text-xs font-medium px-3 py-2 rounded-lg transition-colors duration-150"
+                  >
+                    {loading ? <><Spinner />Checking…</> : <>{Icons.shield}Check revocation status</>}
+                  </button>
+                </div>
+              </div>
+            )}
+
             {/* Found */}
-            {result.valid && cert && (
+            {result.valid && cert && !signatureOnly && (
               <>
                 {/* Verified banner */}
                 <div className="bg-white rounded-2xl border border-emerald-200 shadow-sm overflow-hidden">
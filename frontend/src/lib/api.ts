@@ -63,6 +63,17 @@ api.interceptors.response.use(
   }
 );
 
+// Idempotency-Key for create requests: a retried request (e.g. after a token
+// refresh) carries the same key, so the backend creates the record only once
+const newIdempotencyKey = () =>
+  typeof crypto !== 'undefined' && typeof crypto.randomUUID === 'function'
+    ? crypto.randomUUID()
+    : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+
+const idempotent = (headers: Record<string, string> = {}) => ({
+  headers: { ...headers, 'Idempotency-Key': newIdempotencyKey() },
+});
+
 // Auth API
 export const authAPI = {
   login: (email: string, password: string) =>
@@ -97,14 +108,14 @@ export const batchesAPI = {
 export const studentsAPI = {
   getAll: (params?: any) => api.get('/students/', { params }),
   getOne: (id: number) => api.get(`/students/${id}/`),
-  create: (data: any) => api.post('/students/', data),
+  create: (data: any) => api.post('/students/', data, idempotent()),
   update: (id: number, data: any) => api.put(`/students/${id}/`, data),
   delete: (id: number) => api.delete(`/students/${id}/`),
   enroll: (id: number, data: any) => api.post(`/students/${id}/enroll/`, data),
   // File upload methods
-  createWithFiles: (data: FormData) => api.post('/students/', data, {
-    headers: { 'Content-Type': 'multipart/form-data' },
-  }),
+  createWithFiles: (data: FormData) => api.post('/students/', data,
+    idempotent({ 'Content-Type': 'multipart/form-data' })
+  ),
   updateWithFiles: (id: number, data: FormData) => api.patch(`/students/${id}/`, data, {
     headers: { 'Content-Type': 'multipart/form-data' },
   }),
@@ -114,7 +125,7 @@ export const studentsAPI = {
 export const invoicesAPI = {
   getAll: (params?: any) => api.get('/invoices/student/', { params }),
   getOne: (id: number) => api.get(`/invoices/student/${id}/`),
-  create: (data: any) => api.post('/invoices/student/', data),
+  create: (data: any) => api.post('/invoices/student/', data, idempotent()),
   download: (id: number) => api.get(`/invoices/student/${id}/download/`, { responseType: 'blob' }),
 };
 
@@ -122,7 +133,7 @@ export const invoicesAPI = {
 export const customInvoicesAPI = {
   getAll: (params?: any) => api.get('/invoices/custom/', { params }),
   getOne: (id: number) => api.get(`/invoices/custom/${id}/`),
-  create: (data: any) => api.post('/invoices/custom/', data),
+  create: (data: any) => api.post('/invoices/custom/', data, idempotent()),
   update: (id: number, data: any) => api.put(`/invoices/custom/${id}/`, data),
   delete: (id: number) => api.delete(`/invoices/custom/${id}/`),
   download: (id: number) => api.get(`/invoices/custom/${id}/download/`, { responseType: 'blob' }),
@@ -132,7 +143,7 @@ export const customInvoicesAPI = {
 export const certificatesAPI = {
   getAll: (params?: any) => api.get('/certificates/', { params }),
   getOne: (id: number) => api.get(`/certificates/${id}/`),
-  create: (data: any) => api.post('/certificates/', data),
+  create: (data: any) => api.post('/certificates/', data, idempotent()),
   download: (id: number) => api.get(`/certificates/${id}/download/`, { responseType: 'blob' }),
 };
 
@@ -140,6 +151,12 @@ export const certificatesAPI = {
 export const publicAPI = {
   verifyCertificate: (certificateId: string) =>
     axios.get(`${API_URL}/certificates/verify/`, { params: { certificate_id: certificateId } }),
+  // Signed token from the certificate's QR code. Without checkRevocation the
+  // server checks the signature only: no database lookup, cacheable at the edge.
+  verifyToken: (token: string, checkRevocation = false) =>
+    axios.get(`${API_URL}/certificates/verify/`, {
+      params: { token, check_revocation: checkRevocation ? 1 : 0 },
+    }),
 };
 
 export default api;